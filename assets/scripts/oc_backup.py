@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Incremental backups of ~/.openclaw for the upgrade flow.
+
+Each snapshot is a normal directory tree under ~/Documents/oc_backup, but
+its files are hardlinks into a content-addressed store (.objects/<sha256>),
+so a file that didn't change costs no space and no copy. The snapshot's
+index (.oc-index.json: path -> size, mtime, mode, hash) lets the next run
+skip hashing files whose size and mtime are unchanged; the rest are hashed
+and stored in parallel. Objects no snapshot links to any more are removed
+when old snapshots are pruned. Folders from the old cp -r backups have no
+index and are never touched.
+
+Usage: oc_backup.py backup [--source DIR] [--root DIR] [--keep-last N] [--keep-daily N] [--keep-weekly N]
+       oc_backup.py list [--root DIR]
+       oc_backup.py prune [--root DIR] [--keep-last N] [--keep-daily N] [--keep-weekly N]
+       oc_backup.py export <snapshot> <file.tar.xz|-> [--root DIR]
+       oc_backup.py restore <snapshot> <target-dir> [--root DIR]
+"""
+import argparse
+import errno
+import hashlib
+import json
+import os
+import shutil
+import stat
+import sys
+import tarfile
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+SOURCE_DIR = os.path.expanduser("~/.openclaw")
+BACKUP_ROOT = os.path.expanduser("~/Documents/oc_backup")
+OBJECTS = ".objects"
+INDEX_NAME = ".oc-index.json"
+PREFIX = "openclaw_bak_"
+CHUNK = 1024 * 1024
+WORKERS = os.cpu_count() or 4
+KEEP_LAST, KEEP_DAILY, KEEP_WEEKLY = 5, 7, 4
+
+
+class Snapshot:
+    """A snapshot directory and its index"""
+
+    def __init__(self, root, name):
+        self.name = name
+        self.path = os.path.join(root, name)
+        self._index = None
+
+    @property
+    def created(self):
+        return datetime.strptime(self.name[len(PREFIX):], "%Y%m%d_%H%M%S")
+
+    @property
+    def index(self):
+        if self._index is None:
+            with open(os.path.join(self.path, INDEX_NAME), 'r') as f:
+                self._index = json.load(f)
+        return self._index
+
+
+def snapshots(root=BACKUP_ROOT):
+    """Indexed snapshots, oldest first"""
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    found = []
+    for name in sorted(names):
+        if not (name.startswith(PREFIX) and os.path.isfile(os.path.join(root, name, INDEX_NAME))):
+            continue
+        snapshot = Snapshot(root, name)
+        try:
+            snapshot.created
+        except ValueError:
+            continue
+        found.append(snapshot)
+    return found
+
+
+def find_snapshot(root, name):
+    for snapshot in snapshots(root):
+        if snapshot.name == name or snapshot.name == PREFIX + name:
+            return snapshot
+    raise SystemExit(f"No snapshot named {name} in {root}")
+
+
+def _scan(source):
+    """Yield (relative path, lstat) for everything under source"""
+    for dirpath, dirnames, filenames in os.walk(source):
+        dirnames.sort()
+        for name in dirnames + sorted(filenames):
+            path = os.path.join(dirpath, name)
+            try:
+                yield os.path.relpath(path, source), os.lstat(path)
+            except FileNotFoundError:
+                continue
+
+
+def _store(objects, path):
+    """Copy a file into the object store while hashing it; returns the hash"""
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=objects, prefix=".in-")
+    try:
+        with open(path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            for chunk in iter(lambda: src.read(CHUNK), b""):
+                digest.update(chunk)
+                dst.write(chunk)
+        name = digest.hexdigest()
+        target = os.path.join(objects, name[:2], name)
+        if os.path.exists(target):
+            os.unlink(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp_path, target)
+        return name
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _object_path(objects, name):
+    return os.path.join(objects, name[:2], name)
+
+
+def backup(source=SOURCE_DIR, root=BACKUP_ROOT, workers=WORKERS):
+    """Take a snapshot; returns (Snapshot, stats)"""
+    start = time.perf_counter()
+    objects = os.path.join(root, OBJECTS)
+    os.makedirs(objects, exist_ok=True)
+    previous = snapshots(root)
+    old_index = previous[-1].index if previous else {}
+
+    name = PREFIX + datetime.now().strftime("%Y%m%d_%H%M%S")
+    while os.path.exists(os.path.join(root, name)):
+        time.sleep(1)
+        name = PREFIX + datetime.now().strftime("%Y%m%d_%H%M%S")
+    staging = os.path.join(root, ".partial-" + name)
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    index = {}
+    changed = []
+    stats = {"files": 0, "changed": 0, "bytes": 0, "changed_bytes": 0}
+    for rel, st in _scan(source):
+        if stat.S_ISDIR(st.st_mode):
+            os.makedirs(os.path.join(staging, rel), exist_ok=True)
+            index[rel] = {"type": "dir", "mode": stat.S_IMODE(st.st_mode)}
+        elif stat.S_ISLNK(st.st_mode):
+            target = os.readlink(os.path.join(source, rel))
+            os.symlink(target, os.path.join(staging, rel))
+            index[rel] = {"type": "link", "target": target}
+        elif stat.S_ISREG(st.st_mode):
+            entry = {"type": "file", "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                     "mode": stat.S_IMODE(st.st_mode)}
+            old = old_index.get(rel)
+            if (old and old.get("type") == "file" and old["size"] == st.st_size
+                    and old["mtime_ns"] == st.st_mtime_ns
+                    and os.path.exists(_object_path(objects, old["hash"]))):
+                entry["hash"] = old["hash"]
+            else:
+                changed.append(rel)
+                stats["changed_bytes"] += st.st_size
+            index[rel] = entry
+            stats["files"] += 1
+            stats["bytes"] += st.st_size
+
+    # Only new or modified files are read, hashed and stored
+    def ingest(rel):
+        return rel, _store(objects, os.path.join(source, rel))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for rel, name_hash in pool.map(ingest, changed):
+            index[rel]["hash"] = name_hash
+    stats["changed"] = len(changed)
+
+    for rel, entry in index.items():
+        if entry["type"] == "file":
+            obj = _object_path(objects, entry["hash"])
+            try:
+                os.link(obj, os.path.join(staging, rel))
+            except OSError as e:
+                if e.errno != errno.EMLINK:
+                    raise
+                # Too many links to one object (think empty files); a copy will do
+                shutil.copyfile(obj, os.path.join(staging, rel))
+
+    with open(os.path.join(staging, INDEX_NAME), 'w') as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.rename(staging, os.path.join(root, name))
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return Snapshot(root, name), stats
+
+
+def select_kept(snapshot_list, keep_last=KEEP_LAST, keep_daily=KEEP_DAILY, keep_weekly=KEEP_WEEKLY):
+    """Names to keep: the newest keep_last, plus the newest of each of the last N days and weeks"""
+    newest_first = sorted(snapshot_list, key=lambda s: s.created, reverse=True)
+    kept = {s.name for s in newest_first[:keep_last]}
+    for count, bucket in ((keep_daily, lambda d: d.date()), (keep_weekly, lambda d: d.isocalendar()[:2])):
+        seen = []
+        for snapshot in newest_first:
+            key = bucket(snapshot.created)
+            if key not in seen:
+                if len(seen) == count:
+                    break
+                seen.append(key)
+                kept.add(snapshot.name)
+    return kept
+
+
+def prune(root=BACKUP_ROOT, **keep):
+    """Delete snapshots outside the retention policy and unreferenced objects"""
+    current = snapshots(root)
+    kept = select_kept(current, **keep)
+    removed = [s.name for s in current if s.name not in kept]
+    for name in removed:
+        shutil.rmtree(os.path.join(root, name))
+    # Leftovers of interrupted backups
+    for name in os.listdir(root):
+        if name.startswith(".partial-" + PREFIX):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    # An object linked only from the store (st_nlink == 1) belongs to no snapshot
+    freed = 0
+    objects = os.path.join(root, OBJECTS)
+    for dirpath, _, filenames in os.walk(objects):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            st = os.lstat(path)
+            if st.st_nlink == 1:
+                freed += st.st_size
+                os.unlink(path)
+    return removed, freed
+
+
+def export(snapshot, out):
+    """Stream a snapshot as tar.xz to a path or '-' (stdout) without a temp file"""
+    fileobj = sys.stdout.buffer if out == "-" else open(out, 'wb')
+    try:
+        with tarfile.open(fileobj=fileobj, mode="w|xz") as tar:
+            for rel, entry in sorted(snapshot.index.items()):
+                info = tarfile.TarInfo(os.path.join(".openclaw", rel))
+                if entry["type"] == "dir":
+                    info.type, info.mode = tarfile.DIRTYPE, entry["mode"]
+                    tar.addfile(info)
+                elif entry["type"] == "link":
+                    info.type, info.linkname = tarfile.SYMTYPE, entry["target"]
+                    tar.addfile(info)
+                else:
+                    info.size, info.mode = entry["size"], entry["mode"]
+                    info.mtime = entry["mtime_ns"] / 1e9
+                    with open(os.path.join(snapshot.path, rel), 'rb') as f:
+                        tar.addfile(info, f)
+    finally:
+        if out != "-":
+            fileobj.close()
+
+
+def restore(snapshot, target):
+    """Recreate a snapshot as real files (not links into the store) in target"""
+    os.makedirs(target, exist_ok=True)
+    for rel, entry in sorted(snapshot.index.items()):
+        path = os.path.join(target, rel)
+        if entry["type"] == "dir":
+            os.makedirs(path, exist_ok=True)
+            os.chmod(path, entry["mode"])
+        elif entry["type"] == "link":
+            os.symlink(entry["target"], path)
+        else:
+            shutil.copyfile(os.path.join(snapshot.path, rel), path)
+            os.chmod(path, entry["mode"])
+            os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+
+
+def _size(num):
+    for unit in ("B", "KB", "MB", "GB"):
+        if num < 1024 or unit == "GB":
+            return f"{num:.0f} {unit}" if unit == "B" else f"{num:.1f} {unit}"
+        num /= 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental ~/.openclaw backups")
+    parser.add_argument("command", choices=("backup", "list", "prune", "export", "restore"))
+    parser.add_argument("args", nargs="*")
+    parser.add_argument("--source", default=SOURCE_DIR)
+    parser.add_argument("--root", default=BACKUP_ROOT)
+    parser.add_argument("--keep-last", type=int, default=KEEP_LAST)
+    parser.add_argument("--keep-daily", type=int, default=KEEP_DAILY)
+    parser.add_argument("--keep-weekly", type=int, default=KEEP_WEEKLY)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+    keep = {"keep_last": args.keep_last, "keep_daily": args.keep_daily, "keep_weekly": args.keep_weekly}
+
+    if args.command == "backup":
+        if not os.path.isdir(args.source):
+            print(f"Warning: {args.source} not found. Skipping backup.")
+            return
+        snapshot, stats = backup(args.source, args.root, args.workers)
+        print(f"{snapshot.path}: {stats['files']} files ({_size(stats['bytes'])}), "
+              f"{stats['changed']} changed ({_size(stats['changed_bytes'])}) in {stats['seconds']} s")
+        removed, freed = prune(args.root, **keep)
+        if removed:
+            print(f"Pruned {len(removed)} old snapshots, freed {_size(freed)}")
+    elif args.command == "list":
+        for snapshot in snapshots(args.root):
+            files = [e for e in snapshot.index.values() if e["type"] == "file"]
+            print(f"{snapshot.name}  {len(files)} files  {_size(sum(e['size'] for e in files))}")
+    elif args.command == "prune":
+        removed, freed = prune(args.root, **keep)
+        print(f"Pruned {len(removed)} snapshots, freed {_size(freed)}")
+    elif args.command == "export" and len(args.args) == 2:
+        export(find_snapshot(args.root, args.args[0]), args.args[1])
+    elif args.command == "restore" and len(args.args) == 2:
+        restore(find_snapshot(args.root, args.args[0]), args.args[1])
+    else:
+        parser.print_usage()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+OpenClaw upgrade as a graph of timed stages.
+
+    version ─┐
+    download ─────────────┐
+    stop ── backup ───────┴─ install ── doctor ── restart ── verify
+
+The npm download runs while the gateway is stopped and backed up, and
+verification starts as soon as the restarted gateway opens its port, so the
+window in which the gateway is down is only stop → backup → install →
+doctor → port open. Every stage's timing lands in a JSON report. If install,
+doctor, restart or verify fails, ~/.openclaw is restored from the snapshot
+taken by the backup stage and, once install has run, the previous version
+reinstalled. A failure before install (e.g. the download) only starts the
+stopped gateway again.
+
+Executables come from --openclaw/--npm (or OPENCLAW_BIN/NPM_BIN), so the
+whole pipeline runs against the stand-ins in dev/.
+
+Usage: oc_upgrade.py [--openclaw BIN] [--npm BIN] [--package openclaw@latest]
+                     [--source DIR] [--backup-root DIR] [--report FILE] [--no-rollback]
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import oc_backup  # noqa: E402
+
+GATEWAY_HOST = "127.0.0.1"
+GATEWAY_PORT = 18789
+PORT_TIMEOUT = 90  # seconds for the gateway to open its port after restart
+COMMAND_TIMEOUT = 600  # seconds for any one command (npm install can be slow)
+REPORT_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "oc-applet")
+
+PENDING, RUNNING, DONE, FAILED, SKIPPED = "pending", "running", "done", "failed", "skipped"
+# A failure in one of these has changed the install or ~/.openclaw; earlier ones haven't
+ROLLBACK_STAGES = ("install", "doctor", "restart", "verify")
+
+
+class StageError(Exception):
+    """A stage could not complete"""
+
+
+class Stage:
+    """One named step; func(context) returns a detail dict or None"""
+
+    def __init__(self, name, func, after=()):
+        self.name = name
+        self.func = func
+        self.after = tuple(after)
+        self.status = PENDING
+        self.started = self.finished = None
+        self.detail = None
+        self.error = None
+
+    @property
+    def seconds(self):
+        if self.started is None or self.finished is None:
+            return None
+        return round(self.finished - self.started, 3)
+
+
+class Pipeline:
+    """Runs stages as soon as their dependencies are done, each on its own thread"""
+
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            missing = [dep for dep in stage.after if dep not in self.stages]
+            if missing:
+                raise ValueError(f"{stage.name} depends on unknown stage {missing[0]}")
+        cycle = self._find_cycle()
+        if cycle:
+            raise ValueError(f"dependency cycle: {' -> '.join(cycle)}")
+        self._cond = threading.Condition()
+        self.t0 = None
+
+    def _find_cycle(self):
+        """Stage names along a dependency cycle, or None"""
+        state = {}  # name -> 1 while on the path, 2 when finished
+
+        def visit(name, path):
+            state[name] = 1
+            for dep in self.stages[name].after:
+                if state.get(dep) == 1:
+                    return path[path.index(dep):] + [dep]
+                if dep not in state:
+                    cycle = visit(dep, path + [dep])
+                    if cycle:
+                        return cycle
+            state[name] = 2
+            return None
+
+        for name in self.stages:
+            if name not in state:
+                cycle = visit(name, [name])
+                if cycle:
+                    return cycle
+        return None
+
+    def run(self, context):
+        self.t0 = time.monotonic()
+        threads = []
+        with self._cond:
+            while True:
+                # A skip can make a stage listed earlier skippable: repeat until nothing changes,
+                # a finished stage is the only thing left to wait for
+                changed = True
+                while changed:
+                    changed = False
+                    for stage in self.stages.values():
+                        if stage.status != PENDING:
+                            continue
+                        deps = [self.stages[dep].status for dep in stage.after]
+                        if any(status in (FAILED, SKIPPED) for status in deps):
+                            stage.status = SKIPPED
+                            changed = True
+                        elif all(status == DONE for status in deps):
+                            stage.status = RUNNING
+                            thread = threading.Thread(target=self._run_stage, args=(stage, context), daemon=True)
+                            threads.append(thread)
+                            thread.start()
+                if all(stage.status in (DONE, FAILED, SKIPPED) for stage in self.stages.values()):
+                    break
+                self._cond.wait()
+        for thread in threads:
+            thread.join()
+        return all(stage.status == DONE for stage in self.stages.values())
+
+    def _run_stage(self, stage, context):
+        stage.started = time.monotonic()
+        try:
+            stage.detail = stage.func(context)
+            status = DONE
+        except Exception as e:
+            stage.error = str(e)
+            status = FAILED
+        stage.finished = time.monotonic()
+        with self._cond:
+            stage.status = status
+            self._cond.notify_all()
+
+    def report(self):
+        return {name: {
+            "status": stage.status,
+            "start": round(stage.started - self.t0, 3) if stage.started else None,
+            "seconds": stage.seconds,
+            "detail": stage.detail,
+            "error": stage.error
+        } for name, stage in self.stages.items()}
+
+
+# Commands
+
+def run(argv, timeout=COMMAND_TIMEOUT, cwd=None):
+    """Run a command; returns stdout, raises StageError with its output on failure"""
+    try:
+        result = subprocess.run(argv, stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                                timeout=timeout, cwd=cwd)
+    except subprocess.TimeoutExpired:
+        raise StageError(f"{' '.join(argv)} timed out after {timeout}s")
+    except OSError as e:
+        raise StageError(f"{argv[0]}: {e}")
+    if result.returncode != 0:
+        output = (result.stderr or result.stdout).strip()[-400:]
+        raise StageError(f"{' '.join(argv)} exited {result.returncode}: {output}")
+    return result.stdout.strip()
+
+
+def wait_for_port(host, port, timeout=PORT_TIMEOUT, interval=0.1, process=None, log=None):
+    """Block until host:port accepts connections; returns seconds waited
+
+    With process (its stderr in the file log), a non-zero exit before the
+    port opens fails at once.
+    """
+    start = time.monotonic()
+    while True:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return round(time.monotonic() - start, 3)
+        except OSError:
+            if process is not None and process.poll():
+                raise StageError(_exit_error(process, log))
+            if time.monotonic() - start > timeout:
+                raise StageError(f"gateway port {port} not open after {timeout}s")
+            time.sleep(interval)
+
+
+def _exit_error(process, log):
+    """Error text for a failed background command, with the end of its stderr from log"""
+    log.seek(max(0, os.fstat(log.fileno()).st_size - 4096))
+    output = log.read().decode(errors="replace").strip()[-400:]
+    return f"{' '.join(process.args)} exited {process.returncode}: {output}"
+
+
+# Stages
+
+def stage_version(ctx):
+    ctx["old_version"] = run([ctx["openclaw"], "--version"], timeout=60).splitlines()[-1].strip()
+    return {"version": ctx["old_version"]}
+
+
+def stage_download(ctx):
+    # npm pack fetches the tarball into our work dir; install then needs no network
+    output = run([ctx["npm"], "pack", ctx["package"], "--silent"], cwd=ctx["workdir"])
+    tarball = os.path.join(ctx["workdir"], output.splitlines()[-1].strip())
+    if not os.path.isfile(tarball):
+        raise StageError(f"npm pack did not produce {tarball}")
+    ctx["tarball"] = tarball
+    return {"tarball": os.path.basename(tarball), "bytes": os.path.getsize(tarball)}
+
+
+def stage_stop(ctx):
+    run([ctx["openclaw"], "gateway", "stop"], timeout=120)
+    ctx["down_at"] = time.monotonic()
+
+
+def stage_backup(ctx):
+    if not os.path.isdir(ctx["source"]):
+        return {"skipped": f"{ctx['source']} not found"}
+    snapshot, stats = oc_backup.backup(ctx["source"], ctx["backup_root"])
+    ctx["snapshot"] = snapshot
+    return {"snapshot": snapshot.name, **stats}
+
+
+def stage_install(ctx):
+    run([ctx["npm"], "install", "-g", ctx["tarball"]])
+    ctx["new_version"] = run([ctx["openclaw"], "--version"], timeout=60).splitlines()[-1].strip()
+    return {"version": ctx["new_version"]}
+
+
+def stage_doctor(ctx):
+    run([ctx["openclaw"], "doctor", "--fix"], timeout=300)
+
+
+def stage_restart(ctx):
+    # Done when the port opens, not when the CLI returns; verify can start right away.
+    # stderr goes to a file: nobody reads it while the port is awaited, a pipe could fill up
+    log = ctx["restart_log"] = tempfile.TemporaryFile()
+    try:
+        process = subprocess.Popen([ctx["openclaw"], "gateway", "restart"], stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.DEVNULL, stderr=log)
+    except OSError as e:
+        raise StageError(f"{ctx['openclaw']}: {e}")
+    ctx["restart_process"] = process
+    waited = wait_for_port(GATEWAY_HOST, ctx["port"], process=process, log=log)
+    ctx["up_at"] = time.monotonic()
+    return {"port_open_after": waited}
+
+
+def stage_verify(ctx):
+    marker = f"Sync Test - {ctx['stamp']}"
+    check_file = os.path.join(ctx["source"], "workspace", "memory", "sync_check.md")
+    run([ctx["openclaw"], "run", f"echo '{marker}' >> {check_file}"], timeout=120)
+    try:
+        with open(check_file, 'r') as f:
+            if marker not in f.read():
+                raise StageError(f"sync test line missing from {check_file}")
+    except FileNotFoundError:
+        raise StageError(f"sync test did not create {check_file}")
+    return {"check_file": check_file}
+
+
+def default_stages():
+    return [
+        Stage("version", stage_version),
+        Stage("download", stage_download),
+        Stage("stop", stage_stop, after=["version"]),
+        Stage("backup", stage_backup, after=["stop"]),
+        Stage("install", stage_install, after=["download", "backup"]),
+        Stage("doctor", stage_doctor, after=["install"]),
+        Stage("restart", stage_restart, after=["doctor"]),
+        Stage("verify", stage_verify, after=["restart"]),
+    ]
+
+
+# Rollback
+
+def start_gateway(ctx, steps):
+    """Start the gateway again after a stop; records "up" or the error in steps"""
+    try:
+        run([ctx["openclaw"], "gateway", "start"], timeout=120)
+        wait_for_port(GATEWAY_HOST, ctx["port"])
+        steps["gateway"] = "up"
+    except StageError as e:
+        steps["gateway"] = str(e)
+    return steps
+
+
+def rollback(ctx, reinstall=True):
+    """Put the snapshot back in place of ~/.openclaw and, with reinstall, reinstall the old version"""
+    steps = {}
+    start = time.monotonic()
+    snapshot = ctx.get("snapshot")
+    try:
+        run([ctx["openclaw"], "gateway", "stop"], timeout=120)
+    except StageError as e:
+        steps["stop"] = str(e)
+    if snapshot:
+        failed_dir = f"{ctx['source']}.failed-{ctx['stamp']}"
+        staging = None
+        try:
+            staging = tempfile.mkdtemp(prefix=".openclaw-restore-", dir=os.path.dirname(ctx["source"]))
+            os.rmdir(staging)
+            oc_backup.restore(snapshot, staging)
+            if os.path.exists(ctx["source"]):
+                os.rename(ctx["source"], failed_dir)
+                steps["moved_aside"] = failed_dir
+            os.rename(staging, ctx["source"])
+            steps["restored"] = snapshot.name
+        except OSError as e:
+            # Keep going: the report must still be written and the gateway started
+            steps["restore"] = str(e)
+            if staging:
+                shutil.rmtree(staging, ignore_errors=True)
+            if "moved_aside" in steps and not os.path.exists(ctx["source"]):
+                try:
+                    os.rename(failed_dir, ctx["source"])
+                    del steps["moved_aside"]
+                except OSError:
+                    pass
+    # new_version is unset when install failed halfway; reinstall unless it is the old one
+    if reinstall and ctx.get("old_version") and ctx.get("new_version") != ctx["old_version"]:
+        try:
+            run([ctx["npm"], "install", "-g", f"openclaw@{ctx['old_version'].split()[-1].lstrip('v')}"])
+            steps["reinstalled"] = ctx["old_version"]
+        except StageError as e:
+            steps["reinstall"] = str(e)
+    start_gateway(ctx, steps)
+    steps["seconds"] = round(time.monotonic() - start, 3)
+    return steps
+
+
+def upgrade(ctx, stages=None, allow_rollback=True):
+    """Run the pipeline, roll back when install or a later stage failed, return the report"""
+    pipeline = Pipeline(stages or default_stages())
+    ok = pipeline.run(ctx)
+    process = ctx.get("restart_process")
+    if process is not None:
+        if not ok and process.poll() is None:
+            # A restart that never opened the port may hang; roll back now, not after COMMAND_TIMEOUT
+            process.kill()
+        try:
+            process.wait(timeout=COMMAND_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        restart = pipeline.stages.get("restart")
+        if ok and process.returncode and restart is not None:
+            # The port opened, but the CLI reported a failure after all
+            restart.status = FAILED
+            restart.error = _exit_error(process, ctx["restart_log"])
+            ok = False
+    if "restart_log" in ctx:
+        ctx.pop("restart_log").close()
+
+    report = {
+        "started": ctx["stamp"],
+        "ok": ok,
+        "package": ctx["package"],
+        "old_version": ctx.get("old_version"),
+        "new_version": ctx.get("new_version"),
+        "total_seconds": round(time.monotonic() - pipeline.t0, 3),
+        "downtime_seconds": round(ctx["up_at"] - ctx["down_at"], 3) if "up_at" in ctx and "down_at" in ctx else None,
+        "stages": pipeline.report()
+    }
+    if ok:
+        return report
+    stages = pipeline.stages
+    failed = [name for name in ROLLBACK_STAGES if name in stages and stages[name].status == FAILED]
+    backed_up = "backup" in stages and stages["backup"].status == DONE
+    if failed and allow_rollback and backed_up:
+        install = stages.get("install")
+        report["rollback"] = rollback(ctx, reinstall=install is not None and install.started is not None)
+    elif "down_at" in ctx and "up_at" not in ctx:
+        # E.g. the download failed: nothing to undo, but the gateway was stopped for the install
+        report["recovery"] = start_gateway(ctx, {})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade OpenClaw with timed, overlapped stages")
+    parser.add_argument("--openclaw", default=os.environ.get("OPENCLAW_BIN") or shutil.which("openclaw") or "openclaw")
+    parser.add_argument("--npm", default=os.environ.get("NPM_BIN") or shutil.which("npm") or "npm")
+    parser.add_argument("--package", default="openclaw@latest")
+    parser.add_argument("--source", default=oc_backup.SOURCE_DIR)
+    parser.add_argument("--backup-root", default=oc_backup.BACKUP_ROOT)
+    parser.add_argument("--port", type=int, default=int(os.environ.get("OPENCLAW_GATEWAY_PORT") or GATEWAY_PORT))
+    parser.add_argument("--report", default=None, help="report path (default ~/.cache/oc-applet/upgrade-<date>.json)")
+    parser.add_argument("--no-rollback", action="store_true")
+    args = parser.parse_args()
+
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    with tempfile.TemporaryDirectory(prefix="oc-upgrade-") as workdir:
+        ctx = {"openclaw": args.openclaw, "npm": args.npm, "package": args.package, "source": args.source,
+               "backup_root": args.backup_root, "port": args.port, "stamp": stamp, "workdir": workdir}
+        report = upgrade(ctx, allow_rollback=not args.no_rollback)
+
+    for name, stage in report["stages"].items():
+        seconds = f"{stage['seconds']:.2f} s" if stage["seconds"] is not None else "-"
+        start = f"+{stage['start']:.2f}" if stage["start"] is not None else ""
+        print(f"{name:<10} {stage['status']:<8} {start:>8} {seconds:>9}  {stage['error'] or ''}")
+    if report["downtime_seconds"] is not None:
+        print(f"Gateway down for {report['downtime_seconds']:.2f} s, total {report['total_seconds']:.2f} s")
+    if "rollback" in report:
+        print(f"Rolled back: {json.dumps(report['rollback'])}")
+    elif "recovery" in report:
+        print(f"Gateway restarted: {json.dumps(report['recovery'])}")
+
+    report_path = args.report or os.path.join(REPORT_DIR, f"upgrade-{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Report: {report_path}")
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
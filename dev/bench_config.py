@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Config and catalog operations at 10, 1k and 50k models.
+
+Generated fixtures (catalog.json, models.json and a menu.json with many
+custom sections) are written to a temp dir. Each operation is the GTK-free
+code the settings dialog runs:
+
+  load            ConfigStore parse of menu.json + models.json
+  load_ticks      _load_models_from_json: enabled-ID set, one lookup per catalog row
+  save_catalog    _save_models_to_json: set_catalog_models + atomic save
+  save_manual     _save_manual_models: set_manual_models + atomic save
+  save_ollama     _save_ollama_settings: set_ollama + atomic save
+  display_names   catalog_model_name for every catalog ID, uncached
+  normalize_ids   ModelRegistry of models.json: canonical IDs, sections,
+                  providers and duplicate keys, names uncached
+  catalog_load    load_catalog of a catalog.json of that size
+  snapshot        compile_snapshot of the menu the applet renders
+  snapshot_diff   diff_snapshots after one relabel
+
+For every size it reports ops/sec and the tracemalloc peak, compares them
+with a stored baseline, and flags operations whose per-model cost grows
+more than SUPERLINEAR times from 1k to 50k models (quadratic behaviour).
+
+Usage: bench_config.py [--sizes 10,1000,50000] [--min-time 0.5]
+                       [--save-baseline] [--check] [--baseline FILE]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DEV_DIR = os.path.dirname(os.path.abspath(__file__))
+APPLET_DIR = os.path.join(DEV_DIR, "..", "versions", "v0.62alpha", "oc-applet@farmfield.se")
+BASELINE_PATH = os.path.join(DEV_DIR, "bench-config-baseline.json")
+sys.path.insert(0, APPLET_DIR)
+
+from config_store import ConfigStore  # noqa: E402
+from menu_snapshot import compile_snapshot, diff_snapshots  # noqa: E402
+from model_catalog import load_catalog  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from settings_ops import catalog_model_name, set_catalog_models, set_manual_models, set_ollama  # noqa: E402
+
+SIZES = (10, 1000, 50000)
+# ops/sec below this fraction of the baseline is a regression; runs of the memory-bound
+# 50k operations differ by up to 40% between processes, growth is caught by SUPERLINEAR
+REGRESSION = 0.5
+MEMORY_GROWTH = 1.25  # peak memory above this multiple of the baseline is a regression
+SUPERLINEAR = 3.0  # per-model cost growth from 1k to 50k that counts as superlinear
+ROUNDS = 5  # timing rounds per measurement, best one counts
+PROVIDERS = ("openrouter", "nvidia", "google", "anthropic", "openai", "mistral", "deepseek")
+CUSTOM_SECTIONS = 200
+
+
+def make_fixtures(directory, n):
+    """Write catalog/models/menu files for n models; returns their paths and the catalog IDs"""
+    catalog = []
+    for i in range(n):
+        provider = PROVIDERS[i % len(PROVIDERS)]
+        model_id = f"{provider}/vendor-{i % 97}/model-{i}-instruct" if provider == "openrouter" else f"{provider}/model-{i}-chat"
+        catalog.append({"id": model_id, "name": f"Model {i}", "group": provider.title()})
+    ids = [entry["id"] for entry in catalog]
+
+    models = [{"id": model_id, "name": catalog_model_name(model_id)} for model_id in ids[::2]]
+    models += [{"id": f"manual_custom/model-{i}", "name": f"Manual {i}"} for i in range(10)]
+    models += [{"id": f"ollama/llama3:{i}b", "name": f"Llama {i}"} for i in range(max(1, n // 100))]
+
+    menu = {key: {"enabled": True, "label": key.upper()} for key in
+            ("oc_models", "oc_start", "oc_stop", "oc_restart", "oc_dashboard", "oc_json", "oc_folder", "oc_doctor")}
+    menu["title"] = {"enabled": True, "text": "OC Control"}
+    menu["settings"] = {"enabled": True, "label": "Settings"}
+    menu["credits"] = {"enabled": True, "text": "bench"}
+    for i in range(1, CUSTOM_SECTIONS + 1):
+        menu[f"custom_{i}"] = {"title": f"Custom {i}", "command": f"echo {i} && notify-send done-{i}", "enabled": True}
+    menu["ollama"] = {"enabled": True, "custom_address": False, "ip": "127.0.0.1", "port": 11434,
+                      "models": [{"name": m["name"], "id": m["id"]} for m in models if m["id"].startswith("ollama/")]}
+
+    paths = {name: os.path.join(directory, f"{name}.json") for name in ("catalog", "models", "menu")}
+    for name, data in (("catalog", {"version": 1, "models": catalog}), ("models", models), ("menu", menu)):
+        with open(paths[name], 'w') as f:
+            json.dump(data, f)
+    return paths, ids
+
+
+def operations(paths, ids):
+    """{name: callable} for one fixture set; save operations alternate so each save writes"""
+    store = ConfigStore(paths["menu"], paths["models"])
+    enabled = [m["id"] for m in store.model_entries("catalog")]
+    flip = {"catalog": False, "manual": False, "ollama": False}
+    ollama_models = [(m["id"][7:], m["name"]) for m in store.model_entries("ollama")]
+    snapshot = compile_snapshot(store.menu, store.models, paths["menu"], paths["models"])
+    relabeled = [dict(m) for m in store.models]
+    relabeled[0]["name"] += " (new)"
+    changed = compile_snapshot(store.menu, relabeled, paths["menu"], paths["models"])
+
+    def load():
+        ConfigStore(paths["menu"], paths["models"])
+
+    def load_ticks():
+        active = {m.get('id') for m in store.model_entries("catalog")}
+        return [model_id in active for model_id in ids]
+
+    def save_catalog():
+        flip["catalog"] = not flip["catalog"]
+        set_catalog_models(store, enabled[::-1] if flip["catalog"] else enabled)
+        store.save(force=True)
+
+    def save_manual():
+        flip["manual"] = not flip["manual"]
+        set_manual_models(store, [(f"Manual {i}{'!' if flip['manual'] else ''}", f"custom/model-{i}") for i in range(10)])
+        store.save(force=True)
+
+    def save_ollama():
+        flip["ollama"] = not flip["ollama"]
+        set_ollama(store, enabled=flip["ollama"], custom_address=False, ip="127.0.0.1", port=11434,
+                   models=ollama_models)
+        store.save(force=True)
+
+    # Both go through catalog_model_name's lru_cache; clear it so every call
+    # pays for the names like the dialog's first open does, not for cache hits
+    def display_names():
+        catalog_model_name.cache_clear()
+        return [catalog_model_name(model_id) for model_id in ids]
+
+    def normalize_ids():
+        catalog_model_name.cache_clear()
+        return ModelRegistry(store.models)
+
+    def catalog_load():
+        return load_catalog(paths["catalog"])
+
+    def snapshot_compile():
+        # As write_snapshot does: from the store's registry, built once per load
+        return compile_snapshot(store.menu, store.registry, paths["menu"], paths["models"])
+
+    def snapshot_diff():
+        return diff_snapshots(snapshot, changed)
+
+    return {
+        "load": load,
+        "load_ticks": load_ticks,
+        "save_catalog": save_catalog,
+        "save_manual": save_manual,
+        "save_ollama": save_ollama,
+        "display_names": display_names,
+        "normalize_ids": normalize_ids,
+        "catalog_load": catalog_load,
+        "snapshot": snapshot_compile,
+        "snapshot_diff": snapshot_diff,
+    }
+
+
+def ops_per_sec(func, min_time, rounds=ROUNDS):
+    """Best calls/sec over a few rounds (like timeit's min), each at least min_time / rounds and 3 calls"""
+    best = 0.0
+    for _ in range(rounds):
+        gc.collect()
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time / rounds and calls >= 3:
+                break
+        best = max(best, calls / elapsed)
+    return best
+
+
+def peak_memory(func):
+    """tracemalloc peak in bytes of one call"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes, min_time, only=None):
+    """{str(size): {op: {"ops": ops/sec, "peak": bytes}}}, optionally for some operations only"""
+    results = {}
+    for n in sizes:
+        with tempfile.TemporaryDirectory(prefix=f"oc-bench-{n}-") as directory:
+            paths, ids = make_fixtures(directory, n)
+            results[str(n)] = {}
+            for name, func in operations(paths, ids).items():
+                if only is None or name in only:
+                    results[str(n)][name] = {"ops": round(ops_per_sec(func, min_time), 2), "peak": peak_memory(func)}
+    return results
+
+
+def remeasure_slow(results, baseline, min_time):
+    """Measure again whatever looks slower than the baseline, keeping the better number"""
+    for n, ops in results.items():
+        slow = [name for name, row in ops.items()
+                if name in baseline.get(n, {}) and row["ops"] < baseline[n][name]["ops"] * REGRESSION]
+        if slow:
+            for name, row in run([int(n)], min_time, only=slow)[n].items():
+                ops[name]["ops"] = max(ops[name]["ops"], row["ops"])
+
+
+def _size(num):
+    for unit in ("B", "KiB", "MiB"):
+        if num < 1024:
+            return f"{num:.0f} {unit}" if unit == "B" else f"{num:.1f} {unit}"
+        num /= 1024
+    return f"{num:.1f} GiB"
+
+
+def report(results, baseline):
+    """Print the table; returns a list of problems"""
+    problems = []
+    print(f"{'operation':<14} {'models':>7} {'ops/sec':>12} {'peak mem':>11} {'vs baseline':>12}")
+    names = list(next(iter(results.values())))
+    for name in names:
+        for n, ops in results.items():
+            row = ops[name]
+            compare = ""
+            base = baseline.get(n, {}).get(name)
+            if base:
+                ratio = row["ops"] / base["ops"]
+                compare = f"{ratio:.2f}x"
+                if ratio < REGRESSION:
+                    compare += " SLOWER"
+                    problems.append(f"{name} at {n} models: {ratio:.2f}x baseline ops/sec")
+                if row["peak"] > base["peak"] * MEMORY_GROWTH:
+                    compare += " MEM"
+                    problems.append(f"{name} at {n} models: peak memory {_size(row['peak'])}, "
+                                    f"baseline {_size(base['peak'])}")
+            print(f"{name:<14} {n:>7} {row['ops']:>12,.1f} {_size(row['peak']):>11} {compare:>12}")
+
+        # Per-model cost should stay roughly flat as the catalog grows
+        if "1000" in results and "50000" in results:
+            growth = (results["1000"][name]["ops"] * 1000) / (results["50000"][name]["ops"] * 50000)
+            if growth > SUPERLINEAR:
+                problems.append(f"{name}: per-model cost grows {growth:.1f}x from 1k to 50k models")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark config and catalog operations")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per measurement")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regressions or superlinear growth")
+    args = parser.parse_args()
+
+    try:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+
+    results = run([int(n) for n in args.sizes.split(",")], args.min_time)
+    if not args.save_baseline:
+        # One noisy measurement shouldn't fail the check
+        remeasure_slow(results, baseline, args.min_time)
+    problems = report(results, {} if args.save_baseline else baseline)
+    for problem in problems:
+        print(f"! {problem}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"Baseline written to {args.baseline}")
+    elif args.check and problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
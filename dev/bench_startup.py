@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Startup regression check for the settings entry points.
+
+  import     fresh interpreter, time to execute the script's top level
+             (its imports), median of --runs; -X importtime names the
+             slowest modules
+  dialog     settings-window.py --timing under Xvfb: wall time from spawn
+             to the first drawn frame of the dialog
+
+Each number is compared with dev/startup-budget.json and the script exits
+1 if any is over budget. Measurements that can't run here (no gi, no
+xvfb-run) are reported as skipped, not passed.
+
+Usage: bench_startup.py [--runs 5] [--budget dev/startup-budget.json] [--no-dialog]
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DEV_DIR = os.path.dirname(os.path.abspath(__file__))
+APPLET_DIR = os.path.join(DEV_DIR, "..", "versions", "v0.62alpha", "oc-applet@farmfield.se")
+BUDGET_PATH = os.path.join(DEV_DIR, "startup-budget.json")
+MARKER = "--bench-start--"
+DIALOG_TIMEOUT = 30  # seconds
+
+# Runs the script's top level without its __main__ block and prints the time it took
+IMPORT_PROBE = """
+import importlib.util, sys, time
+sys.path.insert(0, {applet_dir!r})
+sys.stderr.write({marker!r} + "\\n")
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("bench_target", {path!r})
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+class Skipped(Exception):
+    """A measurement can't run in this environment"""
+
+
+def _isolated_env(home):
+    # Never read or write the real config, never reach a resident settings process
+    env = dict(os.environ, HOME=home, XDG_CACHE_HOME=os.path.join(home, ".cache"), PYTHONUNBUFFERED="1")
+    env.pop("DBUS_SESSION_BUS_ADDRESS", None)
+    return env
+
+
+def slowest_imports(stderr, count=5):
+    """(cumulative ms, module) of the top-level imports after the marker, slowest first"""
+    lines = stderr.split(MARKER, 1)[-1].splitlines()
+    found = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  ") and cumulative.strip().isdigit():
+            found.append((int(cumulative) / 1000, name.strip()))
+    return sorted(found, reverse=True)[:count]
+
+
+def measure_import(script, runs, home):
+    path = os.path.join(APPLET_DIR, script)
+    code = IMPORT_PROBE.format(applet_dir=APPLET_DIR, marker=MARKER, path=path)
+    samples = []
+    stderr = ""
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True,
+                                text=True, env=_isolated_env(home))
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit {result.returncode}"
+            if "No module named 'gi'" in error or "Namespace Gtk not available" in error:
+                raise Skipped(error)
+            raise RuntimeError(f"{script}: {error}")
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+        stderr = result.stderr
+    return statistics.median(samples), slowest_imports(stderr)
+
+
+def measure_dialog(runs, home):
+    if not shutil.which("xvfb-run"):
+        raise Skipped("xvfb-run not installed")
+    command = ["xvfb-run", "-a", sys.executable, os.path.join(APPLET_DIR, "settings-window.py"), "--timing"]
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                   env=_isolated_env(home), start_new_session=True)
+        try:
+            deadline = start + DIALOG_TIMEOUT
+            for line in process.stdout:
+                if line.startswith("time-to-first-frame:"):
+                    samples.append((time.perf_counter() - start) * 1000)
+                    break
+                if time.perf_counter() > deadline:
+                    break
+            else:
+                error = process.stderr.read().strip().splitlines()
+                message = error[-1] if error else "no frame drawn"
+                if "No module named 'gi'" in message:
+                    raise Skipped(message)
+                raise RuntimeError(f"settings-window.py: {message}")
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait()
+    if not samples:
+        raise RuntimeError(f"settings-window.py: no frame within {DIALOG_TIMEOUT}s")
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when settings startup goes over budget")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", default=BUDGET_PATH)
+    parser.add_argument("--no-dialog", action="store_true", help="skip the Xvfb time-to-dialog run")
+    args = parser.parse_args()
+
+    with open(args.budget, 'r') as f:
+        budget = json.load(f)
+
+    over = []
+    with tempfile.TemporaryDirectory(prefix="oc-bench-home-") as home:
+        for script, limits in budget.items():
+            checks = [("import_ms", lambda: measure_import(script, args.runs, home))]
+            if "time_to_dialog_ms" in limits and not args.no_dialog:
+                checks.append(("time_to_dialog_ms", lambda: (measure_dialog(args.runs, home), [])))
+            for metric, measure in checks:
+                try:
+                    value, slowest = measure()
+                except Skipped as e:
+                    print(f"{script:<20} {metric:<18} skipped: {e}")
+                    continue
+                verdict = "ok" if value <= limits[metric] else "OVER BUDGET"
+                print(f"{script:<20} {metric:<18} {value:8.1f} ms  (budget {limits[metric]} ms)  {verdict}")
+                for ms, module in slowest:
+                    print(f"{'':<40} {ms:8.1f} ms  {module}")
+                if value > limits[metric]:
+                    over.append(f"{script} {metric}")
+
+    if over:
+        print(f"Over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Before/after latency of a model switch, against the stand-in gateway and
+stand-in openclaw CLI (nothing real is touched).
+
+  v1.1 tui     timeout 5 openclaw tui --session ... --message '/model X'
+  cli          openclaw sessions patch (switch_model.py fallback)
+  direct       one-off gateway connection
+  helper       request through the resident helper's kept-alive connection
+  script       python3 switch_model.py <key> <model>, helper running
+
+Usage: bench_switch.py [--runs 20] [--tui-runs 2] [--startup 0.6] [--delay 0.0]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+DEV_DIR = os.path.dirname(os.path.abspath(__file__))
+APPLET_DIR = os.path.join(DEV_DIR, "..", "versions", "v0.62alpha", "oc-applet@farmfield.se")
+FAKE_OPENCLAW = os.path.join(DEV_DIR, "fake_openclaw.py")
+sys.path.insert(0, APPLET_DIR)
+
+from fake_gateway import FakeGateway  # noqa: E402
+
+SESSION = "agent:main:main"
+MODELS = ["anthropic/claude-sonnet-4-5", "openrouter/openai/gpt-5", "ollama/qwen3:8b"]
+
+
+def measure(runs, func):
+    samples = []
+    for i in range(runs):
+        start = time.perf_counter()
+        func(MODELS[i % len(MODELS)])
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:<10} {len(samples):>5} {statistics.median(samples):>10.1f} {p95:>10.1f} {samples[0]:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--tui-runs", type=int, default=2, help="the v1.1 path takes 5 s per run")
+    parser.add_argument("--startup", type=float, default=0.6, help="stand-in CLI startup seconds")
+    parser.add_argument("--delay", type=float, default=0.0, help="gateway ack delay seconds")
+    args = parser.parse_args()
+
+    gateway = FakeGateway(delay=args.delay).start()
+    runtime = tempfile.mkdtemp(prefix="bench-switch-")
+    os.environ.update({
+        "OPENCLAW_GATEWAY_PORT": str(gateway.port),
+        "OPENCLAW_BIN": FAKE_OPENCLAW,
+        "FAKE_OPENCLAW_STARTUP": str(args.startup),
+        "XDG_RUNTIME_DIR": runtime
+    })
+    import switch_model  # after XDG_RUNTIME_DIR so the helper socket lands in runtime
+
+    def tui(model):
+        subprocess.run(["timeout", "5", FAKE_OPENCLAW, "tui", "--session", SESSION, "--message", f"/model {model}"],
+                       stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def script(model):
+        subprocess.run([sys.executable, os.path.join(APPLET_DIR, "switch_model.py"), SESSION, model], check=True)
+
+    print(f"{'path':<10} {'runs':>5} {'median ms':>10} {'p95 ms':>10} {'min ms':>10}")
+    if args.tui_runs:
+        report("v1.1 tui", measure(args.tui_runs, tui))
+    report("cli", measure(max(3, args.runs // 4), lambda m: switch_model.switch_via_cli(SESSION, m)))
+    report("direct", measure(args.runs, lambda m: switch_model.switch_direct(SESSION, m)))
+
+    helper = switch_model.SwitchHelper()
+    threading.Thread(target=helper.serve, daemon=True).start()
+    report("helper", measure(args.runs, lambda m: switch_model.switch_via_helper(SESSION, m)))
+    report("script", measure(args.runs, script))
+    helper.shutdown()
+
+    print(f"gateway saw {gateway.connections} connections, {gateway.requests} requests; "
+          f"{SESSION} -> {gateway.sessions.get(SESSION)}")
+    gateway.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Stand-in OpenClaw gateway for developing the model switch path without a
+real install. Accepts WebSocket connections, checks the connect request's
+token and acknowledges sessions.patch after an optional delay, keeping the
+patched models in memory; sessions.list returns the sessions it knows.
+
+Usage: fake_gateway.py [--port 18789] [--token TOKEN] [--delay 0.0] [session-key ...]
+"""
+import argparse
+import base64
+import hashlib
+import json
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class FakeGateway:
+    """One stand-in gateway on its own thread"""
+
+    def __init__(self, port=0, token=None, delay=0.0, sessions=()):
+        self.token = token
+        self.delay = delay
+        self.sessions = dict.fromkeys(sessions)  # session key -> model
+        self.connections = 0
+        self.requests = 0
+        self._clients = set()
+        gateway = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                if not self._upgrade():
+                    return
+                gateway.connections += 1
+                gateway._clients.add(self.connection)
+                self._send({"type": "event", "event": "connect.challenge",
+                            "payload": {"nonce": base64.b64encode(b"fake").decode(), "ts": int(time.time() * 1000)}})
+                authed = False
+                while True:
+                    message = self._recv()
+                    if message is None:
+                        return
+                    frame = json.loads(message)
+                    if frame.get("type") != "req":
+                        continue
+                    gateway.requests += 1
+                    method, params = frame.get("method"), frame.get("params") or {}
+                    if method == "connect":
+                        token = (params.get("auth") or {}).get("token")
+                        authed = gateway.token is None or token == gateway.token
+                        self._reply(frame, authed, {"type": "hello-ok", "protocol": params.get("maxProtocol")},
+                                    "unauthorized")
+                        if not authed:
+                            return
+                    elif not authed:
+                        self._reply(frame, False, None, "connect first")
+                    elif method == "sessions.patch":
+                        time.sleep(gateway.delay)
+                        gateway.sessions[params.get("key")] = params.get("model")
+                        self._reply(frame, True, {"key": params.get("key"), "model": params.get("model")})
+                    elif method == "sessions.list":
+                        self._reply(frame, True, {"sessions": [
+                            {"key": key, "model": model} for key, model in gateway.sessions.items()
+                        ]})
+                    else:
+                        self._reply(frame, False, None, f"unknown method {method}")
+
+            def _upgrade(self):
+                headers = {}
+                self.rfile.readline()
+                for line in iter(self.rfile.readline, b"\r\n"):
+                    if not line:
+                        return False
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if "sec-websocket-key" not in headers:
+                    self.wfile.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+                    return False
+                accept = base64.b64encode(hashlib.sha1((headers["sec-websocket-key"] + _GUID).encode()).digest())
+                self.wfile.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                                 b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+                return True
+
+            def _reply(self, frame, ok, payload, error=None):
+                response = {"type": "res", "id": frame.get("id"), "ok": ok}
+                if ok:
+                    response["payload"] = payload
+                else:
+                    response["error"] = {"code": "INVALID_REQUEST", "message": error}
+                self._send(response)
+
+            def _send(self, message):
+                data = json.dumps(message).encode()
+                header = bytes([0x81])
+                if len(data) < 126:
+                    header += bytes([len(data)])
+                elif len(data) < 65536:
+                    header += bytes([126]) + struct.pack("!H", len(data))
+                else:
+                    header += bytes([127]) + struct.pack("!Q", len(data))
+                self.wfile.write(header + data)
+                self.wfile.flush()
+
+            def _recv(self):
+                head = self.rfile.read(2)
+                if len(head) < 2:
+                    return None
+                opcode, length = head[0] & 0x0F, head[1] & 0x7F
+                if length == 126:
+                    length = struct.unpack("!H", self.rfile.read(2))[0]
+                elif length == 127:
+                    length = struct.unpack("!Q", self.rfile.read(8))[0]
+                mask = self.rfile.read(4) if head[1] & 0x80 else b"\0\0\0\0"
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self.rfile.read(length)))
+                if opcode == 0x8:
+                    return None
+                if opcode == 0x9:
+                    self.wfile.write(bytes([0x8A, len(payload)]) + payload)
+                    return self._recv()
+                return payload.decode()
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = Server(("127.0.0.1", port), Handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop listening and drop open connections, like a gateway restart"""
+        self.server.shutdown()
+        self.server.server_close()
+        for connection in list(self._clients):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in OpenClaw gateway")
+    parser.add_argument("--port", type=int, default=18789)
+    parser.add_argument("--token", default=None, help="token the connect request must carry")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds before acknowledging a patch")
+    parser.add_argument("sessions", nargs="*", default=["agent:main:main"], help="sessions to list")
+    args = parser.parse_args()
+
+    gateway = FakeGateway(args.port, args.token, args.delay, args.sessions).start()
+    print(f"Fake gateway on 127.0.0.1:{gateway.port}")
+    try:
+        gateway.thread.join()
+    except KeyboardInterrupt:
+        gateway.stop()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Stand-in npm for exercising assets/scripts/oc_upgrade.py. "pack" sleeps
+like a download and writes a small openclaw-<version>.tgz; "install -g"
+sleeps like an install and records the version in $FAKE_OPENCLAW_HOME,
+where dev/fake_openclaw.py reports it from --version.
+
+Usage: NPM_BIN=dev/fake_npm.py OPENCLAW_BIN=dev/fake_openclaw.py oc_upgrade.py
+       fake_npm.py pack openclaw@latest [--silent]
+       fake_npm.py install -g <tarball | openclaw@version>
+Env: FAKE_OPENCLAW_HOME (default /tmp/fake-openclaw), FAKE_NPM_LATEST
+     (default 2026.3.1), FAKE_NPM_DOWNLOAD and FAKE_NPM_INSTALL (seconds,
+     default 2.0 and 1.0)
+"""
+import io
+import json
+import os
+import re
+import sys
+import tarfile
+import time
+
+HOME = os.environ.get("FAKE_OPENCLAW_HOME", "/tmp/fake-openclaw")
+LATEST = os.environ.get("FAKE_NPM_LATEST", "2026.3.1")
+DOWNLOAD = float(os.environ.get("FAKE_NPM_DOWNLOAD", "2.0"))
+INSTALL = float(os.environ.get("FAKE_NPM_INSTALL", "1.0"))
+
+
+def version_of(spec):
+    if spec.endswith(".tgz"):
+        with tarfile.open(spec, "r:gz") as tar:
+            return json.load(tar.extractfile("package/package.json"))["version"]
+    name, _, version = spec.rpartition("@")
+    return LATEST if not name or version == "latest" else version
+
+
+def pack(spec):
+    time.sleep(DOWNLOAD)
+    version = version_of(spec)
+    data = json.dumps({"name": "openclaw", "version": version}).encode()
+    name = f"openclaw-{version}.tgz"
+    with tarfile.open(name, "w:gz") as tar:
+        info = tarfile.TarInfo("package/package.json")
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+    print(name)
+
+
+def install(spec):
+    time.sleep(INSTALL)
+    version = version_of(spec)
+    if not re.fullmatch(r"[\w.\-]+", version):
+        print(f"npm error: invalid version {version}", file=sys.stderr)
+        sys.exit(1)
+    os.makedirs(HOME, exist_ok=True)
+    with open(os.path.join(HOME, "version"), 'w') as f:
+        f.write(version)
+    print(f"added 1 package ({version})")
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+    if len(args) != 2 or args[0] not in ("pack", "install"):
+        print(__doc__.strip().split("\n\n")[-1])
+        sys.exit(1)
+    if args[0] == "pack":
+        pack(args[1])
+    else:
+        install(args[1])
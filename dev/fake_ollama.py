@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Stand-in Ollama servers for developing the settings Local Models tab and
+the endpoint pool without real hardware. Each server answers GET /api/tags
+with a fixed model list, GET /api/ps with the models generated from so far
+(or given with --loaded) and streams POST /api/generate after a set
+time-to-first-token.
+
+Usage: fake_ollama.py [--port 11434] [--count 1] [--ttft 0.05] [--ttft-step 0.05]
+                      [--delay 0.0] [--loaded name,...] [model:size ...]
+--count starts servers on consecutive ports, each slower by --ttft-step.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_MODELS = ["llama3.3:latest:42520413916", "deepseek-r1:32b:19851337640", "qwen3:8b:5225388164"]
+
+
+def parse_model(spec):
+    """name:tag:size -> {"name", "size"}"""
+    name, _, size = spec.rpartition(':')
+    if not size.isdigit():
+        name, size = spec, "0"
+    return {"name": name, "size": int(size)}
+
+
+class FakeOllama:
+    """One stand-in server on its own thread"""
+
+    def __init__(self, models, port=0, delay=0.0, ttft=0.0, loaded=()):
+        self.models = list(models)
+        self.loaded = set(loaded)
+        self.delay = delay
+        self.ttft = ttft
+        self.generate_requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/api/tags", "/api/ps"):
+                    self.send_error(404)
+                    return
+                time.sleep(server.delay)
+                models = server.models if self.path == "/api/tags" else \
+                    [m for m in server.models if m["name"] in server.loaded]
+                body = json.dumps({"models": [
+                    {"name": m["name"], "model": m["name"], "size": m["size"]} for m in models
+                ]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                names = {m["name"] for m in server.models}
+                model = request.get("model", "")
+                if model not in names and model + ":latest" not in names:
+                    self.send_error(404, f"model '{model}' not found")
+                    return
+                server.generate_requests += 1
+                server.loaded.add(model if model in names else model + ":latest")
+                time.sleep(server.ttft)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                for chunk in ({"model": model, "response": "hi", "done": False},
+                              {"model": model, "response": "", "done": True}):
+                    self.wfile.write(json.dumps(chunk).encode() + b"\n")
+                    self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in Ollama server")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--count", type=int, default=1, help="number of servers")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering /api/tags")
+    parser.add_argument("--ttft", type=float, default=0.05, help="seconds to the first generated token")
+    parser.add_argument("--ttft-step", type=float, default=0.05, help="extra ttft for each further server")
+    parser.add_argument("--loaded", default="", help="comma separated models already in memory")
+    parser.add_argument("models", nargs="*", default=DEFAULT_MODELS, help="name:tag:size")
+    args = parser.parse_args()
+
+    models = [parse_model(m) for m in args.models]
+    servers = []
+    for i in range(args.count):
+        server = FakeOllama(models, args.port + i, args.delay, args.ttft + i * args.ttft_step,
+                            filter(None, args.loaded.split(","))).start()
+        servers.append(server)
+        print(f"Fake Ollama on 127.0.0.1:{server.port} with {len(models)} models, ttft {server.ttft * 1000:.0f} ms")
+    try:
+        servers[0].thread.join()
+    except KeyboardInterrupt:
+        for server in servers:
+            server.stop()
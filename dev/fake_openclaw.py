@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Stand-in openclaw CLI for benchmarking the applet's command paths. Sleeps
+for a Node-like startup time, then forwards to a (fake) gateway through the
+applet's gateway client. "tui --message" applies the message and then stays
+open the way the real TUI does, until it is killed.
+
+The gateway, doctor, run and --version commands are enough to drive
+assets/scripts/oc_upgrade.py: "gateway start" launches dev/fake_gateway.py
+in the background ("gateway run" in the foreground, for gateway_supervisor.py), the installed version lives in $FAKE_OPENCLAW_HOME (as
+written by dev/fake_npm.py), and "run" fails while a version listed in
+FAKE_OPENCLAW_BROKEN is installed. "doctor" reports in the CLI's boxed
+format, one fixable problem included, for doctor_runner.py.
+
+Usage: OPENCLAW_BIN=dev/fake_openclaw.py switch_model.py ...
+       fake_openclaw.py sessions patch <key> --model <id>
+       fake_openclaw.py tui --session <key> --message '/model <id>'
+       fake_openclaw.py gateway start|stop|restart|run
+       fake_openclaw.py doctor [--fix]
+       fake_openclaw.py run '<shell command>'
+       fake_openclaw.py --version
+Env: FAKE_OPENCLAW_STARTUP (seconds, default 0.6), OPENCLAW_GATEWAY_PORT,
+     FAKE_OPENCLAW_HOME (default /tmp/fake-openclaw), FAKE_GATEWAY_BOOT
+     (seconds before the restarted gateway listens, default 1.0),
+     FAKE_OPENCLAW_BROKEN (comma-separated versions whose "run" fails)
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+APPLET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "..", "versions", "v0.62alpha", "oc-applet@farmfield.se")
+sys.path.insert(0, APPLET_DIR)
+
+from gateway_client import GatewayClient, GatewayError, gateway_settings  # noqa: E402
+
+STARTUP = float(os.environ.get("FAKE_OPENCLAW_STARTUP", "0.6"))
+HOME = os.environ.get("FAKE_OPENCLAW_HOME", "/tmp/fake-openclaw")
+GATEWAY_BOOT = float(os.environ.get("FAKE_GATEWAY_BOOT", "1.0"))
+DEFAULT_VERSION = "2026.2.15"
+
+
+def patch(session_key, model):
+    client = GatewayClient().connect()
+    try:
+        client.patch_session(session_key, model)
+    finally:
+        client.close()
+
+
+def installed_version():
+    try:
+        with open(os.path.join(HOME, "version"), 'r') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return DEFAULT_VERSION
+
+
+def gateway_pid():
+    try:
+        with open(os.path.join(HOME, "gateway.pid"), 'r') as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        return None
+
+
+def gateway_stop():
+    pid = gateway_pid()
+    if pid:
+        os.kill(pid, signal.SIGTERM)
+        while gateway_pid():
+            time.sleep(0.05)
+
+
+def gateway_start():
+    if gateway_pid():
+        return
+    os.makedirs(HOME, exist_ok=True)
+    # A real gateway takes a while to load before it listens
+    port = str(gateway_settings()[0])
+    command = f"sleep {GATEWAY_BOOT}; exec {sys.executable} {os.path.join(os.path.dirname(__file__), 'fake_gateway.py')} --port {port}"
+    process = subprocess.Popen(["sh", "-c", command], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, start_new_session=True)
+    with open(os.path.join(HOME, "gateway.pid"), 'w') as f:
+        f.write(str(process.pid))
+
+
+def run_command(command):
+    # Goes through the gateway like the real agent would
+    GatewayClient().connect().close()
+    if installed_version() in os.environ.get("FAKE_OPENCLAW_BROKEN", "").split(","):
+        raise GatewayError(f"agent run failed on {installed_version()}")
+    subprocess.run(["sh", "-c", command], check=True)
+
+
+def doctor(fix):
+    """Report like the real CLI's boxed output; the missing gateway token is the one fixable problem"""
+    port, token = gateway_settings()
+    print("┌  OpenClaw doctor")
+    print("│")
+    print("◇  Gateway ──────────────╮")
+    print(f"│  ✓ Port {port} configured")
+    if token:
+        print("│  ✓ Auth token set")
+    elif fix:
+        print("│  ⚠ Auth token missing (fixed)")
+    else:
+        print("│  ⚠ Auth token missing, run doctor --fix")
+    print("│  " + ("✓ Gateway reachable" if gateway_pid() else "✗ Gateway not running"), flush=True)
+    time.sleep(STARTUP)
+    print("◇  Sessions ─────────────╮")
+    print(f"│  ✓ Session store: {HOME}")
+    print("└  Doctor complete.")
+
+
+if __name__ == "__main__":
+    time.sleep(STARTUP)
+    if sys.argv[1:] == ["--version"]:
+        print(installed_version())
+        sys.exit(0)
+    parser = argparse.ArgumentParser(prog="openclaw")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sessions = commands.add_parser("sessions").add_subparsers(dest="action", required=True)
+    patch_parser = sessions.add_parser("patch")
+    patch_parser.add_argument("key")
+    patch_parser.add_argument("--model", required=True)
+    tui = commands.add_parser("tui")
+    tui.add_argument("--session", required=True)
+    tui.add_argument("--message", default="")
+    gateway = commands.add_parser("gateway")
+    gateway.add_argument("action", choices=["start", "stop", "restart", "run"])
+    doctor_parser = commands.add_parser("doctor")
+    doctor_parser.add_argument("--fix", action="store_true")
+    run = commands.add_parser("run")
+    run.add_argument("shell_command")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "sessions":
+            patch(args.key, args.model)
+            print(f"Patched {args.key}")
+        elif args.command == "tui":
+            if args.message.startswith("/model "):
+                patch(args.session, args.message[7:].strip())
+            while True:
+                time.sleep(60)
+        elif args.command == "gateway" and args.action == "run":
+            time.sleep(GATEWAY_BOOT)
+            fake_gateway = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_gateway.py")
+            os.execv(sys.executable, [sys.executable, fake_gateway, "--port", str(gateway_settings()[0])])
+        elif args.command == "gateway":
+            if args.action in ("stop", "restart"):
+                gateway_stop()
+            if args.action in ("start", "restart"):
+                gateway_start()
+                # The real CLI keeps reporting for a while after the port opens
+                time.sleep(GATEWAY_BOOT + 1.0)
+        elif args.command == "doctor":
+            doctor(args.fix)
+        elif args.command == "run":
+            run_command(args.shell_command)
+    except (GatewayError, subprocess.CalledProcessError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -9,10 +9,36 @@ const Main = imports.ui.main;
 const PopupMenu = imports.ui.popupMenu;
 const Util = imports.misc.util;
 const GLib = imports.gi.GLib;
+const Gio = imports.gi.Gio;
 const Gtk = imports.gi.Gtk;
+const ByteArray = imports.byteArray;
 
 const ICON_NAME = "oc-applet-trey-icon";
 
+// Resident settings process (settings-window.py --resident), see APP_ID there
+const SETTINGS_APP_ID = "se.farmfield.OcApplet.Settings";
+const SETTINGS_APP_PATH = "/se/farmfield/OcApplet/Settings";
+const SETTINGS_PREWARM_DELAY = 20; // seconds after applet load
+
+// Published by gateway_monitor.py; read instead of running the openclaw CLI
+const GATEWAY_STATUS_PATH = GLib.build_filenamev([GLib.get_user_runtime_dir(), "oc-applet", "gateway-status.json"]);
+const GATEWAY_STATUS_REFRESH = 5; // seconds between icon updates
+const GATEWAY_STATUS_GRACE = 10; // seconds past next_check before the file counts as stale
+const GATEWAY_SUPERVISOR_SOCKET = GLib.build_filenamev([GLib.get_user_runtime_dir(), "oc-applet", "gateway.sock"]);
+
+// Format of menu-compiled.json and menu-diff.json written by menu_snapshot.py
+const MENU_SNAPSHOT_VERSION = 1;
+
+// Published by session_inventory.py; session globs expand against it without a gateway round trip
+const SESSION_INVENTORY_PATH = GLib.build_filenamev([GLib.get_user_runtime_dir(), "oc-applet", "sessions.json"]);
+const SESSION_INVENTORY_VERSION = 1;
+
+// Written by doctor_runner.py; its health is the OC Doctor badge, outdated once openclaw.json changes
+const DOCTOR_RESULT_PATH = GLib.build_filenamev([GLib.get_user_cache_dir(), "oc-applet", "doctor.json"]);
+const DOCTOR_RESULT_VERSION = 1;
+const OPENCLAW_JSON_PATH = GLib.build_filenamev([GLib.get_home_dir(), ".openclaw", "openclaw.json"]);
+const DOCTOR_BADGES = {"ok": "\u2713", "warning": "\u26a0", "error": "\u2717", "running": "\u2026"};
+
 function MyApplet(metadata, orientation, panelHeight, instanceId) {
     this.metadata = metadata;
     this.orientation = orientation;
@@ -33,6 +59,131 @@ MyApplet.prototype = {
 
         // Setup popup menu
         this._setupMenu();
+
+        // Gateway state drives the icon and which of Start/Stop/Restart apply
+        this._runMonitor("kick");
+        this._updateGatewayStatus();
+        this._updateDoctorHealth();
+        this._statusId = GLib.timeout_add_seconds(GLib.PRIORITY_LOW, GATEWAY_STATUS_REFRESH, Lang.bind(this, function() {
+            this._updateGatewayStatus();
+            this._updateDoctorHealth();
+            return true;
+        }));
+
+        // Saves publish a diff; patch the affected items instead of rebuilding
+        this._watchMenuDiff();
+
+        // Warm the session inventory so the first model click can expand globs locally
+        this._loadSessionInventory();
+
+        // Start the settings process hidden once the panel has settled
+        this._prewarmId = GLib.timeout_add_seconds(GLib.PRIORITY_LOW, SETTINGS_PREWARM_DELAY, Lang.bind(this, function() {
+            this._prewarmId = 0;
+            this._spawnSettings(true);
+            return false;
+        }));
+    },
+
+    _runMonitor: function(command) {
+        let monitorScript = GLib.build_filenamev([this.metadata.path, "gateway_monitor.py"]);
+        Util.spawnCommandLine("python3 " + monitorScript + " " + command);
+    },
+
+    _gatewayCommand: function(action) {
+        // The supervisor owns the gateway process, restarts it if it crashes and kicks the
+        // monitor on every change; its script is only started when no supervisor answers
+        let client = new Gio.SocketClient();
+        let address = new Gio.UnixSocketAddress({path: GATEWAY_SUPERVISOR_SOCKET});
+        client.connect_async(address, null, Lang.bind(this, function(source, result) {
+            try {
+                let connection = client.connect_finish(result);
+                let request = ByteArray.fromString(JSON.stringify({command: action}) + "\n");
+                // The reply isn't needed: the monitor's status file updates the icon
+                connection.get_output_stream().write_all(request, null);
+                connection.close(null);
+            } catch (e) {
+                let supervisorScript = GLib.build_filenamev([this.metadata.path, "gateway_supervisor.py"]);
+                Util.spawnCommandLine("python3 \"" + supervisorScript + "\" " + action);
+            }
+        }));
+    },
+
+    _readGatewayStatus: function() {
+        // Returns the monitor's state, or null when it isn't running or the file is stale
+        try {
+            let [ok, contents] = GLib.file_get_contents(GATEWAY_STATUS_PATH);
+            if (!ok) {
+                return null;
+            }
+            let status = JSON.parse(contents);
+            if (Date.now() / 1000 > status.next_check + GATEWAY_STATUS_GRACE) {
+                return null;
+            }
+            return status;
+        } catch (e) {
+            return null;
+        }
+    },
+
+    _updateGatewayStatus: function() {
+        let status = this._readGatewayStatus();
+        let state = status ? status.state : "unknown";
+        if (state !== this._gatewayState) {
+            this._gatewayState = state;
+            this._updateTooltip();
+            this.actor.opacity = (state === "running" || state === "unknown") ? 255 : 130;
+        }
+    },
+
+    _updateDoctorHealth: function() {
+        // Re-read only when the result or openclaw.json changed; null health until a doctor run finished
+        let stamp = JSON.stringify([this._sourceStamp(DOCTOR_RESULT_PATH), this._sourceStamp(OPENCLAW_JSON_PATH)]);
+        if (stamp === this._doctorStamp) {
+            return;
+        }
+        this._doctorStamp = stamp;
+        this._doctorHealth = null;
+        this._doctorOutdated = false;
+        try {
+            let [ok, contents] = GLib.file_get_contents(DOCTOR_RESULT_PATH);
+            let result = ok ? JSON.parse(contents) : null;
+            if (result && result.version === DOCTOR_RESULT_VERSION) {
+                this._doctorHealth = result.state === "running" ? "running" : result.health;
+                this._doctorOutdated = result.state !== "running" && result.config !== this._configHash();
+            }
+        } catch (e) {
+            // No doctor result yet
+        }
+        this._showDoctorBadge();
+        this._updateTooltip();
+    },
+
+    _configHash: function() {
+        // Same digest doctor_runner.py keys its result on; "" when openclaw.json is missing
+        try {
+            let [ok, contents] = GLib.file_get_contents(OPENCLAW_JSON_PATH);
+            return ok ? GLib.compute_checksum_for_bytes(GLib.ChecksumType.SHA256, new GLib.Bytes(contents)) : "";
+        } catch (e) {
+            return "";
+        }
+    },
+
+    _showDoctorBadge: function() {
+        if (!this._doctorBadge) {
+            return;
+        }
+        let health = this._doctorHealth;
+        this._doctorBadge.set_text(health ? DOCTOR_BADGES[health] || "" : "");
+        // An outdated result is dimmed until the next check
+        this._doctorBadge.opacity = this._doctorOutdated ? 130 : 255;
+    },
+
+    _updateTooltip: function() {
+        let tooltip = "OC-Applet - gateway " + (this._gatewayState || "unknown");
+        if (this._doctorHealth) {
+            tooltip += ", doctor " + this._doctorHealth + (this._doctorOutdated ? " (config changed)" : "");
+        }
+        this.set_applet_tooltip(tooltip);
     },
 
     _loadIcon: function() {
@@ -139,283 +290,538 @@ MyApplet.prototype = {
         }
     },
 
-    _buildMenuContent: function() {
-        // Remove all existing items first
-        this.menu.removeAll();
-        let children = this.menu.box.get_children();
-        for (let i = children.length - 1; i >= 0; i--) {
-            this.menu.box.remove_actor(children[i]);
+    _sourceStamp: function(path) {
+        // [mtime seconds, size] like menu_snapshot.py records, or null when missing
+        try {
+            let info = Gio.File.new_for_path(path).query_info("time::modified,standard::size", Gio.FileQueryInfoFlags.NONE, null);
+            return [info.get_attribute_uint64("time::modified"), info.get_size()];
+        } catch (e) {
+            return null;
         }
-        
-        // Load menu settings fresh
+    },
+
+    _loadSnapshot: function() {
+        // Compiled by menu_snapshot.py on Save; null when missing, outdated or older than its sources
+        try {
+            let dataDir = GLib.build_filenamev([global.userdatadir, "applets", UUID]);
+            let [success, contents] = GLib.file_get_contents(GLib.build_filenamev([dataDir, "menu-compiled.json"]));
+            if (!success) {
+                return null;
+            }
+            let snapshot = JSON.parse(contents);
+            if (snapshot.version !== MENU_SNAPSHOT_VERSION) {
+                return null;
+            }
+            let sources = {"menu": "menu.json", "models": "models.json"};
+            for (let name in sources) {
+                let stamp = this._sourceStamp(GLib.build_filenamev([dataDir, sources[name]]));
+                if (JSON.stringify(stamp) !== JSON.stringify(snapshot.sources[name])) {
+                    return null;
+                }
+            }
+            return snapshot;
+        } catch (e) {
+            return null;
+        }
+    },
+
+    _compileMenu: function() {
+        // Fallback when there is no usable snapshot: same items menu_snapshot.py compiles,
+        // and have it write a fresh snapshot for the next open
+        let snapshotScript = GLib.build_filenamev([this.metadata.path, "menu_snapshot.py"]);
+        Util.spawnCommandLine("python3 " + snapshotScript);
+
         let menuConfig = this._loadMenuSettings();
+        let models = this._loadModels() || [];
+        let items = [];
+        let separator = function() {
+            if (items.length > 0 && items[items.length - 1].type !== "separator") {
+                items.push({"type": "separator"});
+            }
+        };
 
-        // Title at top (centered) - add directly to menu box
         if (this._isEnabled(menuConfig, "title")) {
-            let titleText = this._getLabel(menuConfig, "title", "OC Control");
-            let titleLabel = new St.Label({ text: titleText, style: "font-size: 14px; font-weight: bold;" });
-            this.menu.box.add(titleLabel, { expand: true, x_fill: false, x_align: St.Align.MIDDLE });
-            this.menu.addMenuItem(new PopupMenu.PopupSeparatorMenuItem());
+            items.push({"type": "title", "text": this._getLabel(menuConfig, "title", "OC Control")});
+            separator();
         }
 
-            // Submenu: OC Models (click to open dropdown)
-            if (this._isEnabled(menuConfig, "oc_models")) {
-                let modelsLabel = this._getLabel(menuConfig, "oc_models", "OC Models");
-                this.modelsSubmenu = new PopupMenu.PopupSubMenuMenuItem(modelsLabel, true);
-                this.modelsSubmenu.menu._hoverEnabled = false;
-                this._refreshModelsMenu();
-                this.menu.addMenuItem(this.modelsSubmenu);
-                this.menu.addMenuItem(new PopupMenu.PopupSeparatorMenuItem());
-            }
-
-            // Menu Item: OC Start
-            if (this._isEnabled(menuConfig, "oc_start")) {
-                let label = this._getLabel(menuConfig, "oc_start", "OC Start");
-                let item = new PopupMenu.PopupIconMenuItem(label, "start-gateway-icon", St.IconType.FULLCOLOR);
-                item.connect('activate', Lang.bind(this, function() {
-                    global.log("OC-Applet: OC Start clicked");
-                    Util.spawnCommandLine("bash -c '/usr/bin/openclaw gateway start'");
-                    this.menu.close();
-                }));
-                this.menu.addMenuItem(item);
-            }
-
-            // Menu Item: OC Stop
-            if (this._isEnabled(menuConfig, "oc_stop")) {
-                let label = this._getLabel(menuConfig, "oc_stop", "OC Stop");
-                let item = new PopupMenu.PopupIconMenuItem(label, "stop-gateway-icon", St.IconType.FULLCOLOR);
-                item.connect('activate', Lang.bind(this, function() {
-                    global.log("OC-Applet: OC Stop clicked");
-                    Util.spawnCommandLine("bash -c '/usr/bin/openclaw gateway stop'");
-                    this.menu.close();
-                }));
-                this.menu.addMenuItem(item);
-            }
-
-            // Menu Item: OC Restart
-            if (this._isEnabled(menuConfig, "oc_restart")) {
-                let label = this._getLabel(menuConfig, "oc_restart", "OC Restart");
-                let item = new PopupMenu.PopupIconMenuItem(label, "restart-gateway-icon", St.IconType.FULLCOLOR);
-                item.connect('activate', Lang.bind(this, function() {
-                    global.log("OC-Applet: OC Restart clicked");
-                    Util.spawnCommandLine("bash -c '/usr/bin/openclaw gateway restart'");
-                    this.menu.close();
-                }));
-                this.menu.addMenuItem(item);
-            }
-
-            // Separator and Dashboard
-            if (this._isEnabled(menuConfig, "oc_dashboard")) {
-                this.menu.addMenuItem(new PopupMenu.PopupSeparatorMenuItem());
-                let label = this._getLabel(menuConfig, "oc_dashboard", "OC Dashboard");
-                let item = new PopupMenu.PopupIconMenuItem(label, "oc-open-dashboard", St.IconType.FULLCOLOR);
-                item.connect('activate', Lang.bind(this, function() {
-                    Util.spawnCommandLine("xdg-open http://127.0.0.1:18789/");
-                    this.menu.close();
-                }));
-                this.menu.addMenuItem(item);
-            }
-
-            // Separator and Json/Folder
-            if (this._isEnabled(menuConfig, "oc_json") || this._isEnabled(menuConfig, "oc_folder")) {
-                this.menu.addMenuItem(new PopupMenu.PopupSeparatorMenuItem());
-                
-                if (this._isEnabled(menuConfig, "oc_json")) {
-                    let label = this._getLabel(menuConfig, "oc_json", "OC Json");
-                    let item = new PopupMenu.PopupIconMenuItem(label, "oc-json-icon", St.IconType.FULLCOLOR);
-                    item.connect('activate', Lang.bind(this, function() {
-                        let homeDir = GLib.get_home_dir();
-                        Util.spawnCommandLine("xdg-open " + homeDir + "/.openclaw/openclaw.json");
-                        this.menu.close();
-                    }));
-                    this.menu.addMenuItem(item);
+        if (this._isEnabled(menuConfig, "oc_models")) {
+            // Group models by provider (first part of the ID), providers sorted
+            let modelsByProvider = {};
+            for (let i = 0; i < models.length; i++) {
+                if (!models[i].id) {
+                    continue;
+                }
+                let modelId = models[i].id.startsWith("manual_") ? models[i].id.substring(7) : models[i].id;
+                let provider = "Other";
+                if (modelId.indexOf('/') >= 0) {
+                    let first = modelId.split('/')[0];
+                    provider = first.charAt(0).toUpperCase() + first.slice(1);
                 }
-                
-                if (this._isEnabled(menuConfig, "oc_folder")) {
-                    let label = this._getLabel(menuConfig, "oc_folder", "OC Folder");
-                    let item = new PopupMenu.PopupIconMenuItem(label, "oc_folder_open", St.IconType.FULLCOLOR);
-                    item.connect('activate', Lang.bind(this, function() {
-                        let homeDir = GLib.get_home_dir();
-                        Util.spawnCommandLine("xdg-open " + homeDir + "/.openclaw/");
-                        this.menu.close();
-                    }));
-                    this.menu.addMenuItem(item);
+                if (!modelsByProvider[provider]) {
+                    modelsByProvider[provider] = [];
                 }
+                modelsByProvider[provider].push({"id": modelId, "name": String(models[i].name || modelId)});
             }
+            let groups = Object.keys(modelsByProvider).sort().map(function(provider) {
+                return {"provider": provider, "models": modelsByProvider[provider]};
+            });
+            items.push({"type": "models", "label": this._getLabel(menuConfig, "oc_models", "OC Models"),
+                        "sessions": menuConfig["oc_models"].sessions || ["agent:main:main"], "groups": groups});
+            separator();
+        }
 
-            // Separator and Doctor
-            if (this._isEnabled(menuConfig, "oc_doctor")) {
-                this.menu.addMenuItem(new PopupMenu.PopupSeparatorMenuItem());
-                let label = this._getLabel(menuConfig, "oc_doctor", "OC Doctor");
-                let item = new PopupMenu.PopupIconMenuItem(label, "oc-doctor-icon", St.IconType.FULLCOLOR);
-                item.connect('activate', Lang.bind(this, function() {
-                    Util.spawnCommandLine("x-terminal-emulator -e 'bash -c \"/usr/bin/openclaw doctor --fix; echo; echo Press Enter to close; read\"'");
-                    this.menu.close();
-                }));
-                this.menu.addMenuItem(item);
-            }
-
-            // Custom menu items
-            this._addCustomMenuItems(menuConfig);
-
-            // Footer separator and settings
-            if (this._isEnabled(menuConfig, "settings") || this._isEnabled(menuConfig, "credits")) {
-                this.menu.addMenuItem(new PopupMenu.PopupSeparatorMenuItem());
-                
-                if (this._isEnabled(menuConfig, "settings")) {
-                    let label = this._getLabel(menuConfig, "settings", "Settings");
-                    let settingsItem = new PopupMenu.PopupIconMenuItem(label, "settings-icon", St.IconType.FULLCOLOR);
-                    settingsItem.label.set_style("font-size: 9px;");
-                    settingsItem.connect('activate', Lang.bind(this, this._showSettings));
-                    this.menu.addMenuItem(settingsItem);
-                }
-                
-                if (this._isEnabled(menuConfig, "credits")) {
-                    let creditsText = this._getLabel(menuConfig, "credits", "0.62a - ByFarmfield - 2026");
-                    let versionLabel = new St.Label({ text: creditsText, style: "font-size: 9px; color: #888888;" });
-                    this.menu.box.add(versionLabel, { expand: true, x_fill: false, x_align: St.Align.END });
-                }
+        let gatewayItems = [["oc_start", "OC Start", "start-gateway-icon"],
+                            ["oc_stop", "OC Stop", "stop-gateway-icon"],
+                            ["oc_restart", "OC Restart", "restart-gateway-icon"]];
+        for (let i = 0; i < gatewayItems.length; i++) {
+            let [key, label, icon] = gatewayItems[i];
+            if (this._isEnabled(menuConfig, key)) {
+                items.push({"type": "gateway", "key": key, "action": key.substring(3),
+                            "label": this._getLabel(menuConfig, key, label), "icon": icon});
+            }
+        }
 
-                // Spacer at bottom
-                let bottomSpacer = new St.Label({ text: "" });
-                bottomSpacer.set_height(5);
-                this.menu.box.add(bottomSpacer, { expand: false, x_fill: true });
+        let toolGroups = [[["oc_dashboard", "OC Dashboard", "oc-open-dashboard"]],
+                          [["oc_json", "OC Json", "oc-json-icon"], ["oc_folder", "OC Folder", "oc_folder_open"]],
+                          [["oc_doctor", "OC Doctor", "oc-doctor-icon"]]];
+        for (let g = 0; g < toolGroups.length; g++) {
+            let enabled = toolGroups[g].filter(Lang.bind(this, function(tool) { return this._isEnabled(menuConfig, tool[0]); }));
+            if (enabled.length > 0) {
+                separator();
             }
-    },
+            for (let i = 0; i < enabled.length; i++) {
+                let [key, label, icon] = enabled[i];
+                items.push({"type": "tool", "key": key, "label": this._getLabel(menuConfig, key, label), "icon": icon});
+            }
+        }
 
-    _addCustomMenuItems: function(menuConfig) {
-        // Add custom items if they exist and are enabled
+        let firstCustom = true;
         for (let i = 1; i <= 3; i++) {
             let key = "custom_" + i;
-            if (menuConfig[key] && menuConfig[key].enabled !== false) {
-                let title = menuConfig[key].title || "Custom " + i;
-                let command = menuConfig[key].command || "";
-                
-                if (title && command) {
-                    // Add separator before first custom item
-                    if (i === 1) {
-                        this.menu.addMenuItem(new PopupMenu.PopupSeparatorMenuItem());
-                    }
-                    
-                    let item = new PopupMenu.PopupIconMenuItem(title, "custom-menu-icon", St.IconType.FULLCOLOR);
-                    item.connect('activate', Lang.bind(this, function(cmd) {
-                        return function() {
-                            Util.spawnCommandLine("bash -c '" + cmd + "'");
-                            this.menu.close();
-                        };
-                    }(command)));
-                    this.menu.addMenuItem(item);
+            if (this._isEnabled(menuConfig, key) && menuConfig[key].command) {
+                if (firstCustom) {
+                    separator();
+                    firstCustom = false;
+                }
+                items.push({"type": "custom", "key": key, "label": menuConfig[key].title || "Custom " + i,
+                            "command": menuConfig[key].command});
+            }
+        }
+
+        if (this._isEnabled(menuConfig, "settings") || this._isEnabled(menuConfig, "credits")) {
+            separator();
+            if (this._isEnabled(menuConfig, "settings")) {
+                items.push({"type": "settings", "label": this._getLabel(menuConfig, "settings", "Settings")});
+            }
+            if (this._isEnabled(menuConfig, "credits")) {
+                items.push({"type": "credits", "text": this._getLabel(menuConfig, "credits", "0.62a - ByFarmfield - 2026")});
+            }
+            items.push({"type": "spacer"});
+        }
+        return items;
+    },
+
+    _buildMenuContent: function() {
+        // One small file read each; no CLI call while the menu is built
+        let snapshot = this._loadSnapshot();
+        let gatewayStatus = this._readGatewayStatus();
+        this._updateGatewayStatus();
+
+        // Unchanged settings: keep the items, only refresh what depends on the gateway state
+        if (snapshot && this._menuHash === snapshot.hash) {
+            this._updateItemSensitivity(gatewayStatus);
+            return;
+        }
+        let items = snapshot ? snapshot.items : this._compileMenu();
+        this._menuHash = snapshot ? snapshot.hash : null;
+
+        // Remove all existing items first
+        this.menu.removeAll();
+        let children = this.menu.box.get_children();
+        for (let i = children.length - 1; i >= 0; i--) {
+            this.menu.box.remove_actor(children[i]);
+        }
+        this._statusItems = [];
+        this._entryLabels = {};
+        this._doctorBadge = null;
+
+        for (let i = 0; i < items.length; i++) {
+            this._addMenuEntry(items[i]);
+        }
+        this._updateItemSensitivity(gatewayStatus);
+    },
+
+    _addMenuEntry: function(entry) {
+        switch (entry.type) {
+        case "title": {
+            // Title at top (centered) - add directly to menu box
+            let titleLabel = new St.Label({ text: entry.text, style: "font-size: 14px; font-weight: bold;" });
+            this.menu.box.add(titleLabel, { expand: true, x_fill: false, x_align: St.Align.MIDDLE });
+            this._entryLabels["title"] = titleLabel;
+            break;
+        }
+        case "separator":
+            this.menu.addMenuItem(new PopupMenu.PopupSeparatorMenuItem());
+            break;
+        case "models":
+            // Submenu: OC Models (click to open dropdown)
+            this.modelsSubmenu = new PopupMenu.PopupSubMenuMenuItem(entry.label, true);
+            this.modelsSubmenu.menu._hoverEnabled = false;
+            // Session keys or globs a model click switches
+            this.switchSessions = entry.sessions;
+            this._refreshModelsMenu(entry.groups);
+            this.menu.addMenuItem(this.modelsSubmenu);
+            this._entryLabels["models"] = this.modelsSubmenu.label;
+            break;
+        case "gateway": {
+            let item = new PopupMenu.PopupIconMenuItem(entry.label, entry.icon, St.IconType.FULLCOLOR);
+            item.connect('activate', Lang.bind(this, function() {
+                global.log("OC-Applet: " + entry.label + " clicked");
+                this._gatewayCommand(entry.action);
+                this.menu.close();
+            }));
+            this._statusItems.push([entry.key, item]);
+            this.menu.addMenuItem(item);
+            this._entryLabels[entry.key] = item.label;
+            break;
+        }
+        case "tool": {
+            let item = new PopupMenu.PopupIconMenuItem(entry.label, entry.icon, St.IconType.FULLCOLOR);
+            item.connect('activate', Lang.bind(this, function() {
+                let homeDir = GLib.get_home_dir();
+                if (entry.key === "oc_dashboard") {
+                    Util.spawnCommandLine("xdg-open http://127.0.0.1:18789/");
+                } else if (entry.key === "oc_json") {
+                    Util.spawnCommandLine("xdg-open " + homeDir + "/.openclaw/openclaw.json");
+                } else if (entry.key === "oc_folder") {
+                    Util.spawnCommandLine("xdg-open " + homeDir + "/.openclaw/");
+                } else if (entry.key === "oc_doctor") {
+                    // Headless; an unchanged version and config answer from the cached result
+                    let doctorScript = GLib.build_filenamev([this.metadata.path, "doctor_runner.py"]);
+                    Util.spawnCommandLine("python3 " + doctorScript + " check --notify");
                 }
+                this.menu.close();
+            }));
+            if (entry.key === "oc_dashboard") {
+                this._statusItems.push([entry.key, item]);
+            } else if (entry.key === "oc_doctor") {
+                this._doctorBadge = new St.Label({ text: "" });
+                item.addActor(this._doctorBadge, { align: St.Align.END });
+                this._showDoctorBadge();
+            }
+            this.menu.addMenuItem(item);
+            this._entryLabels[entry.key] = item.label;
+            break;
+        }
+        case "custom": {
+            let item = new PopupMenu.PopupIconMenuItem(entry.label, "custom-menu-icon", St.IconType.FULLCOLOR);
+            // custom_runner.py reads the command and timeout from menu.json, so edits apply on the
+            // next click; a click while the item still runs attaches to it instead of starting a copy
+            item.connect('activate', Lang.bind(this, function() {
+                let runnerScript = GLib.build_filenamev([this.metadata.path, "custom_runner.py"]);
+                Util.spawnCommandLine("python3 " + runnerScript + " run " + entry.key);
+                this.menu.close();
+            }));
+            this.menu.addMenuItem(item);
+            this._entryLabels[entry.key] = item.label;
+            break;
+        }
+        case "settings": {
+            let settingsItem = new PopupMenu.PopupIconMenuItem(entry.label, "settings-icon", St.IconType.FULLCOLOR);
+            settingsItem.label.set_style("font-size: 9px;");
+            settingsItem.connect('activate', Lang.bind(this, this._showSettings));
+            this.menu.addMenuItem(settingsItem);
+            this._entryLabels["settings"] = settingsItem.label;
+            break;
+        }
+        case "credits": {
+            let versionLabel = new St.Label({ text: entry.text, style: "font-size: 9px; color: #888888;" });
+            this.menu.box.add(versionLabel, { expand: true, x_fill: false, x_align: St.Align.END });
+            this._entryLabels["credits"] = versionLabel;
+            break;
+        }
+        case "spacer": {
+            // Spacer at bottom
+            let bottomSpacer = new St.Label({ text: "" });
+            bottomSpacer.set_height(5);
+            this.menu.box.add(bottomSpacer, { expand: false, x_fill: true });
+            break;
+        }
+        }
+    },
+
+    _updateItemSensitivity: function(gatewayStatus) {
+        // Everything stays usable while the monitor hasn't reported
+        let state = gatewayStatus ? gatewayStatus.state : null;
+        for (let i = 0; i < this._statusItems.length; i++) {
+            let [key, item] = this._statusItems[i];
+            if (!state) {
+                item.setSensitive(true);
+            } else if (key === "oc_start") {
+                item.setSensitive(state === "stopped");
+            } else if (key === "oc_dashboard") {
+                item.setSensitive(state === "running");
+            } else {
+                item.setSensitive(state !== "stopped");
             }
         }
     },
 
-    _refreshModelsMenu: function() {
+    _refreshModelsMenu: function(groups) {
         // Clear existing items
         this.modelsSubmenu.menu.removeAll();
-        
-        // Load models from JSON file
-        let models = this._loadModels();
-        
-        global.log("OC-Applet: Models reloaded from JSON: " + JSON.stringify(models));
-        
-        // Fallback to empty if load failed
-        if (!models) {
-            global.logError("OC-Applet: Failed to load models, using empty list");
-            models = [];
-        }
-        
+        // Per provider: header, separator above it and the model items, for patching
+        this._modelGroups = [];
+        this._modelItems = {};
+
         // Add "No models" message if empty
-        if (models.length === 0) {
+        if (groups.length === 0) {
             let emptyItem = new PopupMenu.PopupMenuItem("No models configured");
             emptyItem.setSensitive(false);
             this.modelsSubmenu.menu.addMenuItem(emptyItem);
-        } else {
-            // Group models by provider
-            let modelsByProvider = {};
-            for (let i = 0; i < models.length; i++) {
-                let m = models[i];
-                let provider = "Other";
-                
-                // Extract provider from model ID
-                let modelId = m.id;
-                if (modelId.startsWith("manual_")) {
-                    modelId = modelId.substring(7);
+            return;
+        }
+
+        // Add models grouped by provider, providers already sorted
+        for (let j = 0; j < groups.length; j++) {
+            // Add separator between providers (but not before first)
+            if (j > 0) {
+                this.modelsSubmenu.menu.addMenuItem(new PopupMenu.PopupSeparatorMenuItem());
+            }
+
+            // Add provider header (small font)
+            let headerItem = new PopupMenu.PopupMenuItem(groups[j].provider + ":");
+            headerItem.label.set_style("font-size: 8px; font-weight: bold; color: #888888;");
+            headerItem.setSensitive(false);
+            this.modelsSubmenu.menu.addMenuItem(headerItem);
+
+            // Add models for this provider
+            let group = {"provider": groups[j].provider, "models": []};
+            this._modelGroups.push(group);
+            for (let i = 0; i < groups[j].models.length; i++) {
+                this._addModelItem(group, groups[j].models[i], i);
+            }
+        }
+    },
+
+    _modelItemPosition: function(group, index) {
+        // Menu position of a group's index-th model: earlier groups, then separator and header
+        let position = 0;
+        for (let j = 0; j < this._modelGroups.length; j++) {
+            position += (j > 0 ? 1 : 0) + 1;
+            if (this._modelGroups[j] === group) {
+                return position + index;
+            }
+            position += this._modelGroups[j].models.length;
+        }
+        return position;
+    },
+
+    _addModelItem: function(group, model, index) {
+        // IDs come without the manual_ prefix; the name is read on click so a relabel can patch it
+        let entry = {"id": model.id, "name": model.name, "group": group};
+        entry.item = new PopupMenu.PopupMenuItem("  " + model.name);
+        entry.item.connect('activate', Lang.bind(this, function() {
+            let model_id = entry.id;
+            let name = entry.name;
+            global.log("OC-Applet: CLICKED model_id=" + model_id + ", name=" + name);
+            // Goes through the gateway connection kept by switch_model.py, CLI as fallback
+            let switchScript = GLib.build_filenamev([this.metadata.path, "switch_model.py"]);
+            let sessionArgs = this._expandSessions(this.switchSessions).map(function(key) { return '"' + key + '"'; }).join(' ');
+            let patchCmd = 'python3 "' + switchScript + '" ' + sessionArgs + ' ' + model_id;
+            if (model_id.startsWith("ollama/")) {
+                // Point at the fastest healthy Ollama server that has the model first
+                let poolScript = GLib.build_filenamev([this.metadata.path, "ollama_pool.py"]);
+                patchCmd = 'python3 "' + poolScript + '" route ' + model_id + '; ' + patchCmd;
+            }
+            global.log("OC-Applet: RUNNING cmd=" + patchCmd);
+            Util.spawnCommandLine("bash -c '" + patchCmd + "'");
+            Main.notify("OC Models", "Switched to " + name);
+            this.menu.close();
+        }));
+        this.modelsSubmenu.menu.addMenuItem(entry.item, this._modelItemPosition(group, index));
+        group.models.splice(index, 0, entry);
+        this._modelItems[model.id] = entry;
+    },
+
+    _watchMenuDiff: function() {
+        let diffPath = GLib.build_filenamev([global.userdatadir, "applets", UUID, "menu-diff.json"]);
+        try {
+            this._diffMonitor = Gio.File.new_for_path(diffPath).monitor_file(Gio.FileMonitorFlags.NONE, null);
+            this._diffMonitor.connect('changed', Lang.bind(this, function(monitor, file, otherFile, eventType) {
+                // Written by rename, which shows up as a create
+                if (eventType === Gio.FileMonitorEvent.CREATED || eventType === Gio.FileMonitorEvent.CHANGES_DONE_HINT) {
+                    this._applyMenuDiff(diffPath);
                 }
-                
-                if (modelId.indexOf('/') >= 0) {
-                    let parts = modelId.split('/');
-                    // Use the first part as the API provider (openrouter, nvidia, google, etc.)
-                    provider = parts[0].charAt(0).toUpperCase() + parts[0].slice(1);
+            }));
+        } catch (e) {
+            global.logError("OC-Applet: Cannot watch " + diffPath + ": " + e);
+        }
+    },
+
+    _applyMenuDiff: function(diffPath) {
+        let diff;
+        try {
+            let [success, contents] = GLib.file_get_contents(diffPath);
+            diff = success ? JSON.parse(contents) : null;
+        } catch (e) {
+            diff = null;
+        }
+        // Only a diff from the menu on screen applies; anything else waits for the rebuild on open
+        if (!diff || diff.version !== MENU_SNAPSHOT_VERSION || !this._menuHash || diff.from !== this._menuHash || diff.structure) {
+            return;
+        }
+
+        for (let key in diff.labels) {
+            if (this._entryLabels[key]) {
+                this._entryLabels[key].set_text(diff.labels[key]);
+            }
+        }
+        if (diff.sessions) {
+            this.switchSessions = diff.sessions;
+        }
+
+        let models = diff.models;
+        if (models.reload) {
+            // Providers came or went: redo just the models submenu from the new snapshot
+            let snapshot = this._loadSnapshot();
+            if (!snapshot || snapshot.hash !== diff.to) {
+                return;
+            }
+            for (let i = 0; i < snapshot.items.length; i++) {
+                if (snapshot.items[i].type === "models") {
+                    this._refreshModelsMenu(snapshot.items[i].groups);
                 }
-                
-                if (!modelsByProvider[provider]) {
-                    modelsByProvider[provider] = [];
+            }
+        } else {
+            for (let i = 0; i < models.removed.length; i++) {
+                let entry = this._modelItems[models.removed[i]];
+                if (entry) {
+                    entry.group.models.splice(entry.group.models.indexOf(entry), 1);
+                    entry.item.destroy();
+                    delete this._modelItems[models.removed[i]];
                 }
-                modelsByProvider[provider].push(m);
             }
-            
-            // Sort providers alphabetically
-            let sortedProviders = Object.keys(modelsByProvider).sort();
-            
-            // Add models grouped by provider
-            let isFirstProvider = true;
-            for (let j = 0; j < sortedProviders.length; j++) {
-                let provider = sortedProviders[j];
-                let providerModels = modelsByProvider[provider];
-                
-                // Add separator between providers (but not before first)
-                if (!isFirstProvider) {
-                    this.modelsSubmenu.menu.addMenuItem(new PopupMenu.PopupSeparatorMenuItem());
+            for (let i = 0; i < models.relabeled.length; i++) {
+                let entry = this._modelItems[models.relabeled[i].id];
+                if (entry) {
+                    entry.name = models.relabeled[i].name;
+                    entry.item.label.set_text("  " + entry.name);
                 }
-                isFirstProvider = false;
-                
-                // Add provider header (small font)
-                let headerItem = new PopupMenu.PopupMenuItem(provider + ":");
-                headerItem.label.set_style("font-size: 8px; font-weight: bold; color: #888888;");
-                headerItem.setSensitive(false);
-                this.modelsSubmenu.menu.addMenuItem(headerItem);
-                
-                // Add models for this provider
-                for (let i = 0; i < providerModels.length; i++) {
-                    let m = providerModels[i];
-                    let mItem = new PopupMenu.PopupMenuItem("  " + m.name);
-                    // Fix closure capture with let
-                    let model_id = m.id;
-                    let name = m.name;
-                    mItem.connect('activate', Lang.bind(this, function() {
-                        global.log("OC-Applet: CLICKED model_id=" + model_id + ", name=" + name);
-                        // Strip manual_ prefix if present
-                        let actual_model_id = model_id;
-                        if (model_id.startsWith("manual_")) {
-                            actual_model_id = model_id.substring(7);
-                        }
-                        let patchCmd = 'openclaw sessions patch agent:main:main --model ' + actual_model_id;
-                        global.log("OC-Applet: RUNNING cmd=" + patchCmd);
-                        Util.spawnCommandLine("bash -c '" + patchCmd + "'");
-                        Main.notify("OC Models", "Switched to " + name);
-                        this.menu.close();
-                    }));
-                    this.modelsSubmenu.menu.addMenuItem(mItem);
+            }
+            // Ascending index per provider, so each insert lands where the snapshot has it
+            for (let i = 0; i < models.added.length; i++) {
+                let added = models.added[i];
+                let group = this._modelGroups.filter(function(g) { return g.provider === added.provider; })[0];
+                if (group) {
+                    this._addModelItem(group, added, added.index);
                 }
             }
         }
+        this._menuHash = diff.to;
+        global.log("OC-Applet: Applied menu diff " + diff.from + " -> " + diff.to);
     },
 
     on_applet_clicked: function(event) {
-        // Rebuild menu content each time to pick up setting changes
+        // Rebuilds only when the compiled snapshot changed since the last open
         this._buildMenuContent();
+        this._loadSessionInventory();
         this.menu.toggle();
     },
 
+    _loadSessionInventory: function() {
+        // Keep the cached session keys; a missing or stale inventory is refreshed in the background
+        let stale = true;
+        try {
+            let [ok, contents] = GLib.file_get_contents(SESSION_INVENTORY_PATH);
+            let inventory = ok ? JSON.parse(contents) : null;
+            if (inventory && inventory.version === SESSION_INVENTORY_VERSION) {
+                this._sessionInventory = inventory.sessions;
+                stale = Date.now() / 1000 > inventory.generated + inventory.ttl;
+                for (let path in inventory.stores) {
+                    if (JSON.stringify(this._sourceStamp(path)) !== JSON.stringify(inventory.stores[path])) {
+                        stale = true;
+                    }
+                }
+            }
+        } catch (e) {
+            // No inventory yet
+        }
+        if (stale) {
+            let inventoryScript = GLib.build_filenamev([this.metadata.path, "session_inventory.py"]);
+            Util.spawnCommandLine("python3 " + inventoryScript + " refresh-if-stale");
+        }
+    },
+
+    _expandSessions: function(patterns) {
+        // Globs (agent:*:main) against the inventory; unmatched globs go to switch_model.py as they are
+        let known = this._sessionInventory || [];
+        let keys = [];
+        patterns.forEach(function(pattern) {
+            if (!/[*?[]/.test(pattern)) {
+                keys.push(pattern);
+                return;
+            }
+            let regex = new RegExp("^" + pattern.replace(/[.+^${}()|\\]/g, "\\$&").replace(/\*/g, ".*").replace(/\?/g, ".").replace(/\[!/g, "[^") + "$");
+            let matches = known.filter(function(key) { return regex.test(key); });
+            keys.push.apply(keys, matches.length ? matches : [pattern]);
+        });
+        return keys.filter(function(key, index) { return keys.indexOf(key) === index; });
+    },
+
     _showSettings: function() {
         this.menu.close();
         
+        // Ask the resident settings process to present its window; launch it if it isn't running
+        this._callSettingsApp("Activate", new GLib.Variant("(a{sv})", [{}]), Lang.bind(this, function(error) {
+            if (error) {
+                global.log("OC-Applet: Settings not resident, launching: " + error);
+                this._spawnSettings(false);
+            }
+        }));
+    },
+
+    _spawnSettings: function(background) {
         // Get the applet directory path
         let settingsScript = GLib.build_filenamev([this.metadata.path, "settings-window.py"]);
         
-        // Launch the settings window as a separate process
-        Util.spawnCommandLine("python3 " + settingsScript);
+        // Launch the settings window as a separate, resident process
+        Util.spawnCommandLine("python3 " + settingsScript + " --resident" + (background ? " --background" : ""));
+    },
+
+    _callSettingsApp: function(method, params, callback) {
+        Gio.DBus.session.call(SETTINGS_APP_ID, SETTINGS_APP_PATH, "org.freedesktop.Application", method,
+            params, null, Gio.DBusCallFlags.NO_AUTO_START, 1000, null,
+            function(connection, result) {
+                let error = null;
+                try {
+                    connection.call_finish(result);
+                } catch (e) {
+                    error = e;
+                }
+                if (callback) {
+                    callback(error);
+                }
+            });
+    },
+
+    on_applet_removed_from_panel: function() {
+        if (this._prewarmId) {
+            GLib.source_remove(this._prewarmId);
+            this._prewarmId = 0;
+        }
+        if (this._statusId) {
+            GLib.source_remove(this._statusId);
+            this._statusId = 0;
+        }
+        if (this._diffMonitor) {
+            this._diffMonitor.cancel();
+            this._diffMonitor = null;
+        }
+        this._runMonitor("stop");
+        // Stop the resident settings process
+        this._callSettingsApp("ActivateAction", new GLib.Variant("(sava{sv})", ["quit", [], {}]), null);
     },
 };
 
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+SQLite index of known models for the settings Model List tab.
+Keeps id, provider, name, context length, pricing and source for every
+catalog model, with an FTS5 table for search. Catalog dumps (catalog.json
+or an OpenRouter /models dump) are applied incrementally: only rows whose
+content changed are written. models.json stays the small export that
+applet.js reads.
+
+Usage: catalog_index.py import <dump.json> [--origin NAME]
+       catalog_index.py search <text>
+       catalog_index.py stats
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+
+from model_catalog import CATALOG_JSON_PATH
+from runtime import CACHE_DIR
+
+INDEX_PATH = os.path.join(CACHE_DIR, "catalog.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    id TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    name TEXT NOT NULL,
+    context_length INTEGER,
+    prompt_price REAL,
+    completion_price REAL,
+    source TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    catalog_group TEXT,
+    digest TEXT NOT NULL,
+    enabled INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS models_origin ON models(origin);
+CREATE INDEX IF NOT EXISTS models_enabled ON models(id) WHERE enabled = 1;
+CREATE VIRTUAL TABLE IF NOT EXISTS models_fts USING fts5(
+    id, name, provider, catalog_group, content='models', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS models_ai AFTER INSERT ON models BEGIN
+    INSERT INTO models_fts(rowid, id, name, provider, catalog_group)
+    VALUES (new.rowid, new.id, new.name, new.provider, new.catalog_group);
+END;
+CREATE TRIGGER IF NOT EXISTS models_ad AFTER DELETE ON models BEGIN
+    INSERT INTO models_fts(models_fts, rowid, id, name, provider, catalog_group)
+    VALUES ('delete', old.rowid, old.id, old.name, old.provider, old.catalog_group);
+END;
+CREATE TRIGGER IF NOT EXISTS models_au AFTER UPDATE OF id, name, provider, catalog_group ON models BEGIN
+    INSERT INTO models_fts(models_fts, rowid, id, name, provider, catalog_group)
+    VALUES ('delete', old.rowid, old.id, old.name, old.provider, old.catalog_group);
+    INSERT INTO models_fts(rowid, id, name, provider, catalog_group)
+    VALUES (new.rowid, new.id, new.name, new.provider, new.catalog_group);
+END;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Bumped when the search table or its triggers change; older indexes get
+# them dropped, recreated and rebuilt from the models table on open
+SCHEMA_VERSION = 1
+
+_DROP_FTS = """
+DROP TRIGGER IF EXISTS models_ai;
+DROP TRIGGER IF EXISTS models_ad;
+DROP TRIGGER IF EXISTS models_au;
+DROP TABLE IF EXISTS models_fts;
+"""
+
+_UPSERT = """
+INSERT INTO models (id, provider, name, context_length, prompt_price, completion_price,
+                    source, origin, catalog_group, digest)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    provider = excluded.provider, name = excluded.name,
+    context_length = excluded.context_length, prompt_price = excluded.prompt_price,
+    completion_price = excluded.completion_price, source = excluded.source,
+    origin = excluded.origin, catalog_group = excluded.catalog_group, digest = excluded.digest
+WHERE models.digest != excluded.digest OR models.origin != excluded.origin
+"""
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def model_source(model_id):
+    """Classify a models.json ID: direct, openrouter, manual or ollama"""
+    if model_id.startswith('openrouter/'):
+        return "openrouter"
+    if model_id.startswith('manual_'):
+        return "manual"
+    if model_id.startswith('ollama/'):
+        return "ollama"
+    return "direct"
+
+
+def model_provider(model_id):
+    """Return the organisation part of a model ID (anthropic for openrouter/anthropic/x)"""
+    parts = model_id.split('/')
+    if parts[0] in ('openrouter', 'ollama') and len(parts) > 2:
+        return parts[1]
+    if parts[0].startswith('manual_'):
+        parts[0] = parts[0][7:]
+    return parts[0] if len(parts) > 1 else ""
+
+
+def _price(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_dump(data):
+    """Turn a catalog dump into (origin, rows); rows are tuples in _UPSERT order minus origin/digest"""
+    if isinstance(data, dict) and isinstance(data.get("data"), list):
+        # OpenRouter API dump; ids are stored the way models.json writes them
+        origin = "openrouter"
+        entries = []
+        for entry in data["data"]:
+            if not isinstance(entry, dict) or not entry.get("id"):
+                continue
+            pricing = entry.get("pricing") or {}
+            entries.append({
+                "id": "openrouter/" + entry["id"],
+                "name": entry.get("name"),
+                "context_length": entry.get("context_length"),
+                "prompt_price": pricing.get("prompt"),
+                "completion_price": pricing.get("completion"),
+                "group": "OpenRouter"
+            })
+    else:
+        origin = "catalog"
+        entries = data.get("models", []) if isinstance(data, dict) else data
+
+    rows = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        model_id = str(entry.get("id", "")).strip()
+        if not model_id:
+            continue
+        rows[model_id] = (
+            model_id,
+            model_provider(model_id),
+            entry.get("name") or model_id,
+            _int(entry.get("context_length")),
+            _price(entry.get("prompt_price")),
+            _price(entry.get("completion_price")),
+            model_source(model_id),
+            entry.get("group")
+        )
+    return origin, list(rows.values())
+
+
+def _digest(row, origin):
+    return hashlib.sha1(json.dumps([origin, *row]).encode()).hexdigest()
+
+
+def match_query(text):
+    """Build an FTS5 prefix query from free text; every word must match"""
+    tokens = _TOKEN_RE.findall(text.lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+class CatalogIndex:
+    """Model catalog stored in SQLite with an FTS5 search table"""
+
+    def __init__(self, path=INDEX_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            self.db.executescript(_DROP_FTS)
+        self.db.executescript(SCHEMA)
+        if version < SCHEMA_VERSION:
+            with self.db:
+                self.db.execute("INSERT INTO models_fts(models_fts) VALUES ('rebuild')")
+                self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.db.close()
+
+    # Importing
+
+    def apply_dump(self, data, origin=None):
+        """Apply a parsed catalog dump; returns counts of added/updated/removed/unchanged rows"""
+        dump_origin, rows = parse_dump(data)
+        origin = origin or dump_origin
+
+        existing = dict(self.db.execute("SELECT id, digest FROM models WHERE origin = ?", (origin,)))
+        changed = []
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        for row in rows:
+            digest = _digest(row, origin)
+            old = existing.pop(row[0], None)
+            if old == digest:
+                stats["unchanged"] += 1
+                continue
+            stats["added" if old is None else "updated"] += 1
+            changed.append((*row[:7], origin, row[7], digest))
+
+        with self.db:
+            self.db.executemany(_UPSERT, changed)
+            # Rows this origin no longer lists
+            self.db.executemany("DELETE FROM models WHERE id = ? AND origin = ?",
+                                ((model_id, origin) for model_id in existing))
+        stats["removed"] = len(existing)
+        return stats
+
+    def import_file(self, path, origin=None):
+        """Import a catalog dump from a local JSON file"""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return self.apply_dump(data, origin)
+
+    def sync_catalog(self, path=CATALOG_JSON_PATH):
+        """Import the bundled catalog.json when it changed since the last sync"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamp = f"{st.st_mtime_ns}:{st.st_size}"
+        key = "stamp:" + os.path.abspath(path)
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row and row[0] == stamp:
+            return None
+        stats = self.import_file(path, origin="catalog")
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, stamp))
+        return stats
+
+    # Queries
+
+    def search(self, text, limit=None, ranked=True):
+        """Return IDs matching free text, best match first unless ranked is False"""
+        query = match_query(text)
+        if not query:
+            return []
+        sql = ("SELECT models.id FROM models_fts JOIN models ON models.rowid = models_fts.rowid "
+               "WHERE models_fts MATCH ?")
+        if ranked:
+            sql += " ORDER BY rank"
+        params = [query]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [row[0] for row in self.db.execute(sql, params)]
+
+    def models(self, sources=("direct", "openrouter")):
+        """Return (id, name, group) for every indexed model of the given sources"""
+        marks = ",".join("?" * len(sources))
+        sql = (f"SELECT id, name, COALESCE(catalog_group, provider) FROM models "
+               f"WHERE source IN ({marks}) ORDER BY origin = 'catalog' DESC, rowid")
+        return self.db.execute(sql, sources).fetchall()
+
+    def enabled_ids(self):
+        """Return the set of IDs marked enabled"""
+        return {row[0] for row in self.db.execute("SELECT id FROM models WHERE enabled = 1")}
+
+    def set_enabled(self, model_ids):
+        """Mark exactly model_ids as enabled"""
+        model_ids = set(model_ids)
+        current = self.enabled_ids()
+        with self.db:
+            self.db.executemany("UPDATE models SET enabled = 0 WHERE id = ?",
+                                ((model_id,) for model_id in current - model_ids))
+            self.db.executemany("UPDATE models SET enabled = 1 WHERE id = ?",
+                                ((model_id,) for model_id in model_ids - current))
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM models").fetchone()[0]
+
+
+def open_index(path=INDEX_PATH):
+    """Open the catalog index, or return None if SQLite/FTS5 isn't usable"""
+    try:
+        index = CatalogIndex(path)
+        index.sync_catalog()
+        return index
+    except Exception as e:
+        print(f"Catalog index unavailable: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("import", "search", "stats"):
+        print(__doc__.strip().split("\n\n")[-1])
+        sys.exit(1)
+
+    index = CatalogIndex()
+    command = sys.argv[1]
+    if command == "import" and len(sys.argv) >= 3:
+        origin = sys.argv[sys.argv.index("--origin") + 1] if "--origin" in sys.argv else None
+        stats = index.import_file(sys.argv[2], origin)
+        print(", ".join(f"{key}: {value}" for key, value in stats.items()))
+    elif command == "search" and len(sys.argv) >= 3:
+        for model_id in index.search(" ".join(sys.argv[2:]), limit=50):
+            print(model_id)
+    elif command == "stats":
+        index.sync_catalog()
+        print(f"{index.count()} models, {len(index.enabled_ids())} enabled ({index.path})")
+    else:
+        print(__doc__.strip().split("\n\n")[-1])
+        sys.exit(1)
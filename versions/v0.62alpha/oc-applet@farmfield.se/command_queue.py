@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Coalescing command queue for the settings dialog.
+Session patches are collected while the user edits and run on a worker
+thread when the dialog flushes the queue on Save. A newer patch for a
+session replaces the pending one, and what remains runs in submission
+order. Results come back on the GTK main loop.
+"""
+import threading
+import time
+
+
+def _idle_add(func, *args):
+    from gi.repository import GLib
+    GLib.idle_add(func, *args)
+
+
+def _switch_session(session_key, model):
+    # Imported on first use so opening the dialog doesn't pay for it
+    from switch_model import expand_sessions, switch_many
+    results = switch_many(expand_sessions([session_key]), model)
+    failed = [key for key, path, _ in results if not path]
+    if failed or not results:
+        raise RuntimeError(f"switch failed for {' '.join(failed) or session_key}, see switch_model.py --stats")
+    return ", ".join(path for _, path, _ in results)
+
+
+class CommandQueue:
+    """Pending commands keyed so that redundant ones collapse before running"""
+
+    def __init__(self, dispatch=_idle_add, switch=_switch_session):
+        self.dispatch = dispatch
+        self.switch = switch
+        self._pending = {}  # key -> (label, func); dict order is run order
+        self._callbacks = []
+        self._running = False
+        self._lock = threading.Lock()
+
+    def patch_session(self, session_key, model):
+        """Queue a model switch; replaces any pending switch of the same session"""
+        key = ("patch", session_key)
+        with self._lock:
+            # Re-insert so the surviving patch runs in the position of the latest request
+            self._pending.pop(key, None)
+            self._pending[key] = (f"{session_key} -> {model}",
+                                  lambda: self.switch(session_key, model))
+
+    def pending(self):
+        """Labels of the commands that would run, in order"""
+        with self._lock:
+            return [label for label, _ in self._pending.values()]
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+
+    def flush(self, callback=None):
+        """Run everything pending off the main loop; callback(results) gets one list per flush"""
+        with self._lock:
+            if callback:
+                self._callbacks.append(callback)
+            if self._running:
+                # The running worker picks up new work before it reports
+                return
+            self._running = True
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def _worker(self):
+        results = []
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    callbacks, self._callbacks = self._callbacks, []
+                    break
+                key = next(iter(self._pending))
+                label, func = self._pending.pop(key)
+
+            start = time.perf_counter()
+            try:
+                detail, ok = func() or "", True
+            except Exception as e:
+                detail, ok = str(e), False
+            results.append({"command": label, "ok": ok, "detail": detail,
+                            "ms": round((time.perf_counter() - start) * 1000, 1)})
+
+        for callback in callbacks:
+            self._deliver(callback, results)
+
+    def _deliver(self, callback, results):
+        def run():
+            callback(results)
+            return False
+        self.dispatch(run)
+
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Config store for OC-Applet settings.
+Parses menu.json and models.json once and keeps them in memory, so every
+settings tab edits the same documents. Save writes each changed file once,
+atomically (temp file + fsync + rename), and refuses to overwrite a file
+that was changed on disk after it was loaded or that could not be parsed.
+"""
+import json
+import os
+
+from model_registry import ModelRegistry
+
+APPLET_DIR = os.path.expanduser("~/.local/share/cinnamon/applets/oc-applet@farmfield.se")
+MENU_JSON_PATH = os.path.join(APPLET_DIR, "menu.json")
+MODELS_JSON_PATH = os.path.join(APPLET_DIR, "models.json")
+
+
+class ConfigConflictError(Exception):
+    """A config file was changed on disk after the store loaded it"""
+
+
+class ConfigUnreadableError(ConfigConflictError):
+    """A config file on disk is not valid JSON of the expected type"""
+
+
+def atomic_write_json(path, data):
+    """Write JSON to path via a temp file, fsync and rename"""
+    _atomic_replace(path, 'w', lambda f: json.dump(data, f, indent=4))
+
+
+def atomic_write(path, data):
+    """Write bytes to path the same way"""
+    _atomic_replace(path, 'wb', lambda f: f.write(data))
+
+
+def _atomic_replace(path, mode, write):
+    # tempfile pulls in random and shutil; only writers pay for it
+    import tempfile
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    try:
+        file_mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        file_mode = 0o644
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, file_mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # Make the rename itself durable
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass
+
+
+def _stamp(st):
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _disk_stamp(path):
+    try:
+        return _stamp(os.stat(path))
+    except FileNotFoundError:
+        return None
+
+
+class ConfigStore:
+    """Shared in-memory copy of menu.json and models.json"""
+
+    MENU = "menu"
+    MODELS = "models"
+
+    def __init__(self, menu_path=MENU_JSON_PATH, models_path=MODELS_JSON_PATH):
+        self.paths = {self.MENU: menu_path, self.MODELS: models_path}
+        self.menu = {}
+        self.models = []
+        self._registry = None
+        self._stamps = {}
+        self._unreadable = {}
+        self._dirty = {self.MENU: set(), self.MODELS: set()}
+        self.load()
+
+    def load(self):
+        """(Re)read both files from disk, dropping unsaved edits"""
+        self.menu = self._read(self.MENU, dict)
+        self.models = self._read(self.MODELS, list)
+        self._registry = None
+        self._dirty = {self.MENU: set(), self.MODELS: set()}
+
+    def _read(self, name, doc_type):
+        path = self.paths[name]
+        # The stamp is only recorded once the file parsed, so a broken file is
+        # never taken as the version an in-memory edit may replace
+        self._stamps.pop(name, None)
+        self._unreadable.pop(name, None)
+        try:
+            with open(path, 'r') as f:
+                stamp = _stamp(os.fstat(f.fileno()))
+                data = json.load(f)
+        except FileNotFoundError:
+            self._stamps[name] = None
+            return doc_type()
+        except Exception as e:
+            self._unreadable[name] = str(e)
+            print(f"Error loading {path}: {e}")
+            return doc_type()
+
+        if not isinstance(data, doc_type):
+            self._unreadable[name] = f"expected a JSON {doc_type.__name__}"
+            print(f"Error loading {path}: expected a JSON {doc_type.__name__}")
+            return doc_type()
+        self._stamps[name] = stamp
+        return data
+
+    # menu.json
+
+    def menu_section(self, key, default=None):
+        """Return one top-level menu.json section"""
+        return self.menu.get(key, default)
+
+    def set_menu_section(self, key, value):
+        """Replace a menu.json section, marking it dirty if it changed"""
+        if key in self.menu and self.menu[key] == value:
+            return
+        self.menu[key] = value
+        self._dirty[self.MENU].add(key)
+
+    def remove_menu_section(self, key):
+        """Drop a menu.json section if present"""
+        if key in self.menu:
+            del self.menu[key]
+            self._dirty[self.MENU].add(key)
+
+    # models.json
+
+    @property
+    def registry(self):
+        """ModelRegistry of models.json, built on first use after a load"""
+        if self._registry is None:
+            self._registry = ModelRegistry(self.models)
+        return self._registry
+
+    def model_entries(self, section):
+        """Return the models.json entries that belong to a section"""
+        return self.registry.entries(section)
+
+    def set_model_entries(self, section, entries):
+        """Replace one section of models.json, keeping the other sections"""
+        entries = list(entries)
+        if self.model_entries(section) == entries:
+            return
+        self.registry.replace(section, entries)
+        self.models = [record.entry for record in self.registry.records]
+        self._dirty[self.MODELS].add(section)
+
+    # Saving
+
+    def dirty_sections(self, name):
+        """Return the sections of a file edited since the last load/save"""
+        return set(self._dirty[name])
+
+    def is_dirty(self):
+        return any(self._dirty.values())
+
+    def check_conflicts(self):
+        """Raise ConfigConflictError if a dirty file changed on disk"""
+        for name, sections in self._dirty.items():
+            if sections and _disk_stamp(self.paths[name]) != self._stamps.get(name):
+                raise ConfigConflictError(f"{self.paths[name]} was changed by another program")
+
+    def check_readable(self):
+        """Raise ConfigUnreadableError if a dirty file failed to load"""
+        for name, sections in self._dirty.items():
+            if sections and name in self._unreadable:
+                raise ConfigUnreadableError(
+                    f"{self.paths[name]} could not be read ({self._unreadable[name]}); fix or remove it first")
+
+    def save(self, force=False):
+        """Write each changed file once; returns the paths written
+
+        force skips the conflict check, never the readability check: saving
+        over a file that failed to load would replace it with an empty document.
+        """
+        self.check_readable()
+        if not force:
+            self.check_conflicts()
+
+        written = []
+        for name, data in ((self.MENU, self.menu), (self.MODELS, self.models)):
+            if not self._dirty[name]:
+                continue
+            path = self.paths[name]
+            atomic_write_json(path, data)
+            self._stamps[name] = _disk_stamp(path)
+            self._dirty[name].clear()
+            written.append(path)
+        return written
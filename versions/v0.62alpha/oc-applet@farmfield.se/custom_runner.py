@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Runner for the custom menu items (custom_1..custom_3 in menu.json).
+A resident process on a Unix socket starts each item's command in its own
+process group at lowered priority, so whole job trees can be signalled and
+a heavy script can't starve the desktop. Per item it is single-flight: a
+second click while the item is queued or running attaches to that job
+instead of starting a copy. At most MAX_JOBS items run at once, the rest
+wait their turn. An item that runs past its timeout (menu.json "timeout",
+else DEFAULT_TIMEOUT seconds) gets SIGTERM, then SIGKILL after
+KILL_GRACE.
+
+Output (stdout and stderr) is streamed into ~/.cache/oc-applet/custom/<item>.log,
+rotated to <item>.log.1 beyond LOG_MAX bytes, and to any client following
+the job. Failures and timeouts raise a desktop notification.
+
+Usage: custom_runner.py run <item> [--follow]
+       custom_runner.py status
+       custom_runner.py cancel <item>
+       custom_runner.py log <item> [N]
+       custom_runner.py serve            run the runner (one per user)
+"""
+import collections
+import fcntl
+import json
+import os
+import selectors
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from config_store import MENU_JSON_PATH
+from runtime import CACHE_DIR, RUNTIME_DIR, exit_fd, exit_reason
+
+SOCKET_PATH = os.path.join(RUNTIME_DIR, "custom-runner.sock")
+LOCK_PATH = os.path.join(RUNTIME_DIR, "custom-runner.lock")
+LOG_DIR = os.path.join(CACHE_DIR, "custom")
+
+MAX_JOBS = 2  # items running at once
+DEFAULT_TIMEOUT = 600  # seconds
+KILL_GRACE = 5.0  # seconds between SIGTERM and SIGKILL
+LOG_MAX = 256 * 1024  # bytes per log file before it rotates
+NICE = 10  # added to the command's niceness
+IDLE_TIMEOUT = 600.0  # seconds without jobs or requests before the runner exits
+CLIENT_TIMEOUT = 2.0  # seconds for one socket request
+
+QUEUED, RUNNING = "queued", "running"
+
+
+def _lower_priority():
+    # Runs in the child between fork and exec
+    os.nice(NICE)
+
+
+def _notify(summary, body):
+    if shutil.which("notify-send"):
+        subprocess.Popen(["notify-send", "-a", "OC-Applet", summary, body], stdin=subprocess.DEVNULL,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class Job:
+    """One run of a custom item, queued or running"""
+
+    def __init__(self, key, command, timeout):
+        self.key = key
+        self.command = command
+        self.timeout = timeout
+        self.state = QUEUED
+        self.process = None
+        self.queued = time.time()
+        self.started = None
+        self.deadline = None  # monotonic time of the timeout
+        self.kill_at = None
+        self.timed_out = False
+        self.log = None
+        self.followers = []
+
+    def info(self):
+        return {"item": self.key, "state": self.state, "command": self.command, "timeout": self.timeout,
+                "pid": self.process.pid if self.process else None,
+                "runtime": round(time.time() - self.started, 1) if self.started else None}
+
+
+class CustomRunner:
+    """Event loop over the jobs' pidfds and pipes, the command socket and timers"""
+
+    def __init__(self, socket_path=SOCKET_PATH, log_dir=LOG_DIR, max_jobs=MAX_JOBS):
+        self.socket_path = socket_path
+        self.log_dir = log_dir
+        self.max_jobs = max_jobs
+        self.selector = selectors.DefaultSelector()
+        self.jobs = {}  # item -> Job, queued or running
+        self.queue = collections.deque()
+        self.last = {}  # item -> summary of its last finished run
+        self.last_activity = time.monotonic()
+        self.exiting = False
+        # Written to by signal.set_wakeup_fd so signal handlers take effect during select()
+        self.wakeup_read, self.wakeup_write = os.pipe()
+        os.set_blocking(self.wakeup_read, False)
+        os.set_blocking(self.wakeup_write, False)
+        self.selector.register(self.wakeup_read, selectors.EVENT_READ, ("wakeup", None))
+
+    # Jobs
+
+    def run(self, key, command, timeout):
+        """Queue a run of key; returns (job, attached) where attached means it was already queued or running"""
+        if key in self.jobs:
+            return self.jobs[key], True
+        job = Job(key, command, timeout)
+        self.jobs[key] = job
+        self.queue.append(job)
+        self._start_queued()
+        return job, False
+
+    def cancel(self, key):
+        job = self.jobs.get(key)
+        if job is None:
+            return False
+        if job.state == QUEUED:
+            self.queue.remove(job)
+            del self.jobs[key]
+            self._finish_followers(job, {"exit": "cancelled", "ok": False})
+        elif job.kill_at is None:
+            self._signal(job, signal.SIGTERM)
+            job.kill_at = time.monotonic() + KILL_GRACE
+        return True
+
+    def _running(self):
+        return sum(1 for job in self.jobs.values() if job.state == RUNNING)
+
+    def _start_queued(self):
+        while self.queue and self._running() < self.max_jobs:
+            self._spawn(self.queue.popleft())
+
+    def _log_path(self, key):
+        return os.path.join(self.log_dir, f"{key}.log")
+
+    def _open_log(self, job):
+        os.makedirs(self.log_dir, exist_ok=True)
+        path = self._log_path(job.key)
+        try:
+            if os.path.getsize(path) >= LOG_MAX:
+                os.replace(path, path + ".1")
+        except FileNotFoundError:
+            pass
+        job.log = open(path, 'ab')
+
+    def _write_log(self, job, data):
+        job.log.write(data)
+        job.log.flush()
+        if job.log.tell() >= LOG_MAX:
+            job.log.close()
+            self._open_log(job)
+
+    def _spawn(self, job):
+        self._open_log(job)
+        self._write_log(job, f"=== {time.strftime('%Y-%m-%d %H:%M:%S')} {job.command}\n".encode())
+        try:
+            job.process = subprocess.Popen(["bash", "-c", job.command], stdin=subprocess.DEVNULL,
+                                           stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                           start_new_session=True, preexec_fn=_lower_priority)
+        except OSError as e:
+            self._finish(job, f"not started: {e}")
+            return
+        job.state = RUNNING
+        job.started = time.time()
+        job.deadline = time.monotonic() + job.timeout
+        os.set_blocking(job.process.stdout.fileno(), False)
+        self.selector.register(job.process.stdout, selectors.EVENT_READ, ("output", job))
+        self.selector.register(exit_fd(job.process.pid), selectors.EVENT_READ, ("exit", job))
+
+    def _on_output(self, job):
+        pipe = job.process.stdout if job.process else None
+        if pipe is None or pipe.closed:
+            return
+        try:
+            while True:
+                data = os.read(pipe.fileno(), 65536)
+                if not data:
+                    break
+                self._write_log(job, data)
+                self._send_followers(job, {"output": data.decode(errors="replace")})
+        except BlockingIOError:
+            return
+        self.selector.unregister(pipe)
+        pipe.close()
+
+    def _on_exit(self, fd, job):
+        self.selector.unregister(fd)
+        os.close(fd)
+        _, status = os.waitpid(job.process.pid, 0)
+        job.process.returncode = os.waitstatus_to_exitcode(status)
+        self._on_output(job)
+        reason = exit_reason(status)
+        if job.timed_out:
+            reason = f"timed out, {reason}"
+        self._finish(job, reason)
+
+    def _finish(self, job, reason):
+        runtime = round(time.time() - job.started, 1) if job.started else 0.0
+        self._write_log(job, f"=== {reason} after {runtime}s\n".encode())
+        job.log.close()
+        if job.process and job.process.stdout and not job.process.stdout.closed:
+            # Something in the job's group still holds the pipe; stop reading it
+            self.selector.unregister(job.process.stdout)
+            job.process.stdout.close()
+        ok = job.process is not None and job.process.returncode == 0
+        self.last[job.key] = {"item": job.key, "ok": ok, "reason": reason, "runtime": runtime,
+                              "finished": round(time.time(), 3)}
+        del self.jobs[job.key]
+        self._finish_followers(job, {"exit": reason, "ok": ok})
+        if not ok:
+            _notify(f"Custom item {job.key} failed", f"{reason}\nLog: {self._log_path(job.key)}")
+        self._start_queued()
+
+    def _signal(self, job, signum):
+        try:
+            os.killpg(job.process.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    # Followers
+
+    def _send_followers(self, job, message):
+        data = json.dumps(message).encode() + b"\n"
+        for conn in list(job.followers):
+            try:
+                conn.sendall(data)
+            except OSError:
+                # Gone, or not reading fast enough: never let a client stall the loop
+                job.followers.remove(conn)
+                conn.close()
+
+    def _finish_followers(self, job, message):
+        self._send_followers(job, message)
+        for conn in job.followers:
+            conn.close()
+        job.followers = []
+
+    # Commands
+
+    def handle(self, request, conn):
+        """Reply to one request; returns True when conn was kept to follow a job"""
+        command = request.get("command")
+        if command == "run":
+            timeout = request.get("timeout") or DEFAULT_TIMEOUT
+            job, attached = self.run(request["item"], request["cmd"], float(timeout))
+            reply = dict(job.info(), ok=True, attached=attached)
+            conn.sendall(json.dumps(reply).encode() + b"\n")
+            if request.get("follow") and job.key in self.jobs:
+                conn.setblocking(False)
+                job.followers.append(conn)
+                return True
+            return False
+        if command == "status":
+            reply = {"ok": True, "jobs": [job.info() for job in self.jobs.values()],
+                     "last": list(self.last.values()), "max_jobs": self.max_jobs}
+        elif command == "cancel":
+            reply = {"ok": self.cancel(request.get("item"))}
+        else:
+            reply = {"ok": False, "error": f"unknown command {command}"}
+        conn.sendall(json.dumps(reply).encode() + b"\n")
+        return False
+
+    def _on_client(self, server):
+        conn, _ = server.accept()
+        self.last_activity = time.monotonic()
+        kept = False
+        try:
+            conn.settimeout(CLIENT_TIMEOUT)
+            line = conn.makefile('rb').readline()
+            kept = self.handle(json.loads(line or b"{}"), conn)
+        except (OSError, ValueError, KeyError) as e:
+            try:
+                conn.sendall(json.dumps({"ok": False, "error": str(e)}).encode() + b"\n")
+            except OSError:
+                pass
+        finally:
+            if not kept:
+                conn.close()
+
+    # Loop
+
+    def _timeout(self):
+        deadlines = []
+        for job in self.jobs.values():
+            deadlines += [t for t in (job.deadline, job.kill_at) if t is not None]
+        if not self.jobs:
+            deadlines.append(self.last_activity + IDLE_TIMEOUT)
+        return max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+
+    def _on_timers(self):
+        now = time.monotonic()
+        for job in list(self.jobs.values()):
+            if job.state != RUNNING:
+                continue
+            if job.deadline is not None and now >= job.deadline:
+                job.deadline = None
+                job.timed_out = True
+                self._signal(job, signal.SIGTERM)
+                job.kill_at = now + KILL_GRACE
+            elif job.kill_at is not None and now >= job.kill_at:
+                job.kill_at = None
+                self._signal(job, signal.SIGKILL)
+        if not self.jobs and now - self.last_activity >= IDLE_TIMEOUT:
+            self.exiting = True
+
+    def serve(self):
+        os.makedirs(os.path.dirname(self.socket_path), mode=0o700, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        server.listen()
+        self.selector.register(server, selectors.EVENT_READ, ("socket", None))
+        try:
+            while not (self.exiting and not self.jobs):
+                for key, _ in self.selector.select(self._timeout()):
+                    kind, detail = key.data
+                    if kind == "wakeup":
+                        os.read(self.wakeup_read, 512)
+                    elif kind == "socket":
+                        self._on_client(server)
+                    elif kind == "output":
+                        self._on_output(detail)
+                    elif kind == "exit":
+                        self._on_exit(key.fd, detail)
+                self._on_timers()
+        finally:
+            server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+# Client side
+
+def item_settings(key, menu_path=MENU_JSON_PATH):
+    """(command, timeout) of a custom item from menu.json; ValueError if it has no command"""
+    try:
+        with open(menu_path, 'r') as f:
+            item = json.load(f).get(key) or {}
+    except (OSError, ValueError):
+        item = {}
+    command = (item.get("command") or "").strip() if isinstance(item, dict) else ""
+    if not command:
+        raise ValueError(f"{key} has no command in {menu_path}")
+    return command, item.get("timeout") or DEFAULT_TIMEOUT
+
+
+def connect(request, socket_path=SOCKET_PATH):
+    """Send one request; returns the open socket's reader. Raises OSError if no runner is running"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CLIENT_TIMEOUT)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def request(command, socket_path=SOCKET_PATH, **params):
+    with connect(dict(params, command=command), socket_path) as sock:
+        return json.loads(sock.makefile('rb').readline() or b"{}")
+
+
+def launch():
+    """Start a runner in the background and wait for its socket"""
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve"], stdin=subprocess.DEVNULL,
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + CLIENT_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            return request("status")
+        except OSError:
+            time.sleep(0.05)
+    raise OSError("custom runner did not start")
+
+
+def run_item(key, follow=False):
+    """Run (or attach to) a custom item; with follow, print its output until it ends"""
+    command, timeout = item_settings(key)
+    message = {"command": "run", "item": key, "cmd": command, "timeout": timeout, "follow": follow}
+    try:
+        sock = connect(message)
+    except OSError:
+        launch()
+        sock = connect(message)
+    with sock:
+        reader = sock.makefile('rb')
+        reply = json.loads(reader.readline() or b"{}")
+        if not follow:
+            return reply
+        sock.settimeout(None)
+        for line in reader:
+            event = json.loads(line)
+            if "output" in event:
+                sys.stdout.write(event["output"])
+                sys.stdout.flush()
+            else:
+                reply.update(event)
+        return reply
+
+
+def serve():
+    """Run the runner unless another one holds the lock"""
+    os.makedirs(RUNTIME_DIR, mode=0o700, exist_ok=True)
+    lock = open(LOCK_PATH, 'w')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return
+    runner = CustomRunner()
+
+    def stop(signum, frame):
+        for key in list(runner.jobs):
+            runner.cancel(key)
+        runner.exiting = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.set_wakeup_fd(runner.wakeup_write)
+    runner.serve()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    action = args[0] if args else None
+    if action == "serve":
+        serve()
+    elif action == "run" and len(args) >= 2:
+        try:
+            reply = run_item(args[1], follow="--follow" in args[2:])
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if "--follow" in args[2:]:
+            print(f"\n{args[1]}: {reply.get('exit', 'ended')}")
+            sys.exit(0 if reply.get("ok") else 1)
+        print(f"{args[1]}: {'attached to' if reply.get('attached') else 'started'} ({reply.get('state')})")
+    elif action == "status":
+        try:
+            print(json.dumps(request("status"), indent=4))
+        except OSError:
+            print("Custom runner is not running")
+    elif action == "cancel" and len(args) == 2:
+        try:
+            sys.exit(0 if request("cancel", item=args[1]).get("ok") else 1)
+        except OSError:
+            sys.exit(1)
+    elif action == "log" and len(args) >= 2:
+        try:
+            with open(os.path.join(LOG_DIR, f"{args[1]}.log"), 'r', errors="replace") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            lines = []
+        sys.stdout.writelines(lines[-int(args[2]):] if len(args) > 2 else lines)
+    else:
+        print(__doc__.strip().split("\n\n")[-1], file=sys.stderr)
+        sys.exit(1)
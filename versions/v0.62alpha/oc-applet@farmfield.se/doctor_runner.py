@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Headless runner for `openclaw doctor --fix`.
+Runs the doctor without a terminal, reads its output line by line and turns
+it into findings (severity, component, message, fixed or not), published to
+~/.cache/oc-applet/doctor.json as they come in. A result is keyed on the
+`openclaw --version` output plus a SHA-256 of ~/.openclaw/openclaw.json: a
+check with neither changed returns the stored result without running the
+CLI at all (the version is only asked again when the openclaw binary's
+mtime/size changes). One doctor run at a time; a second check waits for it
+and takes its result. The applet shows the outcome as a health badge on the
+OC Doctor item and in the panel tooltip.
+
+Usage: doctor_runner.py [check] [--force] [--notify] [--json]
+       doctor_runner.py status              print the stored result, even if outdated
+"""
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import time
+
+from config_store import atomic_write_json
+from openclaw_json import OPENCLAW_JSON_PATH
+from runtime import CACHE_DIR, file_stamp, openclaw_bin
+
+RESULT_PATH = os.path.join(CACHE_DIR, "doctor.json")
+LOG_PATH = os.path.join(CACHE_DIR, "doctor.log")
+LOCK_PATH = os.path.join(CACHE_DIR, "doctor.lock")
+
+RESULT_VERSION = 1
+DOCTOR_ARGS = ["doctor", "--fix"]
+DOCTOR_TIMEOUT = 300  # seconds before the doctor's process group is killed
+VERSION_TIMEOUT = 30  # seconds for `openclaw --version`
+KILL_GRACE = 5.0  # seconds between SIGTERM and SIGKILL
+
+SEVERITIES = ("error", "warning", "ok", "info")
+
+ANSI = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]|\x1b\][^\x07]*\x07")
+# Gutter of the CLI's boxed prompts (│ ◇ ┌ └ ...) and list bullets
+GUTTER = re.compile(r"^[\s│┃|┌┐└┘├┤─━╭╮╰╯◇◆◒◐◓◑●○•*\-]+")
+MARKERS = (
+    (re.compile(r"^(?:✗|✖|✘|×|❌)\s*|^(?:error|fail(?:ed)?|fatal)\b[:\s]*", re.I), "error"),
+    (re.compile(r"^(?:⚠️?|▲|!)\s*|^(?:warn(?:ing)?)\b[:\s]*", re.I), "warning"),
+    (re.compile(r"^(?:✓|✔|✅)\s*|^(?:ok|pass(?:ed)?)\b[:\s]*", re.I), "ok"),
+)
+FIXED = re.compile(r"\b(?:fixed|repaired|migrated|restored)\b|\(fix(?:ed)?\)|\[fix(?:ed)?\]", re.I)
+# "Component: message", a short label before the colon
+COMPONENT = re.compile(r"^([A-Za-z][\w .\-/]{0,30}?):\s+(.+)$")
+
+
+def config_hash(path=OPENCLAW_JSON_PATH):
+    """SHA-256 of openclaw.json, or "" when it is missing"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return ""
+
+
+def openclaw_version(binary, stored=None):
+    """`openclaw --version` output; reuses stored {"bin", "stamp", "version"} while the binary is unchanged"""
+    # npm installs a symlink; the stamp of its target changes on upgrade
+    stamp = file_stamp(os.path.realpath(binary))
+    if stored and stored.get("bin") == binary and stamp and stored.get("stamp") == stamp:
+        return stored["version"], stored
+    try:
+        result = subprocess.run([binary, "--version"], stdin=subprocess.DEVNULL, capture_output=True,
+                                text=True, timeout=VERSION_TIMEOUT)
+        version = result.stdout.strip() or result.stderr.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        version = ""
+    return version, {"bin": binary, "stamp": stamp, "version": version}
+
+
+def cache_key(version, digest):
+    return hashlib.sha256(f"{version}\0{digest}".encode()).hexdigest()
+
+
+def parse_line(line, section=None):
+    """(finding or None, section) for one output line
+
+    A line with a status marker (✓/⚠/✗ or ok/warning/error) is a finding of
+    the current section, else of the "Component:" label that starts it; a bare
+    line ending in ":" or boxed as a prompt title starts a new section.
+    """
+    text = ANSI.sub("", line).rstrip()
+    boxed = text.lstrip().startswith(("◇", "◆", "┌"))
+    text = GUTTER.sub("", text).strip().rstrip("─━╮╯ ").strip()
+    if not text:
+        return None, section
+
+    for pattern, severity in MARKERS:
+        match = pattern.match(text)
+        if match:
+            message = text[match.end():].strip()
+            break
+    else:
+        if boxed or (text.endswith(":") and len(text) <= 40):
+            return None, text.rstrip(":").strip()
+        if not FIXED.search(text):
+            return None, section
+        # "Fixed ..." lines without a marker still report a repair
+        severity, message = "info", text
+
+    component = section
+    label = COMPONENT.match(message)
+    if label and section is None:
+        component, message = label.group(1).strip(), label.group(2).strip()
+    finding = {"severity": severity, "component": component or "general", "message": message or text,
+               "fixed": bool(FIXED.search(message))}
+    return finding, section
+
+
+def summarize(findings, exit_code):
+    """{"health", "counts"} of a finished run: the worst severity that wasn't fixed"""
+    counts = {severity: 0 for severity in SEVERITIES}
+    counts["fixed"] = 0
+    unfixed = set()
+    for finding in findings:
+        counts[finding["severity"]] += 1
+        if finding["fixed"]:
+            counts["fixed"] += 1
+        else:
+            unfixed.add(finding["severity"])
+    health = "error" if "error" in unfixed or exit_code else "warning" if "warning" in unfixed else "ok"
+    return {"health": health, "counts": counts}
+
+
+def read(path=RESULT_PATH):
+    """Stored result dict, or None"""
+    try:
+        with open(path, 'r') as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(result, dict) or result.get("version") != RESULT_VERSION:
+        return None
+    return result
+
+
+def _kill(process):
+    for signum, wait in ((signal.SIGTERM, KILL_GRACE), (signal.SIGKILL, None)):
+        try:
+            os.killpg(process.pid, signum)
+        except ProcessLookupError:
+            return
+        try:
+            process.wait(wait)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+class _Watchdog:
+    """Kills the doctor's process group at the deadline"""
+
+    def __init__(self, process, deadline):
+        # Imported on first use: a cached check never starts a run
+        import threading
+        self.fired = False
+        self._timer = threading.Timer(max(0.0, deadline - time.monotonic()), self._fire, (process,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _fire(self, process):
+        self.fired = True
+        _kill(process)
+
+    def cancel(self):
+        """Stop the timer; True when it had already fired"""
+        self._timer.cancel()
+        return self.fired
+
+
+def run_doctor(binary, result, path=RESULT_PATH, log_path=LOG_PATH, echo=None):
+    """Run the doctor, publishing result with the findings so far after each one; returns the result"""
+    findings = result["findings"] = []
+    result.update({"state": "running", "started": time.time()})
+    atomic_write_json(path, result)
+
+    section = None
+    timed_out = False
+    deadline = time.monotonic() + DOCTOR_TIMEOUT
+    with open(log_path, 'w') as log:
+        try:
+            # No terminal and no stdin: the doctor can't stop at a prompt
+            process = subprocess.Popen([binary] + DOCTOR_ARGS, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, text=True, errors="replace", bufsize=1,
+                                       start_new_session=True, env=dict(os.environ, NO_COLOR="1"))
+        except OSError as e:
+            findings.append({"severity": "error", "component": "openclaw", "message": str(e), "fixed": False})
+            exit_code = 127
+        else:
+            # Enforced from a timer, a quiet doctor doesn't wake the read loop
+            watchdog = _Watchdog(process, deadline)
+            for line in process.stdout:
+                log.write(line)
+                if echo:
+                    echo(line)
+                finding, section = parse_line(line, section)
+                if finding:
+                    findings.append(finding)
+                    atomic_write_json(path, result)
+            exit_code = process.wait()
+            timed_out = watchdog.cancel()
+
+    if timed_out:
+        findings.append({"severity": "error", "component": "openclaw",
+                         "message": f"doctor timed out after {DOCTOR_TIMEOUT}s", "fixed": False})
+    result.update(summarize(findings, exit_code))
+    result.update({"state": "done", "exit": exit_code, "finished": time.time()})
+    return result
+
+
+def check(force=False, path=RESULT_PATH, lock_path=LOCK_PATH, echo=None):
+    """Result for the current version and config: the stored one when the key matches, else a new run"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(lock_path, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        stored = read(path)
+        binary = openclaw_bin()
+        version, version_info = openclaw_version(binary, stored and stored.get("openclaw"))
+        digest = config_hash()
+        key = cache_key(version, digest)
+        if not force and stored and stored.get("state") == "done" and stored.get("key") == key:
+            stored["cached"] = True
+            return stored
+
+        result = {"version": RESULT_VERSION, "key": key, "openclaw": version_info, "config": digest}
+        result = run_doctor(binary, result, path, echo=echo)
+        # --fix may rewrite openclaw.json; the repaired config is what an unchanged recheck sees
+        result["config"] = config_hash()
+        result["key"] = cache_key(version, result["config"])
+        atomic_write_json(path, result)
+        result["cached"] = False
+        return result
+
+
+def describe(result):
+    """One-line summary: health and counts"""
+    counts = result.get("counts") or {}
+    parts = [f"{counts[name]} {name}{'s' if counts[name] != 1 and name != 'fixed' else ''}"
+             for name in ("error", "warning", "fixed") if counts.get(name)]
+    return f"{result.get('health', 'unknown')}" + (f" ({', '.join(parts)})" if parts else "")
+
+
+def _print(result, as_json=False):
+    if as_json:
+        print(json.dumps(result, indent=4))
+        return
+    for finding in result.get("findings", []):
+        if finding["severity"] != "ok":
+            fixed = " [fixed]" if finding["fixed"] else ""
+            print(f"{finding['severity']:<8} {finding['component']}: {finding['message']}{fixed}")
+    cached = " (cached)" if result.get("cached") else ""
+    print(f"Doctor: {describe(result)}{cached}, openclaw {result.get('openclaw', {}).get('version') or '?'}")
+
+
+def _notify(result):
+    if shutil.which("notify-send"):
+        subprocess.Popen(["notify-send", "-a", "OC-Applet", f"OC Doctor: {describe(result)}",
+                          f"Log: {LOG_PATH}"], stdin=subprocess.DEVNULL,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    command = args.pop(0) if args and not args[0].startswith("--") else "check"
+    flags = set(args)
+    if command == "check" and flags <= {"--force", "--notify", "--json"}:
+        result = check(force="--force" in flags,
+                       echo=None if "--json" in flags or not sys.stdout.isatty() else sys.stdout.write)
+        _print(result, "--json" in flags)
+        if "--notify" in flags:
+            _notify(result)
+        sys.exit(0 if result["health"] != "error" else 1)
+    elif command == "status" and flags <= {"--json"}:
+        result = read()
+        if result is None:
+            print("No doctor result yet", file=sys.stderr)
+            sys.exit(1)
+        _print(result, "--json" in flags)
+    else:
+        print(__doc__.strip().split("\n\n")[-1], file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Minimal client for the local OpenClaw gateway (ws://127.0.0.1:18789).
+Speaks just enough WebSocket to exchange the gateway's JSON frames:
+a connect request with the gateway token, then request/response pairs
+matched by id. Events the gateway pushes in between are skipped.
+Standard library only, so it runs under the applet's system python3.
+"""
+import base64
+import itertools
+import json
+import os
+import socket
+import struct
+
+import openclaw_json
+from openclaw_json import OPENCLAW_JSON_PATH
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 18789
+CONNECT_TIMEOUT = 2.0  # seconds
+REQUEST_TIMEOUT = 5.0  # seconds
+PROTOCOL_VERSION = 3
+CLIENT_ID = "oc-applet"
+
+_OP_TEXT, _OP_CLOSE, _OP_PING, _OP_PONG = 0x1, 0x8, 0x9, 0xA
+
+
+class GatewayError(Exception):
+    """The gateway refused a request or the connection failed"""
+
+
+def gateway_settings(path=OPENCLAW_JSON_PATH):
+    """Return (port, token) from openclaw.json; OPENCLAW_GATEWAY_PORT/_TOKEN env vars win"""
+    port, token = DEFAULT_PORT, None
+    try:
+        # Two values out of the key-path index; JSON5 comments don't hide them
+        port = int(openclaw_json.get("gateway.port", None, path) or DEFAULT_PORT)
+        token = openclaw_json.get("gateway.auth.token", None, path)
+    except Exception:
+        pass
+    if os.environ.get("OPENCLAW_GATEWAY_PORT", "").isdigit():
+        port = int(os.environ["OPENCLAW_GATEWAY_PORT"])
+    return port, os.environ.get("OPENCLAW_GATEWAY_TOKEN") or token
+
+
+class GatewayClient:
+    """One WebSocket connection to the gateway, reusable for many requests"""
+
+    def __init__(self, host=DEFAULT_HOST, port=None, token=None, timeout=REQUEST_TIMEOUT):
+        default_port, default_token = gateway_settings()
+        self.host = host
+        self.port = port or default_port
+        self.token = token if token is not None else default_token
+        self.timeout = timeout
+        self.sock = None
+        self._ids = itertools.count(1)
+        self._buffer = b""
+
+    @property
+    def connected(self):
+        return self.sock is not None
+
+    def connect(self):
+        """Open the socket, upgrade to WebSocket and authenticate"""
+        self.close()
+        try:
+            self.sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._handshake()
+            self.request("connect", {
+                "minProtocol": PROTOCOL_VERSION,
+                "maxProtocol": PROTOCOL_VERSION,
+                "client": {"id": CLIENT_ID, "platform": "linux", "mode": "backend"},
+                "role": "operator",
+                "auth": {"token": self.token} if self.token else {}
+            })
+        except GatewayError:
+            self.close()
+            raise
+        except OSError as e:
+            self.close()
+            raise GatewayError(f"cannot reach gateway on {self.host}:{self.port}: {e}")
+        return self
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self._send_frame(_OP_CLOSE, b"")
+            except OSError:
+                pass
+            self.sock.close()
+        self.sock = None
+        self._buffer = b""
+
+    def request(self, method, params=None, timeout=None):
+        """Send one request and return its payload once the gateway answers"""
+        if self.sock is None:
+            raise GatewayError("not connected")
+        request_id = str(next(self._ids))
+        frame = {"type": "req", "id": request_id, "method": method, "params": params or {}}
+        try:
+            self.sock.settimeout(timeout or self.timeout)
+            self._send_frame(_OP_TEXT, json.dumps(frame).encode())
+            while True:
+                message = json.loads(self._recv_message())
+                if message.get("type") == "res" and message.get("id") == request_id:
+                    break
+        except (OSError, ValueError) as e:
+            self.close()
+            raise GatewayError(f"{method} failed: {e}")
+
+        if not message.get("ok"):
+            error = message.get("error") or {}
+            raise GatewayError(error.get("message") or f"{method} rejected")
+        return message.get("payload")
+
+    def patch_session(self, session_key, model):
+        """Set the model of a session (sessions.patch)"""
+        return self.request("sessions.patch", {"key": session_key, "model": model})
+
+    # WebSocket framing
+
+    def _handshake(self):
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock.sendall((
+            f"GET / HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        while b"\r\n\r\n" not in self._buffer:
+            self._fill()
+        head, self._buffer = self._buffer.split(b"\r\n\r\n", 1)
+        status = head.split(b"\r\n", 1)[0]
+        if b" 101 " not in status + b" ":
+            raise GatewayError(f"upgrade refused: {status.decode(errors='replace')}")
+
+    def _fill(self):
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("gateway closed the connection")
+        self._buffer += chunk
+
+    def _take(self, n):
+        while len(self._buffer) < n:
+            self._fill()
+        data, self._buffer = self._buffer[:n], self._buffer[n:]
+        return data
+
+    def _send_frame(self, opcode, payload):
+        # Client frames are always masked
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([0x80 | len(payload)])
+        elif len(payload) < 65536:
+            header += bytes([0x80 | 126]) + struct.pack("!H", len(payload))
+        else:
+            header += bytes([0x80 | 127]) + struct.pack("!Q", len(payload))
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        self.sock.sendall(header + mask + masked)
+
+    def _recv_message(self):
+        parts = []
+        while True:
+            first, second = self._take(2)
+            opcode, length = first & 0x0F, second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", self._take(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", self._take(8))[0]
+            mask = self._take(4) if second & 0x80 else None
+            payload = self._take(length)
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+            if opcode == _OP_PING:
+                self._send_frame(_OP_PONG, payload)
+            elif opcode == _OP_CLOSE:
+                raise ConnectionError("gateway closed the connection")
+            elif opcode != _OP_PONG:
+                parts.append(payload)
+                if first & 0x80:
+                    return b"".join(parts).decode()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Gateway status monitor for the panel.
+Checks the gateway port with a TCP connect and a small HTTP request and
+publishes the result atomically to a tiny JSON file on the runtime dir,
+which the applet reads instead of running the Node CLI. Polling is fast
+right after a start/stop/restart ("kick") or a state change and backs off
+while the state stays the same.
+
+States: running (HTTP answers), starting (port open, no HTTP answer yet),
+stopped (port closed).
+
+One monitor per user holds an exclusive lock for its lifetime; kick and
+stop reach it as datagrams on its socket, never as signals to a PID.
+
+Usage: gateway_monitor.py            run the monitor (one per user)
+       gateway_monitor.py kick       poll fast for a while, starting the monitor if needed
+       gateway_monitor.py status     print the published state
+       gateway_monitor.py stop
+"""
+import fcntl
+import http.client
+import json
+import os
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from config_store import atomic_write_json
+from gateway_client import DEFAULT_HOST, gateway_settings
+from runtime import RUNTIME_DIR
+
+STATUS_PATH = os.path.join(RUNTIME_DIR, "gateway-status.json")
+SOCKET_PATH = os.path.join(RUNTIME_DIR, "gateway-monitor.sock")
+LOCK_PATH = os.path.join(RUNTIME_DIR, "gateway-monitor.lock")
+
+TCP_TIMEOUT = 0.3  # seconds
+HTTP_TIMEOUT = 1.0  # seconds
+FAST_INTERVAL = 0.5  # seconds between checks after a kick or change
+MAX_INTERVAL = 30.0  # seconds between checks once stable
+BACKOFF = 2.0
+KICK_WINDOW = 20.0  # seconds of fast polling after a kick
+
+RUNNING, STARTING, STOPPED = "running", "starting", "stopped"
+
+
+def probe(host, port):
+    """Return (state, latency_ms) for the gateway at host:port"""
+    start = time.perf_counter()
+    try:
+        sock = socket.create_connection((host, port), timeout=TCP_TIMEOUT)
+    except OSError:
+        return STOPPED, None
+    try:
+        connection = http.client.HTTPConnection(host, port, timeout=HTTP_TIMEOUT)
+        connection.sock = sock
+        connection.request("HEAD", "/")
+        connection.getresponse().close()
+        state = RUNNING
+    except (OSError, http.client.HTTPException):
+        state = STARTING
+    finally:
+        sock.close()
+    return state, round((time.perf_counter() - start) * 1000, 2)
+
+
+def read_status(path=STATUS_PATH):
+    """Published state dict, or None"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def send(command, path=SOCKET_PATH):
+    """Send kick or stop to the running monitor; False when none is listening"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(command.encode(), path)
+        return True
+    except (FileNotFoundError, ConnectionRefusedError):
+        return False
+
+
+class GatewayMonitor:
+    """Adaptive poll loop publishing to STATUS_PATH"""
+
+    def __init__(self, host=DEFAULT_HOST, port=None, status_path=STATUS_PATH):
+        self.host = host
+        self.port = port or gateway_settings()[0]
+        self.status_path = status_path
+        self.state = None
+        self.since = None
+        self.interval = FAST_INTERVAL
+        self.fast_until = 0.0
+        self.stopping = False
+        # Signal handlers only set flags; the pipe wakes the select, see serve()
+        self.wakeup_r, self.wakeup_w = os.pipe()
+        for fd in (self.wakeup_r, self.wakeup_w):
+            os.set_blocking(fd, False)
+
+    def kick(self):
+        """Poll fast from the next check on"""
+        self.fast_until = time.monotonic() + KICK_WINDOW
+
+    def check(self):
+        state, latency = probe(self.host, self.port)
+        now = time.time()
+        if state != self.state:
+            self.state, self.since = state, now
+            self.interval = FAST_INTERVAL
+        elif time.monotonic() < self.fast_until:
+            self.interval = FAST_INTERVAL
+        else:
+            self.interval = min(MAX_INTERVAL, self.interval * BACKOFF)
+        atomic_write_json(self.status_path, {
+            "state": state,
+            "since": round(self.since, 3),
+            "checked": round(now, 3),
+            "latency_ms": latency,
+            "next_check": round(now + self.interval, 3),
+            "port": self.port
+        })
+        return state
+
+    def run(self, sock):
+        """Check, then sleep until the interval passes or a command arrives"""
+        selector = selectors.DefaultSelector()
+        selector.register(sock, selectors.EVENT_READ)
+        selector.register(self.wakeup_r, selectors.EVENT_READ)
+        sock.setblocking(False)
+        try:
+            while not self.stopping:
+                try:
+                    self.check()
+                except OSError as e:
+                    print(f"Gateway monitor error: {e}")
+                if selector.select(self.interval):
+                    self._drain(sock)
+        finally:
+            selector.close()
+
+    def _drain(self, sock):
+        try:
+            while os.read(self.wakeup_r, 512):
+                pass
+        except BlockingIOError:
+            pass
+        while True:
+            try:
+                command = sock.recv(64)
+            except BlockingIOError:
+                return
+            if command == b"kick":
+                self.kick()
+            elif command == b"stop":
+                self.stopping = True
+
+
+def serve():
+    os.makedirs(RUNTIME_DIR, mode=0o700, exist_ok=True)
+    lock = open(LOCK_PATH, 'w')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        # Another monitor runs
+        lock.close()
+        return
+
+    # Holding the lock, any socket file left is from a monitor that died
+    try:
+        os.unlink(SOCKET_PATH)
+    except FileNotFoundError:
+        pass
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(SOCKET_PATH)
+
+    monitor = GatewayMonitor()
+    monitor.kick()
+
+    def stop(signum, frame):
+        monitor.stopping = True
+
+    signal.set_wakeup_fd(monitor.wakeup_w)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        monitor.run(sock)
+    finally:
+        os.unlink(SOCKET_PATH)
+        sock.close()
+        lock.close()
+
+
+def kick():
+    """Wake the monitor for fast polling, or start one"""
+    if send("kick"):
+        return
+    subprocess.Popen([sys.executable, os.path.abspath(__file__)],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "run"
+    if command == "run":
+        serve()
+    elif command == "kick":
+        kick()
+    elif command == "status":
+        print(json.dumps(read_status(), indent=4))
+    elif command == "stop":
+        send("stop")
+    else:
+        print(__doc__.strip().split("\n\n")[-1])
+        sys.exit(1)
@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+Gateway supervisor for the panel.
+Runs the gateway in the foreground as its own child (openclaw gateway run)
+and owns its lifecycle: the child's exit is seen through a pidfd (a
+waitid() thread where pidfds aren't available) instead of polling, a crash
+is restarted after an exponentially growing delay, and crashing more than
+CRASH_LIMIT times within CRASH_WINDOW stops the restarts until the next
+start. The last LOG_LINES lines of the gateway's stdout/stderr are kept in
+a ring buffer.
+
+One event loop serves a Unix socket on the runtime dir; the applet's
+Start/Stop/Restart items send their command there, and status reports the
+state, pid, uptime, restart count and last exit reason. Every state change
+kicks the status monitor. A gateway started elsewhere (the CLI's service)
+is stopped or restarted through `openclaw gateway stop|restart`, and only
+reported stopped once its port has closed. Without a running supervisor,
+start/restart launch one and stop falls back to the CLI.
+
+States: running, stopping, backoff (waiting to restart after a crash),
+crash-loop (gave up), stopped, external (another gateway holds the port).
+
+Usage: gateway_supervisor.py start|stop|restart|status
+       gateway_supervisor.py logs [N]
+       gateway_supervisor.py serve [--start]    run the supervisor (one per user)
+"""
+import collections
+import fcntl
+import json
+import os
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from gateway_client import DEFAULT_HOST, gateway_settings
+from runtime import RUNTIME_DIR, exit_fd, exit_reason, openclaw_bin
+
+SOCKET_PATH = os.path.join(RUNTIME_DIR, "gateway.sock")
+LOCK_PATH = os.path.join(RUNTIME_DIR, "gateway.lock")
+
+GATEWAY_ARGS = ["gateway", "run"]
+LOG_LINES = 500  # ring buffer size
+MAX_LINE = 2000  # characters kept of one log line
+BACKOFF_BASE = 1.0  # seconds before the first restart
+BACKOFF_MAX = 60.0
+STABLE_AFTER = 60.0  # seconds of uptime that reset the backoff
+CRASH_LIMIT = 5  # crashes within CRASH_WINDOW before giving up
+CRASH_WINDOW = 300.0  # seconds
+STOP_TIMEOUT = 10.0  # seconds between SIGTERM and SIGKILL
+IDLE_TIMEOUT = 600.0  # seconds stopped without requests before the supervisor exits
+CLIENT_TIMEOUT = 2.0  # seconds for one socket request
+CLI_TIMEOUT = 30  # seconds
+EXTERNAL_WAIT = 30.0  # seconds after the CLI returns for an external gateway's port to close (or open)
+PORT_POLL = 0.25  # seconds between port checks meanwhile
+
+RUNNING, STOPPING, BACKOFF, CRASH_LOOP, STOPPED, EXTERNAL = \
+    "running", "stopping", "backoff", "crash-loop", "stopped", "external"
+
+
+def port_open(port, host=DEFAULT_HOST):
+    try:
+        socket.create_connection((host, port), timeout=0.3).close()
+        return True
+    except OSError:
+        return False
+
+
+def kick_monitor():
+    """Have the status monitor re-check the gateway now"""
+    # Imported on first use: only state changes need the status monitor
+    try:
+        from gateway_monitor import kick
+        kick()
+    except OSError:
+        pass
+
+
+class LogRing:
+    """Last lines of the child's stdout/stderr, each [time, stream, text]"""
+
+    def __init__(self, size=LOG_LINES):
+        self.lines = collections.deque(maxlen=size)
+        self._partial = {}
+
+    def feed(self, stream, data):
+        text = self._partial.pop(stream, "") + data.decode(errors="replace")
+        *complete, rest = text.split("\n")
+        now = round(time.time(), 3)
+        for line in complete:
+            self.lines.append([now, stream, line[:MAX_LINE]])
+        if rest:
+            # Long unterminated output is cut like a long line
+            self._partial[stream] = rest[:MAX_LINE]
+
+    def flush(self, stream):
+        rest = self._partial.pop(stream, "")
+        if rest:
+            self.lines.append([round(time.time(), 3), stream, rest])
+
+    def tail(self, count):
+        return list(self.lines)[-count:] if count > 0 else []
+
+
+class GatewaySupervisor:
+    """Event loop over the child's pidfd and pipes, the command socket and timers"""
+
+    def __init__(self, command, port, socket_path=SOCKET_PATH):
+        self.command = command
+        self.port = port
+        self.socket_path = socket_path
+        self.selector = selectors.DefaultSelector()
+        self.logs = LogRing()
+        self.state = STOPPED
+        self.process = None
+        self.started = None  # time.time() the current child started
+        self.restarts = 0  # automatic restarts after crashes
+        self.crashes = collections.deque()  # monotonic times of recent crashes
+        self.backoff = BACKOFF_BASE
+        self.last_exit = None
+        self.want_running = False
+        self.start_after_exit = False
+        self.restart_at = None
+        self.kill_at = None
+        self.last_request = time.monotonic()
+        self.exiting = False  # leave the loop once the child is gone
+        self.cli = None  # (Popen, action) of `openclaw gateway stop|restart` for an external gateway
+        self.cli_kill_at = None
+        self.last_cli = None
+        self.port_wait = None  # (action, deadline) until the external gateway's port follows the CLI
+        self.cli_next = None  # action asked for while the CLI was busy
+        self.port_check_at = None
+        # Written to by signal.set_wakeup_fd so signal handlers take effect during select()
+        self.wakeup_read, self.wakeup_write = os.pipe()
+        os.set_blocking(self.wakeup_read, False)
+        os.set_blocking(self.wakeup_write, False)
+        self.selector.register(self.wakeup_read, selectors.EVENT_READ, ("wakeup", None))
+
+    # Child process
+
+    def _spawn(self):
+        if port_open(self.port):
+            # Not ours to keep running; Stop/Restart go through the CLI
+            self.state = EXTERNAL
+            self.want_running = False
+            return False
+        try:
+            self.process = subprocess.Popen(self.command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                            stderr=subprocess.PIPE, start_new_session=True)
+        except OSError as e:
+            # E.g. openclaw removed mid-upgrade: counts as a crash, retried after the backoff
+            self.logs.feed("spawn", f"{e}\n".encode())
+            self.last_exit = {"reason": f"spawn failed: {e}", "code": None,
+                              "at": round(time.time(), 3), "uptime": 0.0}
+            self._crashed(0.0)
+            kick_monitor()
+            return False
+        self.started = time.time()
+        self.state = RUNNING
+        for name, pipe in (("stdout", self.process.stdout), ("stderr", self.process.stderr)):
+            os.set_blocking(pipe.fileno(), False)
+            self.selector.register(pipe, selectors.EVENT_READ, ("pipe", name))
+        self.selector.register(exit_fd(self.process.pid), selectors.EVENT_READ, ("exit", self.process.pid))
+        kick_monitor()
+        return True
+
+    def _on_exit(self, fd, pid):
+        self.selector.unregister(fd)
+        os.close(fd)
+        _, status = os.waitpid(pid, 0)
+        self.process.returncode = os.waitstatus_to_exitcode(status)
+        for name, pipe in (("stdout", self.process.stdout), ("stderr", self.process.stderr)):
+            if not pipe.closed:
+                self._drain(pipe, name)
+        uptime = time.time() - self.started
+        self.last_exit = {"reason": exit_reason(status), "code": self.process.returncode,
+                          "at": round(time.time(), 3), "uptime": round(uptime, 1)}
+        self.process = None
+        self.started = None
+        self.kill_at = None
+        kick_monitor()
+
+        if self.start_after_exit or not self.want_running:
+            # Asked to stop (or restart): not a crash
+            self.state = STOPPED
+            if self.start_after_exit:
+                self.start_after_exit = False
+                self._spawn()
+            return
+        self._crashed(uptime)
+
+    def _crashed(self, uptime):
+        """Schedule the next restart, or give up after CRASH_LIMIT crashes in CRASH_WINDOW"""
+        now = time.monotonic()
+        if uptime >= STABLE_AFTER:
+            self.backoff = BACKOFF_BASE
+        self.crashes.append(now)
+        while self.crashes and now - self.crashes[0] > CRASH_WINDOW:
+            self.crashes.popleft()
+        if len(self.crashes) > CRASH_LIMIT:
+            self.state = CRASH_LOOP
+            self.want_running = False
+            return
+        self.state = BACKOFF
+        self.restart_at = now + self.backoff
+        self.backoff = min(BACKOFF_MAX, self.backoff * 2)
+
+    def _drain(self, pipe, name):
+        try:
+            while True:
+                data = os.read(pipe.fileno(), 65536)
+                if not data:
+                    break
+                self.logs.feed(name, data)
+        except BlockingIOError:
+            return
+        self.logs.flush(name)
+        self.selector.unregister(pipe)
+        pipe.close()
+
+    def _signal(self, signum):
+        try:
+            os.killpg(self.process.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    # External gateway
+
+    def _external(self):
+        """True while the gateway on the port isn't our child, or the CLI is still handling it"""
+        if self.cli is not None or self.port_wait is not None:
+            return True
+        return self.process is None and (self.state == EXTERNAL or port_open(self.port))
+
+    def _run_cli(self, action):
+        """`openclaw gateway <action>` for a gateway this supervisor didn't start"""
+        if self.cli is not None or self.port_wait is not None:
+            # One CLI at a time; the latest request runs when this one has settled
+            self.cli_next = action
+            return
+        self.cli_next = None
+        try:
+            process = subprocess.Popen([self.command[0], "gateway", action], stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                       start_new_session=True)
+        except OSError as e:
+            self.logs.feed("cli", f"{e}\n".encode())
+            self.last_cli = {"action": action, "reason": str(e), "at": round(time.time(), 3)}
+            return
+        self.cli = (process, action)
+        self.cli_kill_at = time.monotonic() + CLI_TIMEOUT
+        self.port_wait = None
+        self.state = STOPPING
+        self.selector.register(exit_fd(process.pid), selectors.EVENT_READ, ("cli", process.pid))
+
+    def _on_cli_exit(self, fd, pid):
+        self.selector.unregister(fd)
+        os.close(fd)
+        _, status = os.waitpid(pid, 0)
+        _, action = self.cli
+        self.cli = None
+        self.cli_kill_at = None
+        self.last_cli = {"action": action, "reason": exit_reason(status), "at": round(time.time(), 3)}
+        # The CLI can return before the gateway has let go of its port (or opened it again)
+        self.port_wait = (action, time.monotonic() + EXTERNAL_WAIT)
+        self.port_check_at = time.monotonic()
+
+    def _check_port(self, now):
+        action, deadline = self.port_wait
+        up = port_open(self.port)
+        if up != (action == "restart") and now < deadline:
+            self.port_check_at = now + PORT_POLL
+            return
+        self.port_wait = self.port_check_at = None
+        self.state = EXTERNAL if up else STOPPED
+        action, self.cli_next = self.cli_next, None
+        if action and up:
+            self._run_cli(action)
+        elif not up and self.start_after_exit:
+            self.start_after_exit = False
+            self._spawn()
+        kick_monitor()
+
+    # Commands
+
+    def start(self):
+        self.want_running = True
+        self.crashes.clear()
+        self.backoff = BACKOFF_BASE
+        self.restart_at = None
+        if self.cli is not None or self.port_wait is not None:
+            # Started once the external gateway is down
+            self.cli_next = None
+            self.start_after_exit = True
+        elif self.process is None:
+            self._spawn()
+        elif self.state == STOPPING:
+            self.start_after_exit = True
+
+    def stop(self):
+        self.want_running = False
+        self.start_after_exit = False
+        self.restart_at = None
+        if self._external():
+            self._run_cli("stop")
+        elif self.process is not None and self.state != STOPPING:
+            self.state = STOPPING
+            self._signal(signal.SIGTERM)
+            self.kill_at = time.monotonic() + STOP_TIMEOUT
+        elif self.process is None:
+            self.state = STOPPED
+
+    def restart(self):
+        if self._external():
+            self.want_running = False
+            self.start_after_exit = False
+            self._run_cli("restart")
+            return
+        if self.process is None:
+            self.start()
+            return
+        self.stop()
+        self.want_running = True
+        self.start_after_exit = True
+
+    def status(self):
+        status = {
+            "state": self.state,
+            "pid": self.process.pid if self.process else None,
+            "uptime": round(time.time() - self.started, 1) if self.started else None,
+            "restarts": self.restarts,
+            "recent_crashes": len(self.crashes),
+            "last_exit": self.last_exit,
+            "port": self.port,
+        }
+        if self.last_cli is not None:
+            status["last_cli"] = self.last_cli
+        if self.restart_at is not None:
+            status["restart_in"] = round(max(0.0, self.restart_at - time.monotonic()), 1)
+        return status
+
+    def handle(self, request):
+        command = request.get("command")
+        if command == "logs":
+            return {"ok": True, "lines": self.logs.tail(int(request.get("lines", 50)))}
+        if command in ("start", "stop", "restart"):
+            getattr(self, command)()
+            kick_monitor()
+        elif command != "status":
+            return {"ok": False, "error": f"unknown command {command}"}
+        return dict(self.status(), ok=self.state != EXTERNAL or command == "status")
+
+    def _on_client(self, server):
+        conn, _ = server.accept()
+        self.last_request = time.monotonic()
+        with conn:
+            conn.settimeout(CLIENT_TIMEOUT)
+            try:
+                line = conn.makefile('rb').readline()
+                reply = self.handle(json.loads(line or b"{}"))
+            except (OSError, ValueError) as e:
+                reply = {"ok": False, "error": str(e)}
+            try:
+                conn.sendall(json.dumps(reply).encode() + b"\n")
+            except OSError:
+                pass
+
+    # Loop
+
+    def _idle(self):
+        return self.process is None and self.cli is None and self.port_wait is None and not self.want_running
+
+    def _timeout(self):
+        deadlines = [t for t in (self.restart_at, self.kill_at, self.cli_kill_at, self.port_check_at)
+                     if t is not None]
+        if self._idle():
+            deadlines.append(self.last_request + IDLE_TIMEOUT)
+        return max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+
+    def _on_timers(self):
+        now = time.monotonic()
+        if self.restart_at is not None and now >= self.restart_at:
+            self.restart_at = None
+            self.restarts += 1
+            self._spawn()
+        if self.kill_at is not None and now >= self.kill_at and self.process is not None:
+            self.kill_at = None
+            self._signal(signal.SIGKILL)
+        if self.cli_kill_at is not None and now >= self.cli_kill_at and self.cli is not None:
+            self.cli_kill_at = None
+            try:
+                os.killpg(self.cli[0].pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        if self.port_check_at is not None and now >= self.port_check_at:
+            self._check_port(now)
+        if self._idle() and now - self.last_request >= IDLE_TIMEOUT:
+            self.exiting = True
+
+    def serve(self):
+        os.makedirs(os.path.dirname(self.socket_path), mode=0o700, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        server.listen()
+        self.selector.register(server, selectors.EVENT_READ, ("socket", None))
+        try:
+            while not (self.exiting and self.process is None and self.cli is None):
+                for key, _ in self.selector.select(self._timeout()):
+                    kind, detail = key.data
+                    if kind == "wakeup":
+                        os.read(self.wakeup_read, 512)
+                    elif kind == "socket":
+                        self._on_client(server)
+                    elif kind == "pipe":
+                        self._drain(key.fileobj, detail)
+                    elif kind == "exit":
+                        self._on_exit(key.fd, detail)
+                    elif kind == "cli":
+                        self._on_cli_exit(key.fd, detail)
+                self._on_timers()
+        finally:
+            server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+# Client side
+
+def request(command, socket_path=SOCKET_PATH, **params):
+    """Send one command to the supervisor; raises OSError if none is running"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CLIENT_TIMEOUT)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(dict(params, command=command)).encode() + b"\n")
+        return json.loads(sock.makefile('rb').readline() or b"{}")
+
+
+def launch(start=True):
+    """Start a supervisor in the background and wait for its socket"""
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve"] + (["--start"] if start else []),
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+    deadline = time.monotonic() + CLIENT_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            return request("status")
+        except OSError:
+            time.sleep(0.05)
+    return {"ok": False, "error": "supervisor did not start"}
+
+
+def command(action):
+    """start/stop/restart/status through the supervisor, launching it or using the CLI as needed"""
+    try:
+        return request(action)
+    except OSError:
+        pass
+    if action == "status":
+        return {"ok": True, "state": "unsupervised"}
+    if action in ("stop", "restart"):
+        # A gateway the supervisor doesn't own, e.g. the CLI's service
+        subprocess.run([openclaw_bin(), "gateway", "stop"], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, timeout=CLI_TIMEOUT)
+        if action == "stop":
+            port = gateway_settings()[0]
+            deadline = time.monotonic() + EXTERNAL_WAIT
+            while port_open(port) and time.monotonic() < deadline:
+                time.sleep(PORT_POLL)
+            kick_monitor()
+            if port_open(port):
+                return {"ok": False, "state": EXTERNAL, "error": f"gateway still listening on port {port}"}
+            return {"ok": True, "state": STOPPED}
+    return launch(start=True)
+
+
+def serve(start=False):
+    """Run the supervisor unless another one holds the lock"""
+    # Taken before the socket is replaced: two launches at once can't unlink each other's
+    os.makedirs(RUNTIME_DIR, mode=0o700, exist_ok=True)
+    lock = open(LOCK_PATH, 'w')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return
+    supervisor = GatewaySupervisor([openclaw_bin()] + GATEWAY_ARGS, gateway_settings()[0])
+
+    def stop(signum, frame):
+        # Our own gateway goes with the supervisor; an external one is left alone
+        if supervisor.process is not None:
+            supervisor.stop()
+        supervisor.exiting = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.set_wakeup_fd(supervisor.wakeup_write)
+    if start:
+        supervisor.start()
+    supervisor.serve()
+
+
+if __name__ == "__main__":
+    action = sys.argv[1] if len(sys.argv) > 1 else None
+    if action == "serve":
+        serve(start="--start" in sys.argv[2:])
+    elif action in ("start", "stop", "restart", "status"):
+        reply = command(action)
+        print(json.dumps(reply, indent=4))
+        sys.exit(0 if reply.get("ok") else 1)
+    elif action == "logs":
+        try:
+            reply = request("logs", lines=int(sys.argv[2]) if len(sys.argv) > 2 else 50)
+        except OSError:
+            print("Gateway supervisor is not running", file=sys.stderr)
+            sys.exit(1)
+        for stamp, stream, line in reply.get("lines", []):
+            print(f"{time.strftime('%H:%M:%S', time.localtime(stamp))} {stream:<6} {line}")
+    else:
+        print(__doc__.strip().split("\n\n")[-1], file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Compiled menu snapshot for the applet.
+Merges menu.json and models.json into the exact list of items the popup
+menu shows: labels resolved, disabled items dropped, manual_ prefixes
+stripped, models grouped by provider and sorted, separators placed. The
+snapshot carries a format version, a hash of its items and the mtime/size
+of the two source files, so the applet reads one file, skips the rebuild
+when the hash is unchanged and can tell when the sources were edited
+behind its back.
+
+Each write also publishes a structural diff against the previous snapshot
+(models added, removed or relabeled, items toggled, labels and custom
+commands edited) to menu-diff.json. The applet watches that file and
+patches the affected menu items in place instead of rebuilding the menu.
+
+Usage: menu_snapshot.py     recompile from the files on disk
+"""
+import hashlib
+import json
+import os
+
+from config_store import APPLET_DIR, MENU_JSON_PATH, MODELS_JSON_PATH, atomic_write_json
+from model_registry import ModelRegistry
+from runtime import file_stamp
+
+SNAPSHOT_PATH = os.path.join(APPLET_DIR, "menu-compiled.json")
+DIFF_PATH = os.path.join(APPLET_DIR, "menu-diff.json")
+SNAPSHOT_VERSION = 1
+
+# Same fallback the applet uses when menu.json is missing
+DEFAULT_MENU = {
+    "title": {"enabled": True, "text": "OC Control"},
+    "oc_models": {"enabled": True, "label": "OC Models"},
+    "oc_start": {"enabled": True, "label": "OC Start"},
+    "oc_stop": {"enabled": True, "label": "OC Stop"},
+    "oc_restart": {"enabled": True, "label": "OC Restart"},
+    "oc_dashboard": {"enabled": True, "label": "OC Dashboard"},
+    "oc_json": {"enabled": True, "label": "OC Json"},
+    "oc_folder": {"enabled": True, "label": "OC Folder"},
+    "oc_doctor": {"enabled": True, "label": "OC Doctor"},
+    "settings": {"enabled": True, "label": "Settings"},
+    "credits": {"enabled": True, "text": "0.62a - ByFarmfield - 2026"}
+}
+
+# (key, default label, icon) in menu order
+GATEWAY_ITEMS = (
+    ("oc_start", "OC Start", "start-gateway-icon"),
+    ("oc_stop", "OC Stop", "stop-gateway-icon"),
+    ("oc_restart", "OC Restart", "restart-gateway-icon"),
+)
+TOOL_GROUPS = (
+    (("oc_dashboard", "OC Dashboard", "oc-open-dashboard"),),
+    (("oc_json", "OC Json", "oc-json-icon"), ("oc_folder", "OC Folder", "oc_folder_open")),
+    (("oc_doctor", "OC Doctor", "oc-doctor-icon"),),
+)
+CUSTOM_SLOTS = 3
+
+
+def _enabled(menu, key):
+    return isinstance(menu.get(key), dict) and menu[key].get("enabled") is not False
+
+
+def _label(menu, key, default):
+    section = menu.get(key) or {}
+    return section.get("label") or section.get("text") or default
+
+
+def model_groups(models):
+    """[{provider, models: [{id, name}]}] sorted by provider, entries in file order
+
+    models is a models.json list or a ModelRegistry built from one.
+    """
+    registry = models if isinstance(models, ModelRegistry) else ModelRegistry(models)
+    return [{"provider": provider, "models": [{"id": r.id, "name": r.name} for r in registry.by_provider(provider)]}
+            for provider in registry.providers()]
+
+
+def compile_items(menu, models):
+    """The popup menu as a flat list of item dicts, top to bottom"""
+    menu = menu if menu else DEFAULT_MENU
+    items = []
+
+    def separator():
+        if items and items[-1]["type"] != "separator":
+            items.append({"type": "separator"})
+
+    if _enabled(menu, "title"):
+        items.append({"type": "title", "text": _label(menu, "title", "OC Control")})
+        separator()
+
+    if _enabled(menu, "oc_models"):
+        items.append({
+            "type": "models",
+            "label": _label(menu, "oc_models", "OC Models"),
+            "sessions": menu["oc_models"].get("sessions") or ["agent:main:main"],
+            "groups": model_groups(models)
+        })
+        separator()
+
+    for key, default, icon in GATEWAY_ITEMS:
+        if _enabled(menu, key):
+            items.append({"type": "gateway", "key": key, "action": key[3:],
+                          "label": _label(menu, key, default), "icon": icon})
+
+    for group in TOOL_GROUPS:
+        enabled = [(key, default, icon) for key, default, icon in group if _enabled(menu, key)]
+        if enabled:
+            separator()
+        for key, default, icon in enabled:
+            items.append({"type": "tool", "key": key, "label": _label(menu, key, default), "icon": icon})
+
+    for i in range(1, CUSTOM_SLOTS + 1):
+        key = f"custom_{i}"
+        section = menu.get(key)
+        if not _enabled(menu, key) or not section.get("command"):
+            continue
+        if not any(item["type"] == "custom" for item in items):
+            separator()
+        items.append({"type": "custom", "key": key, "label": section.get("title") or f"Custom {i}",
+                      "command": section["command"]})
+
+    if _enabled(menu, "settings") or _enabled(menu, "credits"):
+        separator()
+        if _enabled(menu, "settings"):
+            items.append({"type": "settings", "label": _label(menu, "settings", "Settings")})
+        if _enabled(menu, "credits"):
+            items.append({"type": "credits", "text": _label(menu, "credits", "0.62a - ByFarmfield - 2026")})
+        items.append({"type": "spacer"})
+    return items
+
+
+def compile_snapshot(menu, models, menu_path=MENU_JSON_PATH, models_path=MODELS_JSON_PATH):
+    items = compile_items(menu, models)
+    canonical = json.dumps([SNAPSHOT_VERSION, items], sort_keys=True, separators=(",", ":"))
+    return {
+        "version": SNAPSHOT_VERSION,
+        "hash": hashlib.sha256(canonical.encode()).hexdigest()[:16],
+        "sources": {"menu": file_stamp(menu_path), "models": file_stamp(models_path)},
+        "items": items
+    }
+
+
+def _identity(item):
+    return item.get("key") or item["type"]
+
+
+def _model_diff(old_groups, new_groups):
+    """Added/removed/relabeled models, or reload=True when groups appear, empty or reorder"""
+    old = {g["provider"]: g["models"] for g in old_groups}
+    new = {g["provider"]: g["models"] for g in new_groups}
+    diff = {"added": [], "removed": [], "relabeled": [], "reload": False}
+    if set(old) != set(new):
+        diff["reload"] = True
+        return diff
+
+    for provider, new_models in new.items():
+        old_names = {m["id"]: m["name"] for m in old[provider]}
+        new_names = {m["id"]: m["name"] for m in new_models}
+        if len(old_names) != len(old[provider]) or len(new_names) != len(new_models):
+            # Duplicate IDs can't be addressed one by one
+            diff["reload"] = True
+            return diff
+        kept_old = [m["id"] for m in old[provider] if m["id"] in new_names]
+        kept_new = [m["id"] for m in new_models if m["id"] in old_names]
+        if kept_old != kept_new:
+            diff["reload"] = True
+            return diff
+        diff["removed"] += [model_id for model_id in old_names if model_id not in new_names]
+        for index, model in enumerate(new_models):
+            if model["id"] not in old_names:
+                diff["added"].append({"id": model["id"], "name": model["name"], "provider": provider, "index": index})
+            elif old_names[model["id"]] != model["name"]:
+                diff["relabeled"].append({"id": model["id"], "name": model["name"]})
+    return diff
+
+
+def diff_snapshots(old, new):
+    """Structural diff turning the menu built from old into the one built from new"""
+    old_keys = [_identity(item) for item in old["items"]]
+    new_keys = [_identity(item) for item in new["items"]]
+    diff = {
+        "version": SNAPSHOT_VERSION,
+        "from": old["hash"],
+        "to": new["hash"],
+        # Items toggled on or off change the layout; the applet rebuilds on the next open
+        "structure": old_keys != new_keys,
+        "enabled": [key for key in new_keys if key not in old_keys and key not in ("separator", "spacer")],
+        "disabled": [key for key in old_keys if key not in new_keys and key not in ("separator", "spacer")],
+        "labels": {},
+        "commands": {},
+        "sessions": None,
+        "models": {"added": [], "removed": [], "relabeled": [], "reload": False}
+    }
+    old_items = {_identity(item): item for item in old["items"]}
+    for item in new["items"]:
+        key = _identity(item)
+        before = old_items.get(key)
+        if before is None:
+            continue
+        label = item.get("label", item.get("text"))
+        if label != before.get("label", before.get("text")):
+            diff["labels"][key] = label
+        if item["type"] == "custom" and item["command"] != before["command"]:
+            diff["commands"][key] = item["command"]
+        if item["type"] == "models":
+            if item["sessions"] != before["sessions"]:
+                diff["sessions"] = item["sessions"]
+            diff["models"] = _model_diff(before["groups"], item["groups"])
+    return diff
+
+
+def write_snapshot(store, path=SNAPSHOT_PATH, diff_path=DIFF_PATH):
+    """Compile the store's documents (as saved), write the snapshot and publish the diff"""
+    previous = read_snapshot(path)
+    snapshot = compile_snapshot(store.menu, store.registry, store.paths[store.MENU], store.paths[store.MODELS])
+    atomic_write_json(path, snapshot)
+    if previous and previous.get("version") == SNAPSHOT_VERSION and previous.get("hash") != snapshot["hash"]:
+        atomic_write_json(diff_path, diff_snapshots(previous, snapshot))
+    return snapshot
+
+
+def read_snapshot(path=SNAPSHOT_PATH):
+    """Current snapshot dict, or None"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+if __name__ == "__main__":
+    from config_store import ConfigStore
+    snapshot = write_snapshot(ConfigStore())
+    print(f"{SNAPSHOT_PATH}: {len(snapshot['items'])} items, hash {snapshot['hash']}")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Model catalog for the settings Model List tab.
+The selectable models live in catalog.json next to this file, so adding a
+model is a data change instead of a new release.
+"""
+import json
+import os
+
+CATALOG_JSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json")
+
+
+def load_catalog(path=CATALOG_JSON_PATH):
+    """Return the catalog as a list of {"id", "name", "group"} dicts"""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        print(f"Model catalog not found at: {path}")
+        return []
+    except Exception as e:
+        print(f"Error loading model catalog: {e}")
+        return []
+
+    entries = data.get("models", []) if isinstance(data, dict) else data
+    catalog = []
+    seen = set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        model_id = str(entry.get("id", "")).strip()
+        if not model_id or model_id in seen:
+            continue
+        seen.add(model_id)
+        catalog.append({
+            "id": model_id,
+            "name": entry.get("name") or model_id,
+            "group": entry.get("group") or "Other"
+        })
+    return catalog
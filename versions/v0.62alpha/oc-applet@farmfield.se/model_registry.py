@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Registry of the models in models.json.
+Each entry becomes one compact record with its canonical ID (the ID the
+gateway is switched to: manual_ stripped, ollama/ kept), source section and
+menu provider, the ID interned. The registry splits the records by source
+as it builds them and indexes them by ID, provider and duplicate key on
+first use, so the settings tabs, Save and the menu compiler look models up
+instead of re-scanning and re-slicing the list. Duplicates are models that
+resolve to the same target, e.g. openrouter/x/y and x/y, or llama3 and
+llama3:latest on Ollama.
+"""
+import sys
+from functools import lru_cache
+
+# models.json is written as catalog models, then manual, then Ollama models
+SOURCES = ("catalog", "manual", "ollama")
+MANUAL_PREFIX = "manual_"
+OLLAMA_PREFIX = "ollama/"
+OPENROUTER_PREFIX = "openrouter/"
+
+_providers = {}  # first ID part -> menu group, a handful of entries
+
+
+def model_section(model_id):
+    """Return which models.json section a model ID belongs to"""
+    if model_id.startswith(MANUAL_PREFIX):
+        return "manual"
+    if model_id.startswith(OLLAMA_PREFIX):
+        return "ollama"
+    return "catalog"
+
+
+def canonical_id(model_id):
+    """The ID a model is switched to: stored manual_ prefix removed"""
+    return model_id[len(MANUAL_PREFIX):] if model_id.startswith(MANUAL_PREFIX) else model_id
+
+
+def duplicate_key(model_id):
+    """Key shared by IDs that reach the same model"""
+    model_id = canonical_id(model_id)
+    if model_id.startswith(OLLAMA_PREFIX):
+        name = model_id[len(OLLAMA_PREFIX):]
+        return OLLAMA_PREFIX + (name if ":" in name else f"{name}:latest")
+    if model_id.startswith(OPENROUTER_PREFIX) and model_id.count("/") >= 2:
+        # openrouter/<vendor>/<model> is the same model as <vendor>/<model>
+        return model_id[len(OPENROUTER_PREFIX):]
+    return model_id
+
+
+def provider_of(model_id):
+    """Menu group of a canonical ID: first path part capitalized, or Other"""
+    first, slash, _ = model_id.partition("/")
+    if not slash:
+        return "Other"
+    provider = _providers.get(first)
+    if provider is None:
+        provider = _providers[first] = sys.intern(first[:1].upper() + first[1:])
+    return provider
+
+
+@lru_cache(maxsize=None)
+def catalog_model_name(model_id):
+    """Menu name for a catalog model: provider plus title-cased base name"""
+    parts = model_id.split('/')
+    if len(parts) < 2:
+        return model_id
+    base_name = parts[-1].replace('-', ' ').title()
+    provider = parts[-2].title() if len(parts) > 2 else parts[0].title()
+    return f"{provider} {base_name}"
+
+
+class ModelRecord:
+    """One models.json entry; entry is the dict as stored, id is empty when it has none"""
+
+    __slots__ = ("id", "raw_id", "name", "source", "provider", "entry")
+
+    def __init__(self, entry):
+        raw_id = entry.get("id")
+        if type(raw_id) is not str:
+            raw_id = ""
+        if raw_id.startswith(MANUAL_PREFIX):
+            self.source = "manual"
+            self.id = sys.intern(raw_id[len(MANUAL_PREFIX):])
+        else:
+            self.source = "ollama" if raw_id.startswith(OLLAMA_PREFIX) else "catalog"
+            self.id = sys.intern(raw_id)
+        name = entry.get("name") or self.id
+        self.name = name if type(name) is str else str(name)
+        self.raw_id = raw_id
+        self.provider = provider_of(self.id)
+        self.entry = entry
+
+    def __repr__(self):
+        return f"ModelRecord({self.raw_id!r}, {self.name!r})"
+
+
+class ModelRegistry:
+    """Records of a models.json list, by source; ID, provider and duplicate indexes built on demand"""
+
+    def __init__(self, entries=()):
+        self.records = [ModelRecord(entry) for entry in entries if isinstance(entry, dict)]
+        self._by_source = {source: [] for source in SOURCES}
+        for record in self.records:
+            self._by_source[record.source].append(record)
+        self._reset()
+
+    def _reset(self):
+        self._by_id = None
+        self._by_provider = None
+        self._by_key = None
+
+    def replace(self, source, entries):
+        """Swap one source's entries, keeping the other records; models.json order follows SOURCES"""
+        self._by_source[source] = [ModelRecord(entry) for entry in entries]
+        self.records = [record for name in SOURCES for record in self._by_source[name]]
+        self._reset()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        """Records with an ID, in file order"""
+        return (record for record in self.records if record.id)
+
+    def __contains__(self, model_id):
+        return model_id in self._ids()
+
+    def _ids(self):
+        if self._by_id is None:
+            by_id = {}
+            # First entry wins a lookup; later ones only show up as duplicates
+            for record in self:
+                by_id.setdefault(record.id, record)
+                by_id.setdefault(record.raw_id, record)
+            self._by_id = by_id
+        return self._by_id
+
+    def _keys(self):
+        if self._by_key is None:
+            by_key = {}
+            for record in self:
+                by_key.setdefault(duplicate_key(record.id), []).append(record)
+            self._by_key = by_key
+        return self._by_key
+
+    def get(self, model_id):
+        """Record for a canonical or stored ID, or None"""
+        return self._ids().get(model_id)
+
+    def by_source(self, source):
+        """Records of one models.json section, in file order"""
+        return self._by_source[source]
+
+    def entries(self, source):
+        """The stored dicts of one section, in file order"""
+        return [record.entry for record in self._by_source[source]]
+
+    def ids(self, source=None):
+        """Set of canonical IDs, of one section or all"""
+        records = self.records if source is None else self._by_source[source]
+        return {record.id for record in records if record.id}
+
+    def by_provider(self, provider):
+        """Records of one menu group, in file order"""
+        if self._by_provider is None:
+            by_provider = {}
+            for record in self:
+                by_provider.setdefault(record.provider, []).append(record)
+            self._by_provider = by_provider
+        return self._by_provider.get(provider, [])
+
+    def providers(self):
+        """Menu groups, sorted the way the applet shows them"""
+        self.by_provider(None)
+        return sorted(self._by_provider)
+
+    def same_model(self, model_id):
+        """Records that reach the same model as model_id, in file order"""
+        return self._keys().get(duplicate_key(model_id), [])
+
+    def duplicates(self):
+        """Lists of records that reach the same model, in file order"""
+        return [records for records in self._keys().values() if len(records) > 1]
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Ollama model discovery for the settings Local Models tab.
+Lists the models installed on an Ollama server (GET /api/tags) on a worker
+thread, caches the answer per host:port for a while and hands results back
+on the GTK main loop, so the dialog never waits on the network.
+"""
+import json
+import threading
+import time
+import urllib.request
+
+DEFAULT_TIMEOUT = 3.0  # seconds
+CACHE_TTL = 60.0  # seconds
+
+
+def base_url(host, port):
+    """Return http://host:port, bracketing IPv6 literals"""
+    if ':' in host and not host.startswith('['):
+        host = f"[{host}]"
+    return f"http://{host}:{port}"
+
+
+def fetch_tags(host, port, timeout=DEFAULT_TIMEOUT):
+    """Return [{"name", "size"}] for the models installed on an Ollama server"""
+    with urllib.request.urlopen(base_url(host, port) + "/api/tags", timeout=timeout) as response:
+        data = json.load(response)
+    models = []
+    for model in data.get("models", []):
+        name = model.get("name") or model.get("model")
+        if name:
+            models.append({"name": name, "size": int(model.get("size") or 0)})
+    return models
+
+
+def tag_key(name):
+    """Comparable form of an Ollama model name (llama3.3 == llama3.3:latest)"""
+    if name.startswith('ollama/'):
+        name = name[7:]
+    return name if ':' in name else name + ":latest"
+
+
+def format_size(size):
+    """Human readable model size"""
+    if not size:
+        return ""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit in ("B", "KB") else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _idle_add(func, *args):
+    from gi.repository import GLib
+    GLib.idle_add(func, *args)
+
+
+class OllamaDiscovery:
+    """Cached, non-blocking /api/tags lookups keyed by host:port"""
+
+    def __init__(self, ttl=CACHE_TTL, timeout=DEFAULT_TIMEOUT, dispatch=_idle_add):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.dispatch = dispatch
+        self._cache = {}  # host:port -> (fetched_at, models)
+        self._pending = {}  # host:port -> callbacks waiting on a running fetch
+        self._lock = threading.Lock()
+
+    def cached(self, host, port):
+        """Return cached models for a server if still fresh, else None"""
+        with self._lock:
+            entry = self._cache.get(f"{host}:{port}")
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def discover(self, host, port, callback, force=False):
+        """Look up models in the background; callback(models, error) runs via dispatch"""
+        if not force:
+            models = self.cached(host, port)
+            if models is not None:
+                self._deliver(callback, models, None)
+                return
+
+        key = f"{host}:{port}"
+        with self._lock:
+            if key in self._pending:
+                # Join the lookup already in flight
+                self._pending[key].append(callback)
+                return
+            self._pending[key] = [callback]
+
+        worker = threading.Thread(target=self._worker, args=(host, port, key), daemon=True)
+        worker.start()
+
+    def _worker(self, host, port, key):
+        models, error = None, None
+        try:
+            models = fetch_tags(host, port, self.timeout)
+        except Exception as e:
+            error = e
+
+        with self._lock:
+            if models is not None:
+                self._cache[key] = (time.monotonic(), models)
+            callbacks = self._pending.pop(key, [])
+        for callback in callbacks:
+            self._deliver(callback, models, error)
+
+    def _deliver(self, callback, models, error):
+        def run():
+            callback(models, error)
+            return False
+        self.dispatch(run)
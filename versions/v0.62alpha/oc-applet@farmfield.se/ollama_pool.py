@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Pool of Ollama endpoints with health probing and latency-based routing.
+The ollama section of menu.json lists several servers under "endpoints".
+Probes run concurrently on a small thread pool. An endpoint is up when
+/api/tags answers; that round trip is its network latency. /api/ps tells
+which models are already in memory, and only a loaded model has its first
+token timed (a one-token generate request), so probing never loads or
+evicts a model; the smoothed time-to-first-token per model persists
+between runs and a slow or failed timing doesn't mark the endpoint down.
+Routing an ollama/ model picks a healthy endpoint that has it, preferring
+one where it is loaded, then the fastest first token, then the shortest
+round trip, and writes that endpoint back as the section's ip/port, and
+into the gateway's models.providers.ollama.baseUrl in openclaw.json when
+that is configured.
+
+Usage: ollama_pool.py probe
+       ollama_pool.py route <model>
+"""
+import json
+import os
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import openclaw_json
+from config_store import ConfigConflictError, ConfigStore, atomic_write_json
+from ollama_discovery import base_url, fetch_tags, tag_key
+from runtime import CACHE_DIR
+
+STATE_PATH = os.path.join(CACHE_DIR, "ollama-pool.json")
+
+PROBE_WORKERS = 4
+PROBE_TIMEOUT = 5.0  # seconds per request
+PROBE_MAX_AGE = 30.0  # seconds before route() probes again
+LATENCY_ALPHA = 0.3  # weight of the newest sample in the smoothed latency
+DEFAULT_ENDPOINT = {"ip": "127.0.0.1", "port": 11434}
+PROVIDER_URL_PATH = "models.providers.ollama.baseUrl"  # in openclaw.json
+
+
+def measure_ttft(host, port, model, timeout=PROBE_TIMEOUT):
+    """Seconds until the first streamed chunk of a one-token generate request"""
+    body = json.dumps({
+        "model": model,
+        "prompt": "hi",
+        "stream": True,
+        "options": {"num_predict": 1}
+    }).encode()
+    request = urllib.request.Request(base_url(host, port) + "/api/generate", data=body,
+                                     headers={"Content-Type": "application/json"})
+    start = time.monotonic()
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        if not response.readline():
+            raise IOError("empty generate response")
+        return time.monotonic() - start
+
+
+def fetch_loaded(host, port, timeout=PROBE_TIMEOUT):
+    """tag_key() of the models an Ollama server has in memory (GET /api/ps)"""
+    with urllib.request.urlopen(base_url(host, port) + "/api/ps", timeout=timeout) as response:
+        data = json.load(response)
+    return {tag_key(m.get("name") or m.get("model")) for m in data.get("models", [])
+            if m.get("name") or m.get("model")}
+
+
+def configured_endpoints(ollama):
+    """Endpoint dicts from a menu.json ollama section, old single-server form included"""
+    endpoints = []
+    seen = set()
+    for endpoint in ollama.get('endpoints') or [{"ip": ollama.get('ip'), "port": ollama.get('port')}]:
+        ip = str(endpoint.get('ip') or DEFAULT_ENDPOINT["ip"]).strip()
+        try:
+            port = int(endpoint.get('port') or DEFAULT_ENDPOINT["port"])
+        except (TypeError, ValueError):
+            continue
+        if (ip, port) not in seen:
+            seen.add((ip, port))
+            endpoints.append({"ip": ip, "port": port})
+    return endpoints
+
+
+def parse_endpoints(text):
+    """Endpoint dicts from "host:port, host:port" text; a bare host gets the default port"""
+    endpoints = []
+    for item in text.replace('\n', ',').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, sep, port = item.rpartition(':')
+        if not sep or not port.isdigit() or (':' in host and not host.endswith(']')):
+            host, port = item, DEFAULT_ENDPOINT["port"]
+        endpoints.append({"ip": host.strip('[]'), "port": int(port)})
+    return endpoints
+
+
+def format_endpoints(endpoints):
+    """Inverse of parse_endpoints"""
+    return ", ".join(f"[{e['ip']}]:{e['port']}" if ':' in e['ip'] else f"{e['ip']}:{e['port']}"
+                     for e in endpoints)
+
+
+class Endpoint:
+    """Health, round trip and per-model first-token latency of one Ollama server"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.healthy = False
+        self.rtt = None  # /api/tags round trip, seconds
+        self.ttft = {}  # tag_key() -> smoothed time-to-first-token, seconds
+        self.models = set()  # tag_key() of installed models
+        self.loaded = set()  # tag_key() of models in memory
+        self.error = None
+        self.checked_at = 0.0
+
+    @property
+    def key(self):
+        return f"{self.host}:{self.port}"
+
+    def record_ttft(self, model, sample):
+        key = tag_key(model)
+        if key not in self.ttft:
+            self.ttft[key] = sample
+        else:
+            self.ttft[key] = LATENCY_ALPHA * sample + (1 - LATENCY_ALPHA) * self.ttft[key]
+
+    def to_state(self):
+        return {"healthy": self.healthy, "rtt": self.rtt, "ttft": self.ttft, "models": sorted(self.models),
+                "loaded": sorted(self.loaded), "error": self.error, "checked_at": self.checked_at}
+
+    def load_state(self, state):
+        self.healthy = state.get("healthy", False)
+        self.rtt = state.get("rtt")
+        self.ttft = dict(state.get("ttft") or {})
+        self.models = set(state.get("models", []))
+        self.loaded = set(state.get("loaded", []))
+        self.error = state.get("error")
+        self.checked_at = state.get("checked_at", 0.0)
+
+
+class OllamaPool:
+    """Concurrent prober and router over a list of endpoints"""
+
+    def __init__(self, endpoints, state_path=STATE_PATH, workers=PROBE_WORKERS, timeout=PROBE_TIMEOUT):
+        self.endpoints = [Endpoint(e["ip"], int(e["port"])) for e in endpoints]
+        self.state_path = state_path
+        self.workers = workers
+        self.timeout = timeout
+        self._load_state()
+
+    def _load_state(self):
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+        except Exception:
+            return
+        for endpoint in self.endpoints:
+            if endpoint.key in state:
+                endpoint.load_state(state[endpoint.key])
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        try:
+            atomic_write_json(self.state_path, {e.key: e.to_state() for e in self.endpoints})
+        except Exception as e:
+            print(f"Error saving Ollama pool state: {e}")
+
+    def probe_endpoint(self, endpoint, model=None):
+        """Check one endpoint; times the requested model's first token only when it is already loaded"""
+        try:
+            start = time.monotonic()
+            installed = fetch_tags(endpoint.host, endpoint.port, self.timeout)
+            endpoint.rtt = time.monotonic() - start
+            endpoint.models = {tag_key(m["name"]) for m in installed}
+            endpoint.healthy = True
+            endpoint.error = None
+        except Exception as e:
+            endpoint.healthy = False
+            endpoint.loaded = set()
+            endpoint.error = str(e)
+            endpoint.checked_at = time.time()
+            return endpoint
+
+        try:
+            endpoint.loaded = fetch_loaded(endpoint.host, endpoint.port, self.timeout)
+        except Exception:
+            # Older servers have no /api/ps: nothing counts as loaded
+            endpoint.loaded = set()
+        if model and tag_key(model) in endpoint.loaded:
+            try:
+                name = model[7:] if model.startswith('ollama/') else model
+                endpoint.record_ttft(model, measure_ttft(endpoint.host, endpoint.port, name, self.timeout))
+            except Exception as e:
+                # A busy server is slow, not down
+                endpoint.error = f"first token: {e}"
+        endpoint.checked_at = time.time()
+        return endpoint
+
+    def probe_all(self, model=None):
+        """Probe every endpoint concurrently"""
+        if self.endpoints:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(self.endpoints))) as pool:
+                list(pool.map(lambda endpoint: self.probe_endpoint(endpoint, model), self.endpoints))
+        self._save_state()
+        return self.endpoints
+
+    def best_for(self, model):
+        """Healthy endpoint that has model installed: loaded first, then fastest first token and round trip"""
+        key = tag_key(model)
+        candidates = [e for e in self.endpoints if e.healthy and key in e.models]
+        if not candidates:
+            return None
+        inf = float("inf")
+        return min(candidates, key=lambda e: (key not in e.loaded, e.ttft.get(key, inf),
+                                              e.rtt if e.rtt is not None else inf))
+
+    def route(self, model, max_age=PROBE_MAX_AGE):
+        """Pick the endpoint for model, re-probing when the last check is stale or unusable"""
+        stale = any(time.time() - e.checked_at > max_age for e in self.endpoints)
+        if not stale:
+            best = self.best_for(model)
+            if best:
+                return best
+        self.probe_all(model)
+        return self.best_for(model)
+
+
+def route_model(model, store=None, pool=None):
+    """Route model and write the chosen endpoint to menu.json; returns the Endpoint or None"""
+    store = store or ConfigStore()
+    ollama = dict(store.menu_section('ollama', {}))
+    pool = pool or OllamaPool(configured_endpoints(ollama))
+    best = pool.route(model)
+    if best is None:
+        return None
+
+    if ollama.get('ip') != best.host or ollama.get('port') != best.port:
+        ollama['ip'] = best.host
+        ollama['port'] = best.port
+        ollama['custom_address'] = True
+        store.set_menu_section('ollama', ollama)
+        store.save()
+    sync_provider_url(best)
+    return best
+
+
+def sync_provider_url(endpoint, path=openclaw_json.OPENCLAW_JSON_PATH):
+    """Point openclaw.json's ollama provider at endpoint, keeping its URL path (/v1); True when it changed
+
+    Only an existing baseUrl is rewritten, by splicing that one value.
+    """
+    try:
+        current = openclaw_json.get(PROVIDER_URL_PATH, None, path)
+        if not isinstance(current, str):
+            return False
+        url = base_url(endpoint.host, endpoint.port) + urllib.parse.urlsplit(current).path
+        if url.rstrip('/') == current.rstrip('/'):
+            return False
+        return openclaw_json.set_value(PROVIDER_URL_PATH, url, path)
+    except (OSError, ValueError) as e:
+        print(f"Error updating {PROVIDER_URL_PATH}: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "probe":
+        store = ConfigStore()
+        pool = OllamaPool(configured_endpoints(store.menu_section('ollama', {})))
+        for endpoint in pool.probe_all():
+            rtt = f"{endpoint.rtt * 1000:.0f} ms" if endpoint.healthy and endpoint.rtt is not None else "-"
+            status = "up" if endpoint.healthy else f"down ({endpoint.error})"
+            print(f"{endpoint.key:<24} {status:<10} {rtt:>8}  {len(endpoint.models)} models, "
+                  f"{len(endpoint.loaded)} loaded")
+    elif len(sys.argv) >= 3 and sys.argv[1] == "route":
+        try:
+            best = route_model(sys.argv[2])
+        except ConfigConflictError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if best is None:
+            print(f"No healthy Ollama endpoint has {sys.argv[2]}", file=sys.stderr)
+            sys.exit(1)
+        print(base_url(best.host, best.port))
+    else:
+        print(__doc__.strip().split("\n\n")[-1])
+        sys.exit(1)
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Key-path index over ~/.openclaw/openclaw.json.
+Maps key paths (agents.defaults.model, agents.list.0.id) to the byte
+range of their value without building the document: in strict JSON the C
+decoder steps over the values beside the path, JSON5 is tokenized in one
+pass. The index is kept per file and reused while the file's mtime, size
+and inode are unchanged, so in a resident process a get is a stat and the
+decode of that one value. A set splices only the new value into the text (or inserts
+a member into the nearest existing object) and rewrites the file
+atomically; the rest of the file, comments and formatting included, stays
+byte for byte. The JSON5 the gateway accepts is tolerated: comments,
+trailing commas, unquoted keys and single-quoted strings.
+
+Paths are dotted; array items are addressed by index, keys containing dots
+by passing the path as a list.
+
+Usage: openclaw_json.py get <path>
+       openclaw_json.py set <path> <json value>
+       openclaw_json.py paths [prefix]
+"""
+import json
+import os
+import re
+import sys
+from json.decoder import scanstring
+
+OPENCLAW_JSON_PATH = os.path.expanduser("~/.openclaw/openclaw.json")
+INDENT = 2  # spaces per level for members inserted into an empty object
+
+# One token with the whitespace before it, or trailing whitespace; groups numbered as below
+_TOKEN = re.compile(rb"""\s*(?:
+    (//[^\n]*|/\*.*?\*/)
+  | ("[^"\\]*(?:\\.[^"\\]*)*"|'[^'\\]*(?:\\.[^'\\]*)*')
+  | ([{\[])
+  | ([}\]])
+  | (:)
+  | (,)
+  | ([^\s{}\[\]:,"'/]+)
+)|\s+""", re.S | re.X)
+_WS = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+_KINDS = {b"{": "object", b"[": "array"}
+_COMMENT, _STRING, _OPEN, _CLOSE, _COLON_TOKEN, _COMMA, _BARE = range(1, 8)
+_SINGLE_QUOTED = re.compile(rb'\\.|"', re.S)
+_SEP = "\x1f"  # joins path segments in index keys; can't occur in a config key
+_MISSING = object()
+_VALUE, _ITEM, _KEY, _COLON, _AFTER = range(5)  # what the scanner expects next
+
+_cache = {}  # file path -> (stamp, Index)
+
+
+class JsonIndexError(ValueError):
+    """openclaw.json can't be tokenized, or a path can't be set"""
+
+
+def _key(path):
+    """Index key of a dotted string or a list of segments"""
+    segments = path.split(".") if isinstance(path, str) else [str(s) for s in path]
+    return _SEP.join(s for s in segments if s != "")
+
+
+def _decode_key(token):
+    if token[:1] == b'"':
+        # Most keys have no escapes
+        return token[1:-1].decode() if b"\\" not in token else json.loads(token)
+    if token[:1] == b"'":
+        return _loads(token)
+    return token.decode()
+
+
+class Index:
+    """Byte ranges of the values in one version of the file
+
+    Containers are expanded on first use: in strict JSON the C decoder
+    locates an object's or array's members, stepping over their values
+    without keeping them; a file with JSON5 syntax is tokenized whole
+    instead. ranges maps index keys to (start, end); members maps an
+    object's key to its members as (segment, key start, value end) and an
+    array's key to its items as (index, item start, item end), both in
+    file order.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.ranges = {}
+        self.members = {}
+        self.kinds = {}
+        self._text = None  # latin-1 view of data: character offsets are byte offsets
+        self._complete = False
+        body = data.lstrip()
+        if body[:1] in (b"{", b"["):
+            start = len(data) - len(body)
+            # The end is settled when the root is expanded
+            self.ranges[""] = (start, len(data.rstrip()))
+            self.kinds[""] = _KINDS[body[:1]]
+        else:
+            # A leading comment, a scalar or nothing
+            self._scan_all()
+
+    def span(self, key):
+        """(start, end) of the value at an index key, or None"""
+        if not key:
+            self._expand("")
+            return self.ranges.get("")
+        span = self.ranges.get(key)
+        if span is not None or self._complete:
+            return span
+        parent = ""
+        for segment in key.split(_SEP):
+            self._expand(parent)
+            if self._complete:
+                return self.ranges.get(key)
+            parent = f"{parent}{_SEP}{segment}" if parent else segment
+            if parent not in self.ranges:
+                return None
+        return self.ranges[key]
+
+    def kind(self, key):
+        """"object", "array", "scalar" or None"""
+        return self.kinds.get(key) if self.span(key) else None
+
+    def children(self, key):
+        """Members of the object or items of the array at key"""
+        self._expand(key)
+        return self.members.get(key, [])
+
+    def _expand(self, key):
+        if self._complete or key in self.members or self.kinds.get(key) not in ("object", "array"):
+            return
+        try:
+            self.members[key] = self._strict_members(key)
+        except (ValueError, IndexError):
+            # JSON5 syntax somewhere: tokenize the whole file instead
+            self._scan_all()
+
+    def _strict_members(self, key):
+        if self._text is None:
+            self._text = self.data.decode("latin-1")
+        text = self._text
+        start = self.ranges[key][0]
+        is_object = text[start] == "{"
+        close = "}" if is_object else "]"
+        members = []
+        key_start = None
+        pos = _WS.match(text, start + 1).end()
+        while text[pos] != close:
+            if is_object:
+                if text[pos] != '"':
+                    raise ValueError("unquoted key")
+                key_start = pos
+                segment, pos = scanstring(text, pos + 1)
+                if not segment.isascii():
+                    segment = json.loads(self.data[key_start:pos])
+                pos = _WS.match(text, pos).end()
+                if text[pos] != ":":
+                    raise ValueError("expected ':'")
+                pos = _WS.match(text, pos + 1).end()
+            else:
+                segment = len(members)
+            value_start = pos
+            pos = _DECODER.raw_decode(text, pos)[1]
+            child = f"{key}{_SEP}{segment}" if key else str(segment)
+            self.ranges[child] = (value_start, pos)
+            self.kinds[child] = _KINDS.get(self.data[value_start:value_start + 1], "scalar")
+            members.append((segment, key_start if is_object else value_start, pos))
+            pos = _WS.match(text, pos).end()
+            if text[pos] == close:
+                break
+            if text[pos] != ",":
+                raise ValueError("expected ',' or a closing bracket")
+            pos = _WS.match(text, pos + 1).end()
+            if text[pos] == close:
+                raise ValueError("trailing comma")
+        if key == "":
+            if text[pos + 1:].strip():
+                raise ValueError("data after the document")
+            self.ranges[""] = (start, pos + 1)
+        return members
+
+    def _scan_all(self):
+        self.ranges, self.members, self.kinds = {}, {}, {}
+        self._scan(self.data)
+        self._complete = True
+        self._text = None
+
+    def _scan(self, data):
+        # One flat loop over the tokens; frames of the open containers are
+        # [key, is object, children, segment and key start of the member being read]
+        ranges, kinds = self.ranges, self.kinds
+        stack = []
+        state = _VALUE
+        key = ""
+        pos = 0
+        for match in _TOKEN.finditer(data):
+            if match.start() != pos:
+                break
+            pos = match.end()
+            group = match.lastindex
+            if group is None or group == _COMMENT:
+                continue
+            start = match.start(group)
+
+            if state == _VALUE or state == _ITEM:
+                if group == _STRING or group == _BARE:
+                    ranges[key] = (start, pos)
+                    kinds[key] = "scalar"
+                    if stack:
+                        self._child(stack[-1], start, pos)
+                    state = _AFTER
+                elif group == _OPEN:
+                    is_object = data[start] == 123  # {
+                    ranges[key] = [start, None]
+                    kinds[key] = "object" if is_object else "array"
+                    frame = [key, is_object, [], None, start]
+                    self.members[key] = frame[2]
+                    stack.append(frame)
+                    state = _KEY if is_object else self._item(frame)
+                elif group == _CLOSE and state == _ITEM and data[start] == 93:  # ]
+                    # Empty array, or after a trailing comma
+                    state = self._close(stack, pos)
+                else:
+                    raise JsonIndexError(f"unexpected {data[start:pos].decode()!r} at byte {start}")
+            elif state == _KEY:
+                if group == _STRING or group == _BARE:
+                    frame = stack[-1]
+                    frame[3] = _decode_key(data[start:pos])
+                    frame[4] = start
+                    state = _COLON
+                elif group == _CLOSE and data[start] == 125:  # }
+                    # Empty object, or after a trailing comma
+                    state = self._close(stack, pos)
+                else:
+                    raise JsonIndexError(f"expected a key at byte {start}")
+            elif state == _COLON:
+                if group != _COLON_TOKEN:
+                    raise JsonIndexError(f"expected ':' at byte {start}")
+                frame = stack[-1]
+                key = f"{frame[0]}{_SEP}{frame[3]}" if frame[0] else frame[3]
+                state = _VALUE
+            else:
+                if not stack:
+                    raise JsonIndexError(f"unexpected data after the document at byte {start}")
+                frame = stack[-1]
+                if group == _COMMA:
+                    state = _KEY if frame[1] else self._item(frame)
+                elif group == _CLOSE and data[start] == (125 if frame[1] else 93):
+                    state = self._close(stack, pos)
+                else:
+                    raise JsonIndexError(f"expected ',' or a closing bracket at byte {start}")
+            if state == _ITEM:
+                key = self._item_key(stack[-1])
+        if pos != len(data):
+            raise JsonIndexError(f"unexpected character at byte {pos}")
+        if stack or (state != _AFTER and ranges):
+            raise JsonIndexError("openclaw.json ends early")
+
+    @staticmethod
+    def _item(frame):
+        frame[4] = None
+        return _ITEM
+
+    @staticmethod
+    def _item_key(frame):
+        index = str(len(frame[2]))
+        return f"{frame[0]}{_SEP}{index}" if frame[0] else index
+
+    def _child(self, frame, start, end):
+        if frame[1]:
+            frame[2].append((frame[3], frame[4], end))
+        else:
+            frame[2].append((len(frame[2]), start, end))
+
+    def _close(self, stack, end):
+        frame = stack.pop()
+        span = self.ranges[frame[0]]
+        span[1] = end
+        self.ranges[frame[0]] = tuple(span)
+        if stack:
+            self._child(stack[-1], span[0], end)
+        return _AFTER
+
+    def paths(self, prefix=""):
+        """Dotted paths under prefix, in file order"""
+        if not self._complete:
+            self._scan_all()
+        key = _key(prefix)
+        return [k.replace(_SEP, ".") for k in self.ranges
+                if k and (not key or k == key or k.startswith(key + _SEP))]
+
+
+def _stamp(st):
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def index(path=OPENCLAW_JSON_PATH):
+    """Index of the file as it is now; rebuilt only when its stamp changed"""
+    st = os.stat(path)
+    cached = _cache.get(path)
+    if cached and cached[0] == _stamp(st):
+        return cached[1]
+    with open(path, 'rb') as f:
+        data = f.read()
+        # Stamped from the handle, so a write racing the read can't be cached as this content
+        stamp = _stamp(os.fstat(f.fileno()))
+    result = Index(data)
+    _cache[path] = (stamp, result)
+    return result
+
+
+def _loads(data):
+    """Decode one value; JSON5 syntax is rewritten to JSON first"""
+    try:
+        return json.loads(data)
+    except ValueError:
+        pass
+    parts = []
+    for match in _TOKEN.finditer(data):
+        group = match.lastindex
+        if group is None or group == _COMMENT:
+            continue
+        token = match.group(group)
+        if group == _STRING and token[:1] == b"'":
+            token = b'"' + _SINGLE_QUOTED.sub(_requote, token[1:-1]) + b'"'
+        elif group == _CLOSE and parts and parts[-1] == b",":
+            parts.pop()
+        elif group == _COLON_TOKEN and parts and parts[-1][:1] != b'"':
+            # An unquoted key
+            parts[-1] = json.dumps(parts[-1].decode()).encode()
+        parts.append(token)
+    try:
+        return json.loads(b"".join(parts))
+    except ValueError as e:
+        raise JsonIndexError(f"can't decode value: {e}") from None
+
+
+def _requote(match):
+    # \' needs no escape in double quotes, a bare " does
+    return {b"\\'": b"'", b'"': b'\\"'}.get(match.group(), match.group())
+
+
+def get(key_path, default=_MISSING, path=OPENCLAW_JSON_PATH):
+    """Value at a dotted path, read from its byte range; default (else KeyError) when absent"""
+    try:
+        idx = index(path)
+        span = idx.span(_key(key_path))
+    except FileNotFoundError:
+        span = None
+    if span is None:
+        if default is _MISSING:
+            raise KeyError(key_path)
+        return default
+    return _loads(idx.data[span[0]:span[1]])
+
+
+def _indent_at(data, pos):
+    line_start = data.rfind(b"\n", 0, pos) + 1
+    line = data[line_start:pos]
+    return line[:len(line) - len(line.lstrip())].decode()
+
+
+def _member_indent(data, members):
+    """Indent for a member added after members, taken from the last one that starts its own line
+
+    In a compact object such as {"a": {...},\n "b": 1} whose members all share a line with
+    something else, the new one lines up under the last member instead.
+    """
+    for _, key_start, _ in reversed(members):
+        line_start = data.rfind(b"\n", 0, key_start) + 1
+        if not data[line_start:key_start].strip():
+            return data[line_start:key_start].decode()
+    key_start = members[-1][1]
+    line_start = data.rfind(b"\n", 0, key_start) + 1
+    return " " * len(data[line_start:key_start].decode(errors="replace"))
+
+
+def _render(value, indent):
+    """JSON text of value, continuation lines indented to sit at indent"""
+    text = json.dumps(value, indent=INDENT, ensure_ascii=False)
+    return text.replace("\n", "\n" + indent).encode()
+
+
+def _splice(data, idx, key_path, value):
+    """data with value set at key_path: the old value replaced, or a member added to the deepest existing object"""
+    key = _key(key_path)
+    span = idx.span(key)
+    if span is not None:
+        return data[:span[0]] + _render(value, _indent_at(data, span[0])) + data[span[1]:]
+
+    segments = key.split(_SEP)
+    for depth in range(len(segments) - 1, -1, -1):
+        parent = _SEP.join(segments[:depth])
+        if idx.span(parent) is not None:
+            break
+    if idx.kind(parent) != "object":
+        raise JsonIndexError(f"can't add {'.'.join(segments[depth:])} under {parent.replace(_SEP, '.') or 'the root'}: "
+                             f"not an object")
+    for segment in reversed(segments[depth + 1:]):
+        value = {segment: value}
+    name = segments[depth]
+
+    members = idx.children(parent)
+    start, end = idx.span(parent)
+    if members:
+        last_end = members[-1][2]
+        indent = _member_indent(data, members)
+        single_line = b"\n" not in data[start:end]
+        gap = b", " if single_line else b",\n" + indent.encode()
+        rendered = json.dumps(value, ensure_ascii=False).encode() if single_line else _render(value, indent)
+        member = json.dumps(name).encode() + b": " + rendered
+        return data[:last_end] + gap + member + data[last_end:]
+    outer = _indent_at(data, start)
+    indent = outer + " " * INDENT
+    member = json.dumps(name).encode() + b": " + _render(value, indent)
+    return data[:start] + b"{\n" + indent.encode() + member + b"\n" + outer.encode() + b"}" + data[end:]
+
+
+def patch(changes, path=OPENCLAW_JSON_PATH):
+    """Set {dotted path: value} pairs and write the file once, atomically; True when it changed"""
+    with open(path, 'rb') as f:
+        data = f.read()
+        stamp = _stamp(os.fstat(f.fileno()))
+    cached = _cache.get(path)
+    idx = cached[1] if cached and cached[0] == stamp else Index(data)
+    original = data
+    for n, (key_path, value) in enumerate(changes.items()):
+        if n:
+            # The previous splice moved the ranges after it
+            idx = Index(data)
+        data = _splice(data, idx, key_path, value)
+    if data == original:
+        return False
+    # Imported on first use: readers never write
+    from config_store import atomic_write
+    atomic_write(path, data)
+    # Indexed again by the next read
+    _cache.pop(path, None)
+    return True
+
+
+def set_value(key_path, value, path=OPENCLAW_JSON_PATH):
+    """Set one path; True when the file changed"""
+    return patch({key_path: value}, path)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    try:
+        if len(args) == 2 and args[0] == "get":
+            print(json.dumps(get(args[1]), indent=INDENT, ensure_ascii=False))
+        elif len(args) == 3 and args[0] == "set":
+            try:
+                value = json.loads(args[2])
+            except ValueError:
+                # A bare word is a string
+                value = args[2]
+            print("Updated" if set_value(args[1], value) else "Unchanged")
+        elif len(args) in (1, 2) and args[0] == "paths":
+            for key_path in index().paths(args[1] if len(args) == 2 else ""):
+                print(key_path)
+        else:
+            print(__doc__.strip().split("\n\n")[-1], file=sys.stderr)
+            sys.exit(1)
+    except KeyError as e:
+        print(f"No such path: {e.args[0]}", file=sys.stderr)
+        sys.exit(1)
+    except (OSError, JsonIndexError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Locations and process helpers shared by the applet's helper scripts.
+RUNTIME_DIR holds the sockets, locks and status files of the resident
+helpers, CACHE_DIR what outlives a session (logs, results, indexes).
+Cheap to import: menu_snapshot and the settings CLI load it on every run.
+"""
+import os
+import signal
+
+RUNTIME_DIR = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or f"/tmp/oc-applet-{os.getuid()}", "oc-applet")
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "oc-applet")
+
+
+def file_stamp(path):
+    """[mtime, size] of path, or None when it is missing"""
+    # Whole seconds, as the applet gets them from Gio's time::modified
+    try:
+        st = os.stat(path)
+        return [int(st.st_mtime), st.st_size]
+    except OSError:
+        return None
+
+
+def openclaw_bin():
+    """Locate the openclaw CLI (Cinnamon has limited PATH)"""
+    # Imported on first use: most callers only want the paths
+    import shutil
+    for candidate in (os.environ.get("OPENCLAW_BIN"), shutil.which("openclaw"),
+                      os.path.expanduser('~/.npm-global/bin/openclaw'), "/usr/bin/openclaw"):
+        if candidate and os.access(candidate, os.X_OK):
+            return candidate
+    return "openclaw"
+
+
+def exit_reason(status):
+    """'exit N' or 'killed by SIGNAME' from a waitpid status"""
+    code = os.waitstatus_to_exitcode(status)
+    if code < 0:
+        try:
+            return f"killed by {signal.Signals(-code).name}"
+        except ValueError:
+            return f"killed by signal {-code}"
+    return f"exit {code}"
+
+
+def exit_fd(pid):
+    """A file descriptor that turns readable when child pid exits, without reaping it"""
+    try:
+        return os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        import threading
+        read_fd, write_fd = os.pipe()
+
+        def wait():
+            try:
+                os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+            finally:
+                os.close(write_fd)
+        threading.Thread(target=wait, daemon=True).start()
+        return read_fd
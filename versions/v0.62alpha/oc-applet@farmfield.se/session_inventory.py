@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Cached inventory of the gateway's sessions.
+Lists the session keys once (gateway sessions.list, else the agents'
+session stores under ~/.openclaw) and publishes them to a small JSON file
+on the runtime dir together with the mtime/size of the files they came
+from. A read is a local file read: the inventory counts as fresh for TTL
+seconds and until one of those files changes. A stale inventory is still
+returned while a background refresh replaces it, so neither the applet
+menu nor switch_model.py waits on the gateway or the CLI to expand a
+session glob.
+
+Usage: session_inventory.py                 print the sessions, refreshing if stale
+       session_inventory.py refresh         list the sessions now and publish them
+       session_inventory.py refresh-if-stale
+"""
+import fcntl
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+from config_store import atomic_write_json
+from runtime import RUNTIME_DIR, file_stamp
+
+INVENTORY_PATH = os.path.join(RUNTIME_DIR, "sessions.json")
+LOCK_PATH = os.path.join(RUNTIME_DIR, "sessions.lock")
+OPENCLAW_DIR = os.path.expanduser("~/.openclaw")
+SESSION_STORES = os.path.join(OPENCLAW_DIR, "agents", "*", "sessions", "sessions.json")
+
+INVENTORY_VERSION = 1
+TTL = 60  # seconds an unchanged inventory stays fresh
+
+
+def watched_paths():
+    """Files whose change invalidates the inventory: config, agents dir and session stores"""
+    return [os.path.join(OPENCLAW_DIR, "openclaw.json"), os.path.join(OPENCLAW_DIR, "agents")] + \
+        sorted(glob.glob(SESSION_STORES))
+
+
+def stamps(paths=None):
+    return {path: file_stamp(path) for path in (watched_paths() if paths is None else paths)}
+
+
+def list_sessions():
+    """(sorted session keys, source) from the gateway, or read from the agents' session stores"""
+    # Imported on first use: a fresh inventory never needs the gateway
+    from gateway_client import GatewayClient, GatewayError
+    try:
+        client = GatewayClient().connect()
+        try:
+            payload = client.request("sessions.list", {}) or {}
+        finally:
+            client.close()
+        keys = [s.get("key") for s in payload.get("sessions", []) if isinstance(s, dict)]
+        if keys:
+            return sorted(k for k in keys if k), "gateway"
+    except GatewayError:
+        pass
+
+    keys = set()
+    for path in glob.glob(SESSION_STORES):
+        try:
+            with open(path, 'r') as f:
+                keys.update(json.load(f))
+        except Exception:
+            continue
+    return sorted(keys), "stores"
+
+
+def read(path=INVENTORY_PATH):
+    """Published inventory dict, or None"""
+    try:
+        with open(path, 'r') as f:
+            inventory = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(inventory, dict) or inventory.get("version") != INVENTORY_VERSION:
+        return None
+    return inventory
+
+
+def is_fresh(inventory, now=None):
+    """Within its TTL and none of the files it was listed from changed"""
+    if (now or time.time()) > inventory.get("generated", 0) + inventory.get("ttl", TTL):
+        return False
+    recorded = inventory.get("stores") or {}
+    return recorded == stamps(list(recorded)) and set(recorded) == set(watched_paths())
+
+
+def refresh(path=INVENTORY_PATH, lock_path=LOCK_PATH, force=False):
+    """List the sessions and publish them; one refresh at a time, others wait for its result"""
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    with open(lock_path, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        inventory = None if force else read(path)
+        if inventory and is_fresh(inventory):
+            # Published by the refresh we waited for
+            return inventory
+        # Stamped before listing, so a change during the listing invalidates the result
+        watched = stamps()
+        keys, source = list_sessions()
+        inventory = {"version": INVENTORY_VERSION, "generated": time.time(), "ttl": TTL,
+                     "source": source, "stores": watched, "sessions": keys}
+        atomic_write_json(path, inventory)
+        return inventory
+
+
+def refresh_in_background():
+    """Start a detached refresh"""
+    try:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "refresh-if-stale"],
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         start_new_session=True)
+    except OSError as e:
+        print(f"Session refresh not started: {e}", file=sys.stderr)
+
+
+def sessions(wait=False):
+    """Known session keys: the cached list, refreshed in the background when stale
+
+    With no inventory yet, or wait=True, a stale list is refreshed first.
+    """
+    inventory = read()
+    if inventory and is_fresh(inventory):
+        return inventory["sessions"]
+    if inventory is None or wait:
+        return refresh()["sessions"]
+    refresh_in_background()
+    return inventory["sessions"]
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "refresh":
+        inventory = refresh(force=True)
+        print(f"{len(inventory['sessions'])} sessions from {inventory['source']}")
+    elif command == "refresh-if-stale":
+        refresh()
+    elif command is None:
+        for key in sessions():
+            print(key)
+    else:
+        print(__doc__.strip().split("\n\n")[-1], file=sys.stderr)
+        sys.exit(1)
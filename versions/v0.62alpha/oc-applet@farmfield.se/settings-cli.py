@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Headless settings for scripted and fleet configuration.
+Edits menu.json and models.json through the same store and edit functions
+as the settings dialog, then writes the menu snapshot and diff so a
+running applet picks the change up. Gtk is never imported.
+
+Usage: settings-cli.py models list [--section catalog|manual|ollama] [--catalog [FILTER]] [--duplicates]
+       settings-cli.py models enable <id>...
+       settings-cli.py models disable <id>...
+       settings-cli.py menu list
+       settings-cli.py menu set <item> [--enable | --disable] [--label TEXT]
+       settings-cli.py menu sessions <key>...
+       settings-cli.py menu custom <1-3> [--title TEXT] [--command CMD] [--timeout SECONDS]
+       settings-cli.py ollama add <model> [--name NAME]
+       settings-cli.py ollama remove <model>
+       settings-cli.py ollama endpoints "host:port, host:port" [--enable | --disable]
+       settings-cli.py apply-profile <file.json>
+Options: --dir DIR (applet data dir), --dry-run, --force (overwrite external edits)
+"""
+import argparse
+import json
+import os
+import sys
+
+from config_store import APPLET_DIR, ConfigConflictError, ConfigStore
+from menu_snapshot import write_snapshot
+from settings_ops import (MENU_ITEMS, set_catalog_models, set_custom_item, set_manual_models, set_menu_item,
+                          set_ollama, set_sessions)
+
+
+class ProfileError(ValueError):
+    """A profile file doesn't have the expected shape"""
+
+
+def _ollama_models(store):
+    """(model, name) pairs of the configured Ollama models, prefix stripped"""
+    return [(r.id[len("ollama/"):], r.entry.get('name', '')) for r in store.registry.by_source("ollama")]
+
+
+def _write_ollama(store, models=None, **changes):
+    ollama = store.menu_section('ollama', {})
+    settings = {
+        'enabled': ollama.get('enabled', False),
+        'custom_address': ollama.get('custom_address', False),
+        'ip': ollama.get('ip', '127.0.0.1'),
+        'port': ollama.get('port', 11434),
+        'endpoints': ollama.get('endpoints') or []
+    }
+    settings.update(changes)
+    set_ollama(store, models=_ollama_models(store) if models is None else models, **settings)
+
+
+# models
+
+def models_list(store, args):
+    if args.catalog is not None:
+        from model_catalog import load_catalog
+        enabled = store.registry.ids("catalog")
+        needle = args.catalog.lower()
+        for model in load_catalog():
+            if needle in f"{model['id']} {model['name']} {model['group']}".lower():
+                print(f"{'*' if model['id'] in enabled else ' '} {model['id']:<50} {model['name']}")
+        return
+    if args.duplicates:
+        for records in store.registry.duplicates():
+            print(", ".join(record.raw_id for record in records))
+        return
+    sections = [args.section] if args.section else ["catalog", "manual", "ollama"]
+    for section in sections:
+        for model in store.model_entries(section):
+            print(f"{section:<8} {model.get('id', ''):<50} {model.get('name', '')}")
+
+
+def models_enable(store, args):
+    for model_id in args.ids:
+        if model_id.startswith(("manual_", "ollama/")):
+            raise ValueError(f"{model_id}: use 'ollama add' or a profile's \"manual\" list for these")
+    from model_catalog import load_catalog
+    known = {model['id'] for model in load_catalog()}
+    for model_id in args.ids:
+        if model_id not in known:
+            print(f"Warning: {model_id} is not in the catalog", file=sys.stderr)
+        same = [r.raw_id for r in store.registry.same_model(model_id) if r.raw_id != model_id]
+        if same:
+            print(f"Warning: {model_id} is the same model as {', '.join(same)}", file=sys.stderr)
+    current = [m.get('id') for m in store.model_entries("catalog")]
+    set_catalog_models(store, current + args.ids)
+
+
+def models_disable(store, args):
+    ids = set(args.ids)
+    set_catalog_models(store, [m.get('id') for m in store.model_entries("catalog") if m.get('id') not in ids])
+    manual = store.registry.by_source("manual")
+    if any(r.raw_id in ids or r.id in ids for r in manual):
+        set_manual_models(store, [(r.entry.get('name', ''), r.id) for r in manual
+                                  if r.raw_id not in ids and r.id not in ids])
+    ollama = _ollama_models(store)
+    if any(f"ollama/{model}" in ids for model, _ in ollama):
+        _write_ollama(store, models=[(model, name) for model, name in ollama if f"ollama/{model}" not in ids])
+
+
+# menu
+
+def menu_list(store, args):
+    for item_id in MENU_ITEMS:
+        item = store.menu_section(item_id, {})
+        state = "on" if item and item.get('enabled', True) else "off"
+        print(f"{item_id:<14} {state:<4} {item.get('label') or item.get('text') or ''}")
+    sessions = store.menu_section('oc_models', {}).get('sessions') or ["agent:main:main"]
+    print(f"{'sessions':<14}      {' '.join(sessions)}")
+    for i in range(1, 4):
+        item = store.menu_section(f"custom_{i}")
+        if item:
+            timeout = f" (timeout {item['timeout']}s)" if item.get('timeout') else ""
+            print(f"{'custom_' + str(i):<14} {'on' if item.get('enabled', True) else 'off':<4} "
+                  f"{item.get('title', '')}: {item.get('command', '')}{timeout}")
+
+
+def menu_set(store, args):
+    set_menu_item(store, args.item, enabled=args.enabled, label=args.label)
+
+
+def menu_sessions(store, args):
+    set_sessions(store, args.keys)
+
+
+def menu_custom(store, args):
+    current = store.menu_section(f"custom_{args.slot}", {})
+    title = current.get('title', '') if args.title is None else args.title
+    command = current.get('command', '') if args.command is None else args.command
+    set_custom_item(store, args.slot, title, command, args.timeout)
+
+
+# ollama
+
+def ollama_add(store, args):
+    model = args.model[7:] if args.model.startswith("ollama/") else args.model
+    models = [(m, name) for m, name in _ollama_models(store) if m != model]
+    _write_ollama(store, models=models + [(model, args.name or model)])
+
+
+def ollama_remove(store, args):
+    model = args.model[7:] if args.model.startswith("ollama/") else args.model
+    models = _ollama_models(store)
+    if not any(m == model for m, _ in models):
+        raise ValueError(f"ollama/{model} is not configured")
+    _write_ollama(store, models=[(m, name) for m, name in models if m != model])
+
+
+def ollama_endpoints(store, args):
+    # Same parsing as the Local tab's address fields; the first server is the primary
+    from ollama_pool import configured_endpoints, parse_endpoints
+    endpoints = configured_endpoints({"endpoints": parse_endpoints(args.endpoints)})
+    if not endpoints:
+        raise ValueError("no endpoints given")
+    changes = {'ip': endpoints[0]['ip'], 'port': endpoints[0]['port'], 'endpoints': endpoints,
+               'custom_address': True}
+    if args.enabled is not None:
+        changes['enabled'] = args.enabled
+    _write_ollama(store, **changes)
+
+
+# profiles
+
+_KINDS = {dict: "an object", list: "a list", str: "a string", int: "a number", bool: "true or false"}
+
+
+def _expect(value, kind, key):
+    """value when it has the JSON type kind, else ProfileError naming key"""
+    # bool is an int subclass, but true is no timeout
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise ProfileError(f"{key} must be {_KINDS[kind]}")
+    return value
+
+
+def _strings(value, key):
+    return [_expect(item, str, f"{key}[{i}]") for i, item in enumerate(_expect(value, list, key))]
+
+
+def apply_profile(store, profile):
+    """Apply a profile dict; every key is optional
+
+    {"menu": {"<item>": {"enabled": bool, "label": str}}, "sessions": [...],
+     "custom": {"1": {"title", "command", "timeout"}}, "models": [ids] or {"enable": [...], "disable": [...]},
+     "manual": [{"name", "id"}], "ollama": {"enabled", "endpoints": "host:port, ...", "models": [...]}}
+    """
+    if not isinstance(profile, dict):
+        raise ProfileError("profile must be a JSON object")
+    unknown = set(profile) - {"menu", "sessions", "custom", "models", "manual", "ollama"}
+    if unknown:
+        raise ProfileError(f"unknown profile keys: {', '.join(sorted(unknown))}")
+
+    for item_id, item in _expect(profile.get("menu", {}), dict, "menu").items():
+        key = f"menu.{item_id}"
+        _expect(item, dict, key)
+        enabled, label = item.get("enabled"), item.get("label", item.get("text"))
+        if enabled is not None:
+            _expect(enabled, bool, f"{key}.enabled")
+        if label is not None:
+            _expect(label, str, f"{key}.label")
+        set_menu_item(store, item_id, enabled=enabled, label=label)
+    if "sessions" in profile:
+        set_sessions(store, _strings(profile["sessions"], "sessions"))
+    for slot, item in _expect(profile.get("custom", {}), dict, "custom").items():
+        key = f"custom.{slot}"
+        if not slot.isdigit():
+            raise ProfileError(f"{key}: slot must be a number")
+        _expect(item, dict, key)
+        title, command = item.get("title", ""), item.get("command", "")
+        _expect(title, str, f"{key}.title")
+        _expect(command, str, f"{key}.command")
+        timeout = item.get("timeout")
+        if timeout is not None:
+            _expect(timeout, int, f"{key}.timeout")
+        set_custom_item(store, int(slot), title, command, timeout)
+
+    models = profile.get("models")
+    if isinstance(models, list):
+        set_catalog_models(store, _strings(models, "models"))
+    elif isinstance(models, dict):
+        unknown = set(models) - {"enable", "disable"}
+        if unknown:
+            raise ProfileError(f"unknown models keys: {', '.join(sorted(unknown))}")
+        current = [m.get('id') for m in store.model_entries("catalog")] + \
+            _strings(models.get("enable", []), "models.enable")
+        disabled = set(_strings(models.get("disable", []), "models.disable"))
+        set_catalog_models(store, [model_id for model_id in current if model_id not in disabled])
+    elif models is not None:
+        raise ProfileError("models must be a list of IDs or {\"enable\": [...], \"disable\": [...]}")
+
+    if "manual" in profile:
+        manual = []
+        for i, m in enumerate(_expect(profile["manual"], list, "manual")):
+            key = f"manual[{i}]"
+            _expect(m, dict, key)
+            manual.append((_expect(m.get("name", ""), str, f"{key}.name"), _expect(m.get("id", ""), str, f"{key}.id")))
+        set_manual_models(store, manual)
+
+    ollama = profile.get("ollama")
+    if ollama is not None:
+        _expect(ollama, dict, "ollama")
+        changes = {}
+        if "enabled" in ollama:
+            changes['enabled'] = _expect(ollama["enabled"], bool, "ollama.enabled")
+        if "endpoints" in ollama:
+            from ollama_pool import configured_endpoints, parse_endpoints
+            endpoints = configured_endpoints({"endpoints": parse_endpoints(
+                _expect(ollama["endpoints"], str, "ollama.endpoints"))})
+            if not endpoints:
+                raise ProfileError("ollama.endpoints: no endpoints given")
+            changes.update(ip=endpoints[0]['ip'], port=endpoints[0]['port'], endpoints=endpoints,
+                           custom_address=True)
+        models = None
+        if "models" in ollama:
+            models = []
+            for i, m in enumerate(_expect(ollama["models"], list, "ollama.models")):
+                key = f"ollama.models[{i}]"
+                if isinstance(m, str):
+                    models.append((m, m))
+                    continue
+                model = _expect(_expect(m, dict, key).get("model"), str, f"{key}.model")
+                models.append((model, _expect(m.get("name") or model, str, f"{key}.name")))
+        _write_ollama(store, models=models, **changes)
+
+
+def profile_command(store, args):
+    try:
+        with open(args.file, 'r') as f:
+            profile = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ProfileError(f"{args.file}: {e}")
+    apply_profile(store, profile)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="settings-cli.py", description="Change OC-Applet settings without the dialog")
+    parser.add_argument("--dir", default=APPLET_DIR, help="applet data dir holding menu.json and models.json")
+    parser.add_argument("--dry-run", action="store_true", help="show what would change, write nothing")
+    parser.add_argument("--force", action="store_true", help="save even if the files changed on disk meanwhile")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    models = commands.add_parser("models").add_subparsers(dest="action", required=True)
+    listing = models.add_parser("list")
+    listing.add_argument("--section", choices=["catalog", "manual", "ollama"])
+    listing.add_argument("--catalog", nargs="?", const="", help="list the catalog, * marks enabled")
+    listing.add_argument("--duplicates", action="store_true",
+                         help="list models enabled more than once (e.g. openrouter/x/y and x/y)")
+    listing.set_defaults(func=models_list, writes=False)
+    enable = models.add_parser("enable")
+    enable.add_argument("ids", nargs="+")
+    enable.set_defaults(func=models_enable)
+    disable = models.add_parser("disable")
+    disable.add_argument("ids", nargs="+")
+    disable.set_defaults(func=models_disable)
+
+    menu = commands.add_parser("menu").add_subparsers(dest="action", required=True)
+    menu.add_parser("list").set_defaults(func=menu_list, writes=False)
+    item = menu.add_parser("set")
+    item.add_argument("item", choices=MENU_ITEMS)
+    toggle = item.add_mutually_exclusive_group()
+    toggle.add_argument("--enable", dest="enabled", action="store_true", default=None)
+    toggle.add_argument("--disable", dest="enabled", action="store_false")
+    item.add_argument("--label")
+    item.set_defaults(func=menu_set)
+    sessions = menu.add_parser("sessions")
+    sessions.add_argument("keys", nargs="*")
+    sessions.set_defaults(func=menu_sessions)
+    custom = menu.add_parser("custom")
+    custom.add_argument("slot", type=int, choices=range(1, 4))
+    custom.add_argument("--title")
+    custom.add_argument("--command")
+    custom.add_argument("--timeout", type=int, help="seconds before the run is killed, 0 for the default")
+    custom.set_defaults(func=menu_custom)
+
+    ollama = commands.add_parser("ollama").add_subparsers(dest="action", required=True)
+    add = ollama.add_parser("add")
+    add.add_argument("model")
+    add.add_argument("--name")
+    add.set_defaults(func=ollama_add)
+    remove = ollama.add_parser("remove")
+    remove.add_argument("model")
+    remove.set_defaults(func=ollama_remove)
+    endpoints = ollama.add_parser("endpoints")
+    endpoints.add_argument("endpoints")
+    toggle = endpoints.add_mutually_exclusive_group()
+    toggle.add_argument("--enable", dest="enabled", action="store_true", default=None)
+    toggle.add_argument("--disable", dest="enabled", action="store_false")
+    endpoints.set_defaults(func=ollama_endpoints)
+
+    profile = commands.add_parser("apply-profile")
+    profile.add_argument("file")
+    profile.set_defaults(func=profile_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    store = ConfigStore(os.path.join(args.dir, "menu.json"), os.path.join(args.dir, "models.json"))
+    try:
+        args.func(store, args)
+        if not getattr(args, "writes", True):
+            return 0
+        if args.dry_run:
+            for name in (store.MENU, store.MODELS):
+                sections = sorted(store.dirty_sections(name))
+                if sections:
+                    print(f"Would change {store.paths[name]}: {', '.join(sections)}")
+            return 0
+        if store.is_dirty():
+            store.save(force=args.force)
+            write_snapshot(store, os.path.join(args.dir, "menu-compiled.json"), os.path.join(args.dir, "menu-diff.json"))
+    except (ValueError, ConfigConflictError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,48 @@
 #!/usr/bin/env python3
+import time
+
+# Reference point for the --timing time-to-first-frame report
+START_TIME = time.perf_counter()
+
+import sys
 import gi
-import json
-import os
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
+from gi.repository import Gio, Gtk
+
+# Only what the Menu tab needs is imported here; the other tabs, Save and the
+# Ollama helpers import theirs on first use (dev/bench_startup.py keeps it that way)
+from config_store import ConfigStore, ConfigConflictError
+from settings_ops import (set_catalog_models, set_custom_item, set_manual_models, set_menu_item,
+                          set_ollama, set_sessions)
+
+# Single-instance ID; later launches only present the resident window
+APP_ID = "se.farmfield.OcApplet.Settings"
 
-MODELS_JSON_PATH = os.path.expanduser("~/.local/share/cinnamon/applets/oc-applet@farmfield.se/models.json")
+# Model List tab store columns
+MODEL_COL_ENABLED = 0
+MODEL_COL_ID = 1
+MODEL_COL_NAME = 2
+MODEL_COL_GROUP = 3
+MODEL_COL_SEARCH = 4
+
+# Local Models tab store columns
+OLLAMA_COL_ENABLED = 0
+OLLAMA_COL_MODEL = 1
+OLLAMA_COL_NAME = 2
+OLLAMA_COL_SIZE = 3
 
 class SettingsWindow(Gtk.Dialog):
-    def __init__(self):
+    def __init__(self, store=None):
         super().__init__(title="OC Applet Settings")
         self.set_default_size(650, 500)
         
-        # Track all checkboxes and their model IDs
-        self.model_checkboxes = {}
+        # menu.json and models.json, parsed once and shared by all tabs
+        self.store = store or ConfigStore()
+        
+        # Installed-model lookups for the Local Models tab, created with the tab
+        self.ollama_discovery = None
+        # Session switches picked in the dialog run once, on Save
+        self._command_queue = None
         
         # Add buttons
         self.add_button("Cancel", Gtk.ResponseType.CANCEL)
@@ -28,67 +57,123 @@ class SettingsWindow(Gtk.Dialog):
         notebook = Gtk.Notebook()
         notebook.set_tab_pos(Gtk.PositionType.TOP)
         
-        # Tab 1: Menu
-        tab_menu = self._create_menu_tab()
-        notebook.append_page(tab_menu, Gtk.Label(label="Menu"))
-        
-        # Tab 2: Model List
-        tab1 = self._create_model_list_tab()
-        notebook.append_page(tab1, Gtk.Label(label="Model List"))
+        # Tabs are empty pages until first shown; each builder loads its own data
+        self._tabs = [
+            ("menu", "Menu", self._create_menu_tab),
+            ("models", "Model List", self._create_model_list_tab),
+            ("manual", "Model List (manual)", self._create_manual_tab),
+            ("local", "Local Models", self._create_local_tab)
+        ]
+        self._built_tabs = set()
         
-        # Tab 3: Model List (manual)
-        tab2 = self._create_manual_tab()
-        notebook.append_page(tab2, Gtk.Label(label="Model List (manual)"))
+        for tab_id, label, builder in self._tabs:
+            page = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+            notebook.append_page(page, Gtk.Label(label=label))
         
-        # Tab 4: Local Models
-        tab3 = self._create_local_tab()
-        notebook.append_page(tab3, Gtk.Label(label="Local Models"))
+        # Only the Menu tab is built before the first frame
+        self._build_tab(notebook.get_nth_page(0), 0)
+        notebook.connect("switch-page", self._on_switch_page)
         
         content.pack_start(notebook, True, True, 0)
         
-        # Load current models from JSON
-        self._load_models_from_json()
+        # The window itself is shown by present()/run(), so it can be pre-built hidden
+        content.show_all()
+    
+    def _on_switch_page(self, notebook, page, page_num):
+        self._build_tab(page, page_num)
+    
+    def _build_tab(self, page, page_num):
+        """Build a notebook tab the first time it is shown"""
+        tab_id, label, builder = self._tabs[page_num]
+        if tab_id in self._built_tabs:
+            return
+        self._built_tabs.add(tab_id)
+        tab = builder()
+        page.pack_start(tab, True, True, 0)
+        tab.show_all()
+    
+    def _is_tab_built(self, tab_id):
+        return tab_id in self._built_tabs
+    
+    @property
+    def command_queue(self):
+        if self._command_queue is None:
+            from command_queue import CommandQueue
+            self._command_queue = CommandQueue()
+        return self._command_queue
+    
+    def reload_config(self):
+        """Re-read menu.json/models.json and refresh every built tab"""
+        self.store.load()
+        if self._is_tab_built("menu"):
+            self._load_menu_settings()
+            self._load_custom_items()
+        if self._is_tab_built("models"):
+            self._load_models_from_json()
+        if self._is_tab_built("manual"):
+            self._load_manual_models()
+        if self._is_tab_built("local"):
+            self._load_ollama_settings()
+    
+    def save_settings(self):
+        """Collect every built tab into the store and write changed files"""
+        models_saved = self._save_models_to_json()
+        menu_saved = self._save_menu_settings()
+        custom_saved = self._save_custom_items()
+        manual_saved = self._save_manual_models()
+        ollama_saved = self._save_ollama_settings()
+        if not (models_saved and menu_saved and custom_saved and manual_saved and ollama_saved):
+            print("Failed to save settings")
+            return False
         
-        self.show_all()
+        # Write each changed file once, atomically
+        try:
+            self.store.save()
+            # The applet renders from this one file instead of merging both on every open
+            from menu_snapshot import write_snapshot
+            write_snapshot(self.store)
+            print("Settings saved")
+            if self._command_queue and self._command_queue.pending():
+                # Without --resident the window is destroyed right after Save:
+                # keep the process up until the switches have run
+                app = self.get_application()
+                if app:
+                    app.hold()
+                self._command_queue.flush(lambda results: self._on_commands_done(results, app))
+            return True
+        except ConfigConflictError as e:
+            print(f"Settings not saved: {e}")
+        except Exception as e:
+            print(f"Error writing settings: {e}")
+        return False
     
     def _load_models_from_json(self):
-        """Load existing models from JSON and check appropriate boxes"""
+        """Load existing models from JSON and tick the matching rows"""
         try:
-            if os.path.exists(MODELS_JSON_PATH):
-                with open(MODELS_JSON_PATH, 'r') as f:
-                    models = json.load(f)
-                    active_ids = {m['id'] for m in models}
-                    
-                    # Check boxes that are in the JSON
-                    for model_id, checkbox in self.model_checkboxes.items():
-                        checkbox.set_active(model_id in active_ids)
+            registry = self.store.registry
+            active_ids = registry.ids("catalog")
+            
+            # Keep enabled models that are no longer in the catalog, so Save doesn't drop them
+            for record in registry.by_source("catalog"):
+                if '/' in record.id and record.id not in self._model_iters:
+                    self._add_model_row(record.id, record.name, "Other")
+                    self._unindexed_ids.add(record.id)
+            
+            for row in self.model_store:
+                row[MODEL_COL_ENABLED] = row[MODEL_COL_ID] in active_ids
         except Exception as e:
             print(f"Error loading models: {e}")
     
     def _save_models_to_json(self):
         """Save checked models to JSON file"""
-        models = []
-        
-        for model_id, checkbox in self.model_checkboxes.items():
-            if checkbox.get_active():
-                # Get display name from label text (remove provider prefix for cleaner name)
-                parts = model_id.split('/')
-                if len(parts) >= 2:
-                    # Use last part as base name, title case it
-                    base_name = parts[-1].replace('-', ' ').title()
-                    provider = parts[-2].title() if len(parts) > 2 else parts[0].title()
-                    name = f"{provider} {base_name}"
-                else:
-                    name = model_id
-                
-                models.append({
-                    "id": model_id,
-                    "name": name
-                })
+        if not self._is_tab_built("models"):
+            return True  # Tab never opened, nothing changed
         
         try:
-            with open(MODELS_JSON_PATH, 'w') as f:
-                json.dump(models, f, indent=4)
+            models = set_catalog_models(self.store, [row[MODEL_COL_ID] for row in self.model_store
+                                                     if row[MODEL_COL_ENABLED]])
+            if self.catalog_index:
+                self.catalog_index.set_enabled(m["id"] for m in models)
             return True
         except Exception as e:
             print(f"Error saving models: {e}")
@@ -96,150 +181,142 @@ class SettingsWindow(Gtk.Dialog):
     
     def _save_menu_settings(self):
         """Save menu visibility settings to JSON"""
+        if not self._is_tab_built("menu"):
+            return True
+        
         try:
-            menu_json_path = os.path.expanduser("~/.local/share/cinnamon/applets/oc-applet@farmfield.se/menu.json")
-            
-            # Load existing or create new
-            if os.path.exists(menu_json_path):
-                with open(menu_json_path, 'r') as f:
-                    menu_config = json.load(f)
-            else:
-                menu_config = {}
-            
             # Update enabled states
-            default_labels = {
-                "oc_models": "OC Models",
-                "oc_start": "OC Start",
-                "oc_stop": "OC Stop",
-                "oc_restart": "OC Restart",
-                "oc_dashboard": "OC Dashboard",
-                "oc_json": "OC Json",
-                "oc_folder": "OC Folder",
-                "oc_doctor": "OC Doctor"
-            }
-            
             for item_id, checkbox in self.menu_checkboxes.items():
-                if item_id not in menu_config:
-                    menu_config[item_id] = {}
-                menu_config[item_id]['enabled'] = checkbox.get_active()
-                if 'label' not in menu_config[item_id] and item_id in default_labels:
-                    menu_config[item_id]['label' if item_id != 'credits' else 'text'] = default_labels[item_id]
-            
-            with open(menu_json_path, 'w') as f:
-                json.dump(menu_config, f, indent=4)
+                set_menu_item(self.store, item_id, enabled=checkbox.get_active())
+            set_sessions(self.store, self.sessions_entry.get_text().split())
             return True
         except Exception as e:
             print(f"Error saving menu settings: {e}")
             return False
     
-    def _add_model_checkbox(self, container, model_id, display_name):
-        """Add a checkbox for a model and track it"""
-        check = Gtk.CheckButton.new_with_label(display_name)
-        check.set_halign(Gtk.Align.START)
-        container.pack_start(check, False, False, 1)
-        self.model_checkboxes[model_id] = check
-        return check
-    
     def _create_model_list_tab(self):
-        scrolled = Gtk.ScrolledWindow()
-        scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        from gi.repository import Pango
+        from catalog_index import open_index
+        from model_catalog import load_catalog
         
-        # Main container
-        main_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=20)
-        main_box.set_border_width(10)
-        
-        # Left column
-        left_frame = Gtk.Frame(label="Providers")
-        left_frame.set_shadow_type(Gtk.ShadowType.NONE)
-        left_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
-        left_box.set_border_width(10)
-        left_frame.add(left_box)
-        
-        # Right column
-        right_frame = Gtk.Frame(label="OpenRouter Mirrors")
-        right_frame.set_shadow_type(Gtk.ShadowType.NONE)
-        right_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
-        right_box.set_border_width(10)
-        right_frame.add(right_box)
-        
-        # Left column providers
-        providers = [
-            ("Anthropic", [
-                ("anthropic/claude-opus-4.6", "Claude Opus 4.6"),
-                ("anthropic/claude-sonnet-4.5", "Claude Sonnet 4.5")
-            ]),
-            ("OpenAI", [
-                ("openai/gpt-5.3-codex", "GPT-5.3 Codex"),
-                ("openai/gpt-5.2", "GPT-5.2")
-            ]),
-            ("Google", [
-                ("google/gemini-3-pro", "Gemini 3 Pro"),
-                ("google/gemini-3-flash", "Gemini 3 Flash")
-            ]),
-            ("Moonshot AI", [
-                ("moonshot/kimi-k2.5", "Kimi K2.5")
-            ]),
-            ("MiniMax", [
-                ("minimax/minimax-m2.5", "Minimax M2.5")
-            ]),
-            ("Zhipu AI", [
-                ("zai/glm-5", "GLM-5")
-            ]),
-            ("DeepSeek", [
-                ("deepseek/deepseek-v3.2", "DeepSeek V3.2")
-            ]),
-            ("Alibaba", [
-                ("qwen/qwen-3.5-plus", "Qwen 3.5 Plus")
-            ]),
-            ("xAI", [
-                ("xai/grok-4.1-fast", "Grok 4.1 Fast")
-            ])
-        ]
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        box.set_border_width(10)
         
-        for provider_name, models in providers:
-            label = Gtk.Label()
-            label.set_markup(f"<b>{provider_name}</b>")
-            label.set_halign(Gtk.Align.START)
-            left_box.pack_start(label, False, False, 3)
-            
-            for model_id, display_name in models:
-                self._add_model_checkbox(left_box, model_id, f"{provider_name.lower()}/{display_name.lower().replace(' ', '-')}")
-            
-            left_box.pack_start(Gtk.Label(), False, False, 8)
-        
-        # Right column - OpenRouter
-        or_label = Gtk.Label()
-        or_label.set_markup("<b>OpenRouter</b>")
-        or_label.set_halign(Gtk.Align.START)
-        right_box.pack_start(or_label, False, False, 3)
-        
-        openrouter_models = [
-            ("openrouter/anthropic/claude-opus-4.6", "Anthropic Claude Opus 4.6"),
-            ("openrouter/anthropic/claude-sonnet-4.5", "Anthropic Claude Sonnet 4.5"),
-            ("openrouter/openai/gpt-5.3-codex", "OpenAI GPT-5.3 Codex"),
-            ("openrouter/openai/gpt-5.2", "OpenAI GPT-5.2"),
-            ("openrouter/openai/gpt-5-nano", "OpenAI GPT-5 Nano"),
-            ("openrouter/openai/gpt-4o-mini", "OpenAI GPT-4o Mini"),
-            ("openrouter/google/gemini-3-pro", "Google Gemini 3 Pro"),
-            ("openrouter/google/gemini-3-flash", "Google Gemini 3 Flash"),
-            ("openrouter/google/gemini-2.5-flash-lite-preview-09-2025", "Google Gemini 2.5 Flash Lite"),
-            ("openrouter/google/gemini-3-flash-preview", "Google Gemini 3 Flash Preview"),
-            ("openrouter/moonshotai/kimi-k2.5", "Moonshot Kimi K2.5"),
-            ("openrouter/minimax/minimax-m2.5", "Minimax M2.5"),
-            ("openrouter/zai/glm-5", "Zhipu GLM-5"),
-            ("openrouter/deepseek/deepseek-v3.2", "DeepSeek V3.2"),
-            ("openrouter/qwen/qwen-3.5-plus", "Alibaba Qwen 3.5 Plus"),
-            ("openrouter/xai/grok-4.1-fast", "xAI Grok 4.1 Fast")
-        ]
+        # Filter entry
+        self.model_filter_entry = Gtk.SearchEntry()
+        self.model_filter_entry.set_placeholder_text("Filter models (name, provider or ID)")
+        self.model_filter_entry.connect("search-changed", self._on_model_filter_changed)
+        box.pack_start(self.model_filter_entry, False, False, 0)
+        
+        # One row per catalog model; the TreeView only realizes visible rows
+        self.model_store = Gtk.ListStore(bool, str, str, str, str)
+        self._model_iters = {}
+        self._model_filter_words = []
+        self._model_filter_ids = None
+        self._unindexed_ids = set()
+        
+        # The SQLite index also holds imported catalog dumps; fall back to catalog.json
+        self.catalog_index = open_index()
+        if self.catalog_index:
+            for model_id, name, group in self.catalog_index.models():
+                self._add_model_row(model_id, name, group)
+        else:
+            for entry in load_catalog():
+                self._add_model_row(entry["id"], entry["name"], entry["group"])
+        
+        self.model_filter = self.model_store.filter_new()
+        self.model_filter.set_visible_func(self._model_row_visible)
+        
+        tree = Gtk.TreeView(model=self.model_filter)
+        tree.set_enable_search(False)
+        tree.connect("row-activated", self._on_model_activated)
+        
+        toggle = Gtk.CellRendererToggle()
+        toggle.connect("toggled", self._on_model_toggled)
+        toggle_column = Gtk.TreeViewColumn("", toggle, active=MODEL_COL_ENABLED)
+        toggle_column.set_sizing(Gtk.TreeViewColumnSizing.FIXED)
+        toggle_column.set_fixed_width(30)
+        tree.append_column(toggle_column)
+        
+        for title, column_id, width in (("Model", MODEL_COL_NAME, 220),
+                                        ("Provider", MODEL_COL_GROUP, 110),
+                                        ("ID", MODEL_COL_ID, 260)):
+            column = Gtk.TreeViewColumn(title, Gtk.CellRendererText(), text=column_id)
+            column.set_sizing(Gtk.TreeViewColumnSizing.FIXED)
+            column.set_fixed_width(width)
+            column.set_resizable(True)
+            tree.append_column(column)
+        
+        # All columns are fixed width, so rows can be measured without rendering them
+        tree.set_fixed_height_mode(True)
         
-        for model_id, display_name in openrouter_models:
-            self._add_model_checkbox(right_box, model_id, model_id)
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
+        scrolled.set_shadow_type(Gtk.ShadowType.IN)
+        scrolled.add(tree)
+        box.pack_start(scrolled, True, True, 0)
         
-        main_box.pack_start(left_frame, True, True, 0)
-        main_box.pack_start(right_frame, True, True, 0)
+        self.model_status_label = Gtk.Label(label="Double-click a model to switch sessions to it on Save")
+        self.model_status_label.set_halign(Gtk.Align.START)
+        self.model_status_label.set_ellipsize(Pango.EllipsizeMode.END)
+        box.pack_start(self.model_status_label, False, False, 0)
         
-        scrolled.add_with_viewport(main_box)
-        return scrolled
+        # Load current models from JSON
+        self._load_models_from_json()
+        
+        return box
+    
+    def _add_model_row(self, model_id, name, group):
+        """Append a model to the model store and index it by ID"""
+        search_key = f"{name} {group} {model_id}".lower()
+        self._model_iters[model_id] = self.model_store.append([False, model_id, name, group, search_key])
+    
+    def _model_row_visible(self, model, tree_iter, data):
+        model_id = model[tree_iter][MODEL_COL_ID]
+        # Rows the index doesn't hold ("Other") still go through the word match
+        if self._model_filter_ids is not None and model_id not in self._unindexed_ids:
+            return model_id in self._model_filter_ids
+        search_key = model[tree_iter][MODEL_COL_SEARCH]
+        return all(word in search_key for word in self._model_filter_words)
+    
+    def _on_model_filter_changed(self, entry):
+        text = entry.get_text()
+        self._model_filter_words = text.lower().split()
+        self._model_filter_ids = None
+        if self.catalog_index and self._model_filter_words:
+            # FTS lookup once, then a set membership test per row
+            try:
+                self._model_filter_ids = set(self.catalog_index.search(text, ranked=False))
+            except Exception as e:
+                print(f"Error searching catalog: {e}")
+        self.model_filter.refilter()
+    
+    def _on_model_toggled(self, renderer, path):
+        child_path = self.model_filter.convert_path_to_child_path(Gtk.TreePath(path))
+        row = self.model_store[child_path]
+        row[MODEL_COL_ENABLED] = not row[MODEL_COL_ENABLED]
+    
+    def _on_model_activated(self, tree, path, column):
+        model_id = self.model_filter[path][MODEL_COL_ID]
+        sessions = self.store.menu_section('oc_models', {}).get('sessions') or ["agent:main:main"]
+        for session_key in sessions:
+            self.command_queue.patch_session(session_key, model_id)
+        self.model_status_label.set_text(f"On Save: {'; '.join(self.command_queue.pending())}")
+    
+    def _on_commands_done(self, results, app=None):
+        """Show what the queued session switches did and release the hold taken on Save"""
+        for result in results:
+            status = "ok" if result["ok"] else "failed"
+            print(f"{result['command']}: {status} in {result['ms']} ms {result['detail']}".rstrip())
+        if app:
+            app.release()
+        # A destroyed window has left the application
+        if self._is_tab_built("models") and self.get_application():
+            failed = [r["command"] for r in results if not r["ok"]]
+            if failed:
+                self.model_status_label.set_text(f"Switch failed: {'; '.join(failed)}")
+            else:
+                self.model_status_label.set_text(f"Switched: {'; '.join(r['command'] for r in results)}")
     
     def _create_manual_tab(self):
         scrolled = Gtk.ScrolledWindow()
@@ -307,6 +384,9 @@ class SettingsWindow(Gtk.Dialog):
         return scrolled
     
     def _create_local_tab(self):
+        from ollama_discovery import OllamaDiscovery
+        self.ollama_discovery = OllamaDiscovery()
+        
         scrolled = Gtk.ScrolledWindow()
         scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
@@ -363,6 +443,16 @@ class SettingsWindow(Gtk.Dialog):
         port_box.pack_start(self.ollama_port_entry, True, True, 0)
         addr_box.pack_start(port_box, False, False, 3)
         
+        # Further servers; the applet routes each model to the fastest one that has it
+        extra_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+        extra_label = Gtk.Label(label="More servers:")
+        extra_label.set_size_request(100, -1)
+        self.ollama_extra_entry = Gtk.Entry()
+        self.ollama_extra_entry.set_placeholder_text("host:port, host:port")
+        extra_box.pack_start(extra_label, False, False, 0)
+        extra_box.pack_start(self.ollama_extra_entry, True, True, 0)
+        addr_box.pack_start(extra_box, False, False, 3)
+        
         addr_frame.add(addr_box)
         box.pack_start(addr_frame, False, False, 5)
         
@@ -374,53 +464,133 @@ class SettingsWindow(Gtk.Dialog):
         models_title.set_halign(Gtk.Align.START)
         box.pack_start(models_title, False, False, 5)
         
-        desc2 = Gtk.Label(label="Add up to 10 Ollama models (e.g., llama3.3, deepseek-r1:32b)")
-        desc2.set_halign(Gtk.Align.START)
-        box.pack_start(desc2, False, False, 3)
-        
-        # Ollama model entries
-        self.ollama_model_entries = {}
-        
-        for i in range(1, 11):
-            frame = Gtk.Frame(label=f"Ollama Model #{i}")
-            frame.set_shadow_type(Gtk.ShadowType.IN)
-            model_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
-            model_box.set_border_width(10)
-            
-            # Display name
-            name_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
-            name_label = Gtk.Label(label="Display Name:")
-            name_label.set_size_request(120, -1)
-            name_entry = Gtk.Entry()
-            name_entry.set_placeholder_text("e.g., Llama 3.3")
-            name_box.pack_start(name_label, False, False, 0)
-            name_box.pack_start(name_entry, True, True, 0)
-            model_box.pack_start(name_box, False, False, 3)
-            
-            # Model ID
-            id_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
-            id_label = Gtk.Label(label="Model ID:")
-            id_label.set_size_request(120, -1)
-            id_entry = Gtk.Entry()
-            id_entry.set_placeholder_text("e.g., llama3.3 or ollama/llama3.3")
-            id_box.pack_start(id_label, False, False, 0)
-            id_box.pack_start(id_entry, True, True, 0)
-            model_box.pack_start(id_box, False, False, 3)
-            
-            frame.add(model_box)
-            box.pack_start(frame, False, False, 5)
-            
-            self.ollama_model_entries[f"ollama_model_{i}"] = {
-                "name": name_entry,
-                "model_id": id_entry
-            }
-        
-        # Load existing settings
+        # Discovery status and refresh
+        status_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+        self.ollama_spinner = Gtk.Spinner()
+        self.ollama_status_label = Gtk.Label(label="Models installed on the server appear here")
+        self.ollama_status_label.set_halign(Gtk.Align.START)
+        refresh_button = Gtk.Button(label="Refresh")
+        refresh_button.connect("clicked", lambda button: self._discover_ollama_models(force=True))
+        status_box.pack_start(self.ollama_spinner, False, False, 0)
+        status_box.pack_start(self.ollama_status_label, True, True, 0)
+        status_box.pack_end(refresh_button, False, False, 0)
+        box.pack_start(status_box, False, False, 3)
+        
+        # Installed models: enabled, model name, display name, size
+        self.ollama_store = Gtk.ListStore(bool, str, str, str)
+        self._ollama_iters = {}
+        self._ollama_generation = 0
+        tree = Gtk.TreeView(model=self.ollama_store)
+        
+        toggle = Gtk.CellRendererToggle()
+        toggle.connect("toggled", self._on_ollama_toggled)
+        tree.append_column(Gtk.TreeViewColumn("", toggle, active=OLLAMA_COL_ENABLED))
+        tree.append_column(Gtk.TreeViewColumn("Model", Gtk.CellRendererText(), text=OLLAMA_COL_MODEL))
+        
+        name_renderer = Gtk.CellRendererText()
+        name_renderer.set_property("editable", True)
+        name_renderer.connect("edited", self._on_ollama_name_edited)
+        name_column = Gtk.TreeViewColumn("Display Name", name_renderer, text=OLLAMA_COL_NAME)
+        name_column.set_expand(True)
+        tree.append_column(name_column)
+        tree.append_column(Gtk.TreeViewColumn("Size", Gtk.CellRendererText(), text=OLLAMA_COL_SIZE))
+        
+        tree_scroll = Gtk.ScrolledWindow()
+        tree_scroll.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        tree_scroll.set_shadow_type(Gtk.ShadowType.IN)
+        tree_scroll.set_size_request(-1, 220)
+        tree_scroll.add(tree)
+        box.pack_start(tree_scroll, True, True, 5)
+        
+        # Load existing settings, then ask the server what it has
         self._load_ollama_settings()
         
         scrolled.add_with_viewport(box)
         return scrolled
     
+    def _ollama_address(self):
+        """Return the (host, port) the Local tab currently points at"""
+        if not self.ollama_custom_check.get_active():
+            return "127.0.0.1", 11434
+        host = self.ollama_ip_entry.get_text().strip() or "127.0.0.1"
+        try:
+            port = int(self.ollama_port_entry.get_text().strip() or "11434")
+        except ValueError:
+            port = 11434
+        return host, port
+    
+    def _ollama_endpoints(self):
+        """Primary address plus any further servers, without duplicates"""
+        from ollama_pool import configured_endpoints, parse_endpoints
+        host, port = self._ollama_address()
+        endpoints = [{"ip": host, "port": port}]
+        if self.ollama_custom_check.get_active():
+            endpoints += parse_endpoints(self.ollama_extra_entry.get_text())
+        return configured_endpoints({"endpoints": endpoints})
+    
+    def _add_ollama_row(self, model, name, enabled, size=""):
+        from ollama_discovery import tag_key
+        key = tag_key(model)
+        if key in self._ollama_iters:
+            return self.ollama_store[self._ollama_iters[key]]
+        self._ollama_iters[key] = self.ollama_store.append([enabled, model, name, size])
+        return self.ollama_store[self._ollama_iters[key]]
+    
+    def _discover_ollama_models(self, force=False):
+        """Query every configured Ollama server off the main loop"""
+        endpoints = self._ollama_endpoints()
+        self._ollama_generation += 1
+        generation = self._ollama_generation
+        results = []
+        
+        def on_discovered(models, error, endpoint):
+            if generation == self._ollama_generation:
+                results.append((endpoint, models, error))
+                if len(results) == len(endpoints):
+                    self._on_ollama_models_discovered(results)
+        
+        self.ollama_spinner.start()
+        if len(endpoints) == 1:
+            self.ollama_status_label.set_text(f"Looking for models on {endpoints[0]['ip']}:{endpoints[0]['port']}...")
+        else:
+            self.ollama_status_label.set_text(f"Looking for models on {len(endpoints)} servers...")
+        for endpoint in endpoints:
+            self.ollama_discovery.discover(
+                endpoint["ip"], endpoint["port"],
+                lambda models, error, endpoint=endpoint: on_discovered(models, error, endpoint),
+                force=force)
+    
+    def _on_ollama_models_discovered(self, results):
+        """results: (endpoint, models, error) per server; rows show the union"""
+        from ollama_discovery import format_size, tag_key
+        self.ollama_spinner.stop()
+        reachable = [(endpoint, models) for endpoint, models, error in results if error is None]
+        if not reachable:
+            self.ollama_status_label.set_text(f"Ollama server not reachable: {results[0][2]}")
+            return
+        
+        installed = set()
+        for endpoint, models in reachable:
+            for model in models:
+                installed.add(tag_key(model["name"]))
+                row = self._add_ollama_row(model["name"], model["name"], False)
+                row[OLLAMA_COL_SIZE] = format_size(model["size"])
+        for row in self.ollama_store:
+            if tag_key(row[OLLAMA_COL_MODEL]) not in installed:
+                row[OLLAMA_COL_SIZE] = "not installed"
+        status = f"{len(installed)} models installed"
+        if len(results) > 1:
+            status += f" on {len(reachable)} of {len(results)} servers"
+        self.ollama_status_label.set_text(status)
+    
+    def _on_ollama_toggled(self, renderer, path):
+        row = self.ollama_store[path]
+        row[OLLAMA_COL_ENABLED] = not row[OLLAMA_COL_ENABLED]
+    
+    def _on_ollama_name_edited(self, renderer, path, text):
+        row = self.ollama_store[path]
+        row[OLLAMA_COL_NAME] = text.strip() or row[OLLAMA_COL_MODEL]
+    
     def _create_menu_tab(self):
         scrolled = Gtk.ScrolledWindow()
         scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
@@ -457,6 +627,16 @@ class SettingsWindow(Gtk.Dialog):
             box.pack_start(check, False, False, 3)
             self.menu_checkboxes[item_id] = check
         
+        # Sessions a model click switches
+        sessions_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+        sessions_label = Gtk.Label(label="Switch sessions:")
+        self.sessions_entry = Gtk.Entry()
+        self.sessions_entry.set_placeholder_text("agent:main:main")
+        self.sessions_entry.set_tooltip_text("Session keys or globs such as agent:*:main, separated by spaces")
+        sessions_box.pack_start(sessions_label, False, False, 0)
+        sessions_box.pack_start(self.sessions_entry, True, True, 0)
+        box.pack_start(sessions_box, False, False, 5)
+        
         # Load current settings
         self._load_menu_settings()
         
@@ -499,13 +679,24 @@ class SettingsWindow(Gtk.Dialog):
             cmd_box.pack_start(cmd_entry, True, True, 0)
             custom_box.pack_start(cmd_box, False, False, 3)
             
+            # Timeout input (0 = the runner's default)
+            timeout_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+            timeout_label = Gtk.Label(label="Timeout:")
+            timeout_label.set_size_request(80, -1)
+            timeout_spin = Gtk.SpinButton.new_with_range(0, 86400, 30)
+            timeout_spin.set_tooltip_text("Seconds before the command is stopped, 0 for 10 minutes")
+            timeout_box.pack_start(timeout_label, False, False, 0)
+            timeout_box.pack_start(timeout_spin, False, False, 0)
+            custom_box.pack_start(timeout_box, False, False, 3)
+            
             custom_frame.add(custom_box)
             box.pack_start(custom_frame, False, False, 5)
             
             # Store references
             self.custom_entries[f"custom_{i}"] = {
                 "title": title_entry,
-                "command": cmd_entry
+                "command": cmd_entry,
+                "timeout": timeout_spin
             }
         
         # Load custom items
@@ -517,62 +708,42 @@ class SettingsWindow(Gtk.Dialog):
     def _load_menu_settings(self):
         """Load menu visibility settings from JSON"""
         try:
-            menu_json_path = os.path.expanduser("~/.local/share/cinnamon/applets/oc-applet@farmfield.se/menu.json")
-            if os.path.exists(menu_json_path):
-                with open(menu_json_path, 'r') as f:
-                    menu_config = json.load(f)
-                    for item_id, checkbox in self.menu_checkboxes.items():
-                        if item_id in menu_config:
-                            checkbox.set_active(menu_config[item_id].get('enabled', True))
+            menu_config = self.store.menu
+            for item_id, checkbox in self.menu_checkboxes.items():
+                checkbox.set_active(menu_config.get(item_id, {}).get('enabled', True))
+            sessions = menu_config.get('oc_models', {}).get('sessions', [])
+            self.sessions_entry.set_text(" ".join(sessions))
         except Exception as e:
             print(f"Error loading menu settings: {e}")
 
     def _load_custom_items(self):
         """Load custom menu items from JSON"""
         try:
-            menu_json_path = os.path.expanduser("~/.local/share/cinnamon/applets/oc-applet@farmfield.se/menu.json")
-            if os.path.exists(menu_json_path):
-                with open(menu_json_path, 'r') as f:
-                    menu_config = json.load(f)
-                    for i in range(1, 4):
-                        key = f"custom_{i}"
-                        if key in menu_config and key in self.custom_entries:
-                            self.custom_entries[key]["title"].set_text(menu_config[key].get("title", ""))
-                            self.custom_entries[key]["command"].set_text(menu_config[key].get("command", ""))
+            menu_config = self.store.menu
+            for i in range(1, 4):
+                key = f"custom_{i}"
+                if key in self.custom_entries:
+                    item = menu_config.get(key, {})
+                    self.custom_entries[key]["title"].set_text(item.get("title", ""))
+                    self.custom_entries[key]["command"].set_text(item.get("command", ""))
+                    self.custom_entries[key]["timeout"].set_value(item.get("timeout", 0))
         except Exception as e:
             print(f"Error loading custom items: {e}")
 
     def _save_custom_items(self):
         """Save custom menu items to JSON"""
+        if not self._is_tab_built("menu"):
+            return True
+        
         try:
-            menu_json_path = os.path.expanduser("~/.local/share/cinnamon/applets/oc-applet@farmfield.se/menu.json")
-            
-            # Load existing or create new
-            if os.path.exists(menu_json_path):
-                with open(menu_json_path, 'r') as f:
-                    menu_config = json.load(f)
-            else:
-                menu_config = {}
-            
             # Save custom items
             for i in range(1, 4):
                 key = f"custom_{i}"
                 if key in self.custom_entries:
-                    title = self.custom_entries[key]["title"].get_text().strip()
-                    command = self.custom_entries[key]["command"].get_text().strip()
-                    
-                    if title or command:  # Only save if there's content
-                        menu_config[key] = {
-                            "title": title,
-                            "command": command,
-                            "enabled": True
-                        }
-                    elif key in menu_config:
-                        # Remove if empty
-                        del menu_config[key]
-            
-            with open(menu_json_path, 'w') as f:
-                json.dump(menu_config, f, indent=4)
+                    # Empty title and command removes the item
+                    set_custom_item(self.store, i, self.custom_entries[key]["title"].get_text(),
+                                    self.custom_entries[key]["command"].get_text(),
+                                    self.custom_entries[key]["timeout"].get_value_as_int())
             return True
         except Exception as e:
             print(f"Error saving custom items: {e}")
@@ -581,53 +752,36 @@ class SettingsWindow(Gtk.Dialog):
     def _load_manual_models(self):
         """Load manual model entries from JSON"""
         try:
-            models_json_path = os.path.expanduser("~/.local/share/cinnamon/applets/oc-applet@farmfield.se/models.json")
-            if os.path.exists(models_json_path):
-                with open(models_json_path, 'r') as f:
-                    models = json.load(f)
-                    
-                # Find manual models (those with manual_ prefix in id)
-                manual_index = 1
-                for model in models:
-                    if model.get('id', '').startswith('manual_'):
-                        key = f"manual_model_{manual_index}"
-                        if key in self.manual_model_entries and manual_index <= 10:
-                            self.manual_model_entries[key]["title"].set_text(model.get('name', ''))
-                            self.manual_model_entries[key]["model_id"].set_text(model.get('id', '').replace('manual_', ''))
-                            manual_index += 1
+            for entries in self.manual_model_entries.values():
+                entries["title"].set_text("")
+                entries["model_id"].set_text("")
+            
+            # Manual models are stored as manual_<id>; the registry has the bare ID
+            manual_index = 1
+            for record in self.store.registry.by_source("manual"):
+                key = f"manual_model_{manual_index}"
+                if key in self.manual_model_entries and manual_index <= 10:
+                    self.manual_model_entries[key]["title"].set_text(record.entry.get('name', ''))
+                    self.manual_model_entries[key]["model_id"].set_text(record.id)
+                    manual_index += 1
         except Exception as e:
             print(f"Error loading manual models: {e}")
 
     def _save_manual_models(self):
         """Save manual models to models.json"""
+        if not self._is_tab_built("manual"):
+            return True
+        
         try:
-            models_json_path = os.path.expanduser("~/.local/share/cinnamon/applets/oc-applet@farmfield.se/models.json")
-            
-            # Load existing models
-            if os.path.exists(models_json_path):
-                with open(models_json_path, 'r') as f:
-                    models = json.load(f)
-            else:
-                models = []
-            
-            # Remove existing manual models
-            models = [m for m in models if not m.get('id', '').startswith('manual_')]
-            
-            # Add new manual models
+            # Replace existing manual models
+            models = []
             for i in range(1, 11):
                 key = f"manual_model_{i}"
                 if key in self.manual_model_entries:
-                    title = self.manual_model_entries[key]["title"].get_text().strip()
-                    model_id = self.manual_model_entries[key]["model_id"].get_text().strip()
-                    
-                    if title and model_id:
-                        models.append({
-                            "id": f"manual_{model_id}",
-                            "name": title
-                        })
+                    models.append((self.manual_model_entries[key]["title"].get_text().strip(),
+                                   self.manual_model_entries[key]["model_id"].get_text().strip()))
             
-            with open(models_json_path, 'w') as f:
-                json.dump(models, f, indent=4)
+            set_manual_models(self.store, models)
             return True
         except Exception as e:
             print(f"Error saving manual models: {e}")
@@ -635,105 +789,133 @@ class SettingsWindow(Gtk.Dialog):
 
     def _load_ollama_settings(self):
         """Load Ollama settings from menu.json"""
+        from ollama_pool import configured_endpoints, format_endpoints
         try:
-            menu_json_path = os.path.expanduser("~/.local/share/cinnamon/applets/oc-applet@farmfield.se/menu.json")
-            if os.path.exists(menu_json_path):
-                with open(menu_json_path, 'r') as f:
-                    menu_config = json.load(f)
-                
-                # Load Ollama config
-                if 'ollama' in menu_config:
-                    ollama = menu_config['ollama']
-                    self.ollama_enabled_check.set_active(ollama.get('enabled', False))
-                    self.ollama_custom_check.set_active(ollama.get('custom_address', False))
-                    self.ollama_ip_entry.set_text(ollama.get('ip', '127.0.0.1'))
-                    self.ollama_port_entry.set_text(str(ollama.get('port', 11434)))
-                    
-                    # Load models
-                    for i, model in enumerate(ollama.get('models', []), 1):
-                        key = f"ollama_model_{i}"
-                        if key in self.ollama_model_entries and i <= 10:
-                            self.ollama_model_entries[key]["name"].set_text(model.get('name', ''))
-                            self.ollama_model_entries[key]["model_id"].set_text(model.get('id', ''))
+            # Load Ollama config
+            ollama = self.store.menu_section('ollama', {})
+            self.ollama_enabled_check.set_active(ollama.get('enabled', False))
+            self.ollama_custom_check.set_active(ollama.get('custom_address', False))
+            self.ollama_ip_entry.set_text(ollama.get('ip', '127.0.0.1'))
+            self.ollama_port_entry.set_text(str(ollama.get('port', 11434)))
+            primary = (ollama.get('ip', '127.0.0.1'), ollama.get('port', 11434))
+            extras = [e for e in configured_endpoints(ollama) if (e['ip'], e['port']) != primary]
+            self.ollama_extra_entry.set_text(format_endpoints(extras) if ollama.get('endpoints') else "")
+            
+            # Saved models first; discovery fills in sizes and the rest
+            self.ollama_store.clear()
+            self._ollama_iters = {}
+            for model in ollama.get('models', []):
+                model_id = model.get('id', '')
+                if model_id.startswith('ollama/'):
+                    model_id = model_id[7:]
+                if model_id:
+                    self._add_ollama_row(model_id, model.get('name') or model_id, True)
         except Exception as e:
             print(f"Error loading Ollama settings: {e}")
+        
+        self._discover_ollama_models()
 
     def _save_ollama_settings(self):
         """Save Ollama settings to menu.json and models to models.json"""
+        if not self._is_tab_built("local"):
+            return True
+        
         try:
-            menu_json_path = os.path.expanduser("~/.local/share/cinnamon/applets/oc-applet@farmfield.se/menu.json")
-            models_json_path = os.path.expanduser("~/.local/share/cinnamon/applets/oc-applet@farmfield.se/models.json")
-            
-            # Load existing configs
-            if os.path.exists(menu_json_path):
-                with open(menu_json_path, 'r') as f:
-                    menu_config = json.load(f)
-            else:
-                menu_config = {}
-            
-            if os.path.exists(models_json_path):
-                with open(models_json_path, 'r') as f:
-                    models = json.load(f)
-            else:
-                models = []
-            
-            # Remove existing Ollama models from models.json
-            models = [m for m in models if not m.get('id', '').startswith('ollama/')]
-            
-            # Build Ollama config
-            ollama_models = []
-            for i in range(1, 11):
-                key = f"ollama_model_{i}"
-                if key in self.ollama_model_entries:
-                    name = self.ollama_model_entries[key]["name"].get_text().strip()
-                    model_id = self.ollama_model_entries[key]["model_id"].get_text().strip()
-                    
-                    if name and model_id:
-                        # Ensure model_id has ollama/ prefix
-                        if not model_id.startswith('ollama/'):
-                            model_id = f"ollama/{model_id}"
-                        
-                        ollama_models.append({"name": name, "id": model_id})
-                        models.append({"id": model_id, "name": name})
-            
-            menu_config['ollama'] = {
-                'enabled': self.ollama_enabled_check.get_active(),
-                'custom_address': self.ollama_custom_check.get_active(),
-                'ip': self.ollama_ip_entry.get_text().strip() or '127.0.0.1',
-                'port': int(self.ollama_port_entry.get_text().strip() or '11434'),
-                'models': ollama_models
-            }
-            
-            # Save configs
-            with open(menu_json_path, 'w') as f:
-                json.dump(menu_config, f, indent=4)
-            
-            with open(models_json_path, 'w') as f:
-                json.dump(models, f, indent=4)
+            # Build Ollama config from the ticked rows
+            models = [(row[OLLAMA_COL_MODEL], row[OLLAMA_COL_NAME]) for row in self.ollama_store
+                      if row[OLLAMA_COL_ENABLED]]
+            set_ollama(self.store,
+                       enabled=self.ollama_enabled_check.get_active(),
+                       custom_address=self.ollama_custom_check.get_active(),
+                       ip=self.ollama_ip_entry.get_text().strip(),
+                       port=self.ollama_port_entry.get_text().strip(),
+                       models=models,
+                       endpoints=self._ollama_endpoints())
             
             return True
         except Exception as e:
             print(f"Error saving Ollama settings: {e}")
             return False
 
-if __name__ == "__main__":
-    settings = Gtk.Settings.get_default()
-    settings.set_property("gtk-application-prefer-dark-theme", True)
-    
-    dialog = SettingsWindow()
-    response = dialog.run()
-    
-    if response == Gtk.ResponseType.CANCEL:
-        print("Settings cancelled")
-    elif response == Gtk.ResponseType.OK:
-        models_saved = dialog._save_models_to_json()
-        menu_saved = dialog._save_menu_settings()
-        custom_saved = dialog._save_custom_items()
-        manual_saved = dialog._save_manual_models()
-        ollama_saved = dialog._save_ollama_settings()
-        if models_saved and menu_saved and custom_saved and manual_saved and ollama_saved:
-            print("Settings saved")
+def _report_first_frame(widget, cr):
+    """Print time-to-first-frame once the dialog has been drawn"""
+    widget.disconnect_by_func(_report_first_frame)
+    print(f"time-to-first-frame: {(time.perf_counter() - START_TIME) * 1000:.1f} ms")
+    return False
+
+class SettingsApplication(Gtk.Application):
+    """Single-instance settings app that can stay resident with the window hidden"""
+    
+    def __init__(self, resident=False, background=False, timing=False):
+        super().__init__(application_id=APP_ID, flags=Gio.ApplicationFlags.FLAGS_NONE)
+        self.resident = resident
+        self.background = background
+        self.timing = timing
+        self.dialog = None
+    
+    def do_startup(self):
+        Gtk.Application.do_startup(self)
+        settings = Gtk.Settings.get_default()
+        settings.set_property("gtk-application-prefer-dark-theme", True)
+        
+        # Lets the applet stop the resident process when it is removed
+        quit_action = Gio.SimpleAction.new("quit", None)
+        quit_action.connect("activate", lambda action, param: self.quit())
+        self.add_action(quit_action)
+        
+        if self.resident:
+            # Keep running after the window is hidden
+            self.hold()
+    
+    def do_activate(self):
+        if self.dialog is None:
+            self.dialog = SettingsWindow()
+            self.add_window(self.dialog)
+            self.dialog.connect("response", self._on_response)
+            self.dialog.connect("delete-event", self._on_delete)
+            if self.timing:
+                self.dialog.connect_after("draw", _report_first_frame)
+            if self.background:
+                # Pre-warm: build the dialog but stay hidden until the next activation
+                self.background = False
+                return
         else:
-            print("Failed to save settings")
+            self.dialog.reload_config()
+        self.dialog.present()
+    
+    def _on_delete(self, dialog, event):
+        # The response handler hides or destroys the window
+        return True
+    
+    def _on_response(self, dialog, response):
+        if response == Gtk.ResponseType.OK:
+            dialog.save_settings()
+        else:
+            if dialog._command_queue:
+                dialog._command_queue.clear()
+            print("Settings cancelled")
+        
+        if self.resident:
+            dialog.hide()
+        else:
+            dialog.destroy()
+            self.dialog = None
+
+if __name__ == "__main__":
+    # --resident: stay alive hidden after closing, so the next open is instant
+    # --background: start resident without showing the window (pre-warm)
+    # --timing: print time-to-first-frame
+    background = "--background" in sys.argv
+    app = SettingsApplication(
+        resident=background or "--resident" in sys.argv,
+        background=background,
+        timing="--timing" in sys.argv
+    )
+    
+    if background:
+        app.register(None)
+        if app.get_is_remote():
+            # Already resident, nothing to pre-warm
+            sys.exit(0)
     
-    dialog.destroy()
+    sys.exit(app.run([sys.argv[0]]))
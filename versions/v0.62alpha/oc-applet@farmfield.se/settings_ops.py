@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Settings edits shared by the settings dialog and the headless CLI.
+Each function applies one kind of change to a ConfigStore the same way
+the dialog's Save does; callers then save the store and write the menu
+snapshot. Nothing here imports Gtk.
+"""
+from model_registry import catalog_model_name
+
+# Labels written for menu items that don't have one yet
+DEFAULT_LABELS = {
+    "oc_models": "OC Models",
+    "oc_start": "OC Start",
+    "oc_stop": "OC Stop",
+    "oc_restart": "OC Restart",
+    "oc_dashboard": "OC Dashboard",
+    "oc_json": "OC Json",
+    "oc_folder": "OC Folder",
+    "oc_doctor": "OC Doctor"
+}
+# Menu items the Menu tab can toggle; title and credits carry "text" instead of "label"
+MENU_ITEMS = ("title",) + tuple(DEFAULT_LABELS) + ("settings", "credits")
+TEXT_ITEMS = ("title", "credits")
+DEFAULT_SESSIONS = ["agent:main:main"]
+CUSTOM_SLOTS = 3
+MANUAL_SLOTS = 10
+
+
+def set_catalog_models(store, model_ids):
+    """Make exactly model_ids the enabled catalog models, in the given order
+
+    Models that were already enabled keep their entry (and name) as is.
+    """
+    current = {m.get('id'): m for m in store.model_entries("catalog")}
+    seen = set()
+    models = []
+    for model_id in model_ids:
+        if model_id not in seen:
+            seen.add(model_id)
+            models.append(current.get(model_id) or {"id": model_id, "name": catalog_model_name(model_id)})
+    store.set_model_entries("catalog", models)
+    return models
+
+
+def set_menu_item(store, item_id, enabled=None, label=None):
+    """Toggle and/or relabel one menu item"""
+    if item_id not in MENU_ITEMS:
+        raise ValueError(f"unknown menu item {item_id} (one of {', '.join(MENU_ITEMS)})")
+    item = dict(store.menu_section(item_id, {}))
+    field = 'text' if item_id in TEXT_ITEMS else 'label'
+    if enabled is not None:
+        item['enabled'] = enabled
+    if label is not None:
+        item[field] = label
+    elif field not in item and item_id in DEFAULT_LABELS:
+        item[field] = DEFAULT_LABELS[item_id]
+    store.set_menu_section(item_id, item)
+
+
+def set_sessions(store, sessions):
+    """Session keys or globs a model click switches; the default is not stored"""
+    item = dict(store.menu_section('oc_models', {}))
+    if sessions and list(sessions) != DEFAULT_SESSIONS:
+        item['sessions'] = list(sessions)
+    else:
+        item.pop('sessions', None)
+    store.set_menu_section('oc_models', item)
+
+
+def set_custom_item(store, slot, title, command, timeout=None):
+    """Set custom item 1-3; empty title and command removes it
+
+    timeout is the run limit in seconds for custom_runner.py; None keeps
+    the stored one, 0 drops it (the runner's default applies).
+    """
+    if not 1 <= slot <= CUSTOM_SLOTS:
+        raise ValueError(f"custom item slot must be 1-{CUSTOM_SLOTS}")
+    key = f"custom_{slot}"
+    title, command = title.strip(), command.strip()
+    if timeout is None:
+        timeout = store.menu_section(key, {}).get("timeout")
+    if title or command:
+        item = {"title": title, "command": command, "enabled": True}
+        if timeout:
+            item["timeout"] = int(timeout)
+        store.set_menu_section(key, item)
+    else:
+        store.remove_menu_section(key)
+
+
+def set_manual_models(store, models):
+    """Replace the manual models with (title, model_id) pairs, first MANUAL_SLOTS kept"""
+    entries = [{"id": f"manual_{model_id}", "name": title}
+               for title, model_id in models if title and model_id][:MANUAL_SLOTS]
+    store.set_model_entries("manual", entries)
+
+
+def set_ollama(store, enabled, custom_address, ip, port, models, endpoints=()):
+    """Write the ollama section and its models.json entries
+
+    models are (model, name) pairs without the ollama/ prefix; endpoints
+    are stored only when there is more than the primary server.
+    """
+    entries = [{"id": f"ollama/{model}", "name": name or model} for model, name in models]
+    ollama = {
+        'enabled': enabled,
+        'custom_address': custom_address,
+        'ip': ip or '127.0.0.1',
+        'port': int(port or 11434),
+        'models': [{"name": e["name"], "id": e["id"]} for e in entries]
+    }
+    if len(endpoints) > 1:
+        ollama['endpoints'] = list(endpoints)
+    store.set_menu_section('ollama', ollama)
+    store.set_model_entries("ollama", entries)
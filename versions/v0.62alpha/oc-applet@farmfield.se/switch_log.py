@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+JSON-lines event log for model switches.
+One handle is opened per run and shared by all threads; each event is a
+single line. When the file passes MAX_BYTES it is rotated to .1 (one old
+generation kept), so the log never grows without bound. summarize() streams
+both generations and reports latency percentiles and failure rates.
+"""
+import json
+import os
+import threading
+import time
+
+from runtime import CACHE_DIR
+
+LOG_PATH = os.path.join(CACHE_DIR, "switch-log.jsonl")
+MAX_BYTES = 1024 * 1024
+
+
+class SwitchLog:
+    """Append-only event log with size-based rotation"""
+
+    def __init__(self, path=LOG_PATH, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._file = None
+        self._lock = threading.Lock()
+
+    def event(self, kind, **fields):
+        """Write one event; never raises, logging must not break a switch"""
+        record = {"event": kind, "ts": round(time.time(), 3), "mono": round(time.monotonic(), 6),
+                  "pid": os.getpid(), **fields}
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    self._file = open(self.path, 'a')
+                if self._file.tell() + len(line) > self.max_bytes:
+                    self._rotate()
+                self._file.write(line)
+                self._file.flush()
+            except OSError as e:
+                print(f"Switch log error: {e}")
+
+    def _rotate(self):
+        self._file.close()
+        # Another process may have rotated already; only move a full file
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            os.replace(self.path, self.path + ".1")
+        self._file = open(self.path, 'a')
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_events(path=LOG_PATH, kind="switch"):
+    """Yield events of one kind, oldest generation first, skipping damaged lines"""
+    for name in (path + ".1", path):
+        try:
+            f = open(name, 'r')
+        except FileNotFoundError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("event") == kind:
+                    yield record
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(events):
+    """Per-model {count, failed, p50, p95, p99, paths} from switch events, plus an "ALL" row"""
+    groups = {}
+    for record in events:
+        for model in (record.get("model", "?"), "ALL"):
+            group = groups.setdefault(model, {"count": 0, "failed": 0, "ms": [], "paths": {}})
+            group["count"] += 1
+            if record.get("exit", 1) != 0:
+                group["failed"] += 1
+            else:
+                group["ms"].append(record.get("total_ms", 0.0))
+            path = record.get("path") or "failed"
+            group["paths"][path] = group["paths"].get(path, 0) + 1
+
+    summary = {}
+    for model, group in groups.items():
+        ms = sorted(group["ms"])
+        summary[model] = {
+            "count": group["count"],
+            "failed": group["failed"],
+            "p50": percentile(ms, 50),
+            "p95": percentile(ms, 95),
+            "p99": percentile(ms, 99),
+            "paths": group["paths"]
+        }
+    return summary
+
+
+def print_summary(summary):
+    if not summary:
+        print("No switches logged yet")
+        return
+    width = max(len("model"), *(len(model) for model in summary))
+    print(f"{'model':<{width}} {'count':>6} {'fail %':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  paths")
+
+    def ms(value):
+        return f"{value:>8.1f}" if value is not None else f"{'-':>8}"
+
+    models = sorted(m for m in summary if m != "ALL") + ["ALL"]
+    for model in models:
+        row = summary[model]
+        paths = " ".join(f"{path}={count}" for path, count in sorted(row["paths"].items()))
+        print(f"{model:<{width}} {row['count']:>6} {row['failed'] * 100 / row['count']:>6.1f}% "
+              f"{ms(row['p50'])} {ms(row['p95'])} {ms(row['p99'])}  {paths}")
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Switch Model Helper for OC-Applet
+Sets a session's model through the local gateway. A small resident helper
+(switch_model.py --serve) keeps authenticated gateway connections open
+and listens on a Unix socket, so a switch is one round trip that returns as
+soon as the gateway acknowledges. Without the helper the switch connects
+directly (and starts the helper for next time); if the gateway can't be
+reached the openclaw CLI is used instead.
+
+Several session keys or globs (agent:*:main) switch concurrently, at most
+--workers at a time, and print a per-session result table. Globs expand
+against the cached session inventory (session_inventory.py).
+
+Every switch is logged as one JSON line (switch_log.py) with the time spent
+in each step; --stats prints latency percentiles and failure rates per model.
+
+Usage: switch_model.py [--workers N] <session-key|glob>... <model-id>
+       switch_model.py --stats
+       switch_model.py --serve
+"""
+import fnmatch
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import session_inventory
+from gateway_client import GatewayClient, GatewayError
+from runtime import RUNTIME_DIR, openclaw_bin
+from switch_log import SwitchLog, print_summary, read_events, summarize
+
+SOCKET_PATH = os.path.join(RUNTIME_DIR, "switch.sock")
+
+HELPER_CONNECT_TIMEOUT = 0.2  # seconds to reach the helper socket
+HELPER_IDLE_TIMEOUT = 600  # seconds without requests before the helper exits
+CLI_TIMEOUT = 15  # seconds
+DEFAULT_WORKERS = 4
+
+_helper_lock = threading.Lock()
+_helper_started = False
+
+log = SwitchLog()
+
+
+# Fast paths
+
+def switch_via_helper(session_key, model, socket_path=SOCKET_PATH):
+    """Ask the resident helper; raises OSError if it isn't running"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(HELPER_CONNECT_TIMEOUT)
+        sock.connect(socket_path)
+        sock.settimeout(None)
+        sock.sendall(json.dumps({"session": session_key, "model": model}).encode() + b"\n")
+        reply = json.loads(sock.makefile('rb').readline() or b"{}")
+    if not reply.get("ok"):
+        raise GatewayError(reply.get("error") or "no reply from helper")
+    return reply
+
+
+def switch_direct(session_key, model):
+    """One-off gateway connection"""
+    client = GatewayClient().connect()
+    try:
+        client.patch_session(session_key, model)
+    finally:
+        client.close()
+
+
+def switch_via_cli(session_key, model):
+    """Slow path: openclaw sessions patch"""
+    command = [openclaw_bin(), "sessions", "patch", session_key, "--model", model]
+    result = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                            timeout=CLI_TIMEOUT)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, command, result.stdout, result.stderr)
+
+
+def start_helper():
+    """Launch the resident helper in the background, once per run"""
+    global _helper_started
+    with _helper_lock:
+        if _helper_started:
+            return
+        _helper_started = True
+    try:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve"],
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         start_new_session=True)
+    except OSError as e:
+        log.event("helper", action="start", error=str(e))
+
+
+def switch_model(session_key, target_model, use_helper=True):
+    """Switch a session's model; returns the path that worked, or None"""
+    steps = {}  # step -> ms, in the order tried
+    errors = {}
+    path, exit_code = None, 1
+    start = time.perf_counter()
+
+    def attempt(step, func):
+        step_start = time.perf_counter()
+        try:
+            func(session_key, target_model)
+            return True
+        finally:
+            steps[step] = round((time.perf_counter() - step_start) * 1000, 2)
+
+    if use_helper:
+        try:
+            if attempt("helper", switch_via_helper):
+                path = "helper"
+        except (OSError, ValueError) as e:
+            errors["helper"] = str(e)
+            start_helper()
+        except GatewayError as e:
+            errors["helper"] = str(e)
+
+    if path is None:
+        try:
+            if attempt("gateway", switch_direct):
+                path = "gateway"
+        except GatewayError as e:
+            errors["gateway"] = str(e)
+
+    if path is None:
+        try:
+            if attempt("cli", switch_via_cli):
+                path = "cli"
+        except subprocess.TimeoutExpired:
+            errors["cli"] = f"timed out after {CLI_TIMEOUT}s"
+            exit_code = 124
+        except subprocess.CalledProcessError as e:
+            errors["cli"] = (e.stderr or e.output or "").strip()[:200]
+            exit_code = e.returncode
+        except Exception as e:
+            errors["cli"] = str(e)
+
+    if path:
+        exit_code = 0
+    log.event("switch", session=session_key, model=target_model, path=path, exit=exit_code,
+              total_ms=round((time.perf_counter() - start) * 1000, 2), steps=steps,
+              **({"errors": errors} if errors else {}))
+    return path
+
+
+# Many sessions
+
+def expand_sessions(patterns, known=None):
+    """Expand globs against the known sessions; plain keys pass through
+
+    Known sessions come from the cached inventory (session_inventory.py);
+    a glob that matches nothing there is retried once against a fresh list.
+    """
+    keys = []
+    fresh = known is not None
+    for pattern in patterns:
+        if any(c in pattern for c in "*?["):
+            if known is None:
+                known = session_inventory.sessions()
+            matches = fnmatch.filter(known, pattern)
+            if not matches and not fresh:
+                known, fresh = session_inventory.sessions(wait=True), True
+                matches = fnmatch.filter(known, pattern)
+            keys.extend(matches)
+        else:
+            keys.append(pattern)
+    return list(dict.fromkeys(keys))
+
+
+def switch_many(session_keys, target_model, workers=DEFAULT_WORKERS):
+    """Switch sessions concurrently; returns [(session, path or None, seconds)] in input order"""
+    def run(session_key):
+        start = time.perf_counter()
+        path = switch_model(session_key, target_model)
+        return session_key, path, time.perf_counter() - start
+
+    if len(session_keys) == 1:
+        return [run(session_keys[0])]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(run, session_keys))
+
+
+def print_results(results, target_model, elapsed):
+    width = max([len("session")] + [len(key) for key, _, _ in results])
+    print(f"{'session':<{width}}  {'result':<8} {'ms':>8}")
+    for key, path, seconds in results:
+        print(f"{key:<{width}}  {path or 'FAILED':<8} {seconds * 1000:>8.1f}")
+    failed = sum(1 for _, path, _ in results if not path)
+    print(f"{len(results) - failed}/{len(results)} switched to {target_model} in {elapsed * 1000:.1f} ms")
+
+
+# Resident helper
+
+class SwitchHelper(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server keeping gateway connections alive between switches"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path=SOCKET_PATH, idle_timeout=HELPER_IDLE_TIMEOUT):
+        os.makedirs(os.path.dirname(socket_path), mode=0o700, exist_ok=True)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _SwitchHandler)
+        os.chmod(socket_path, 0o600)
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.last_used = time.monotonic()
+        # Idle connections; concurrent switches each take one so they don't queue
+        self.clients = [GatewayClient()]
+        self.lock = threading.Lock()
+
+    def patch(self, session_key, model):
+        """Send the patch on a kept-alive connection, reconnecting once"""
+        with self.lock:
+            self.last_used = time.monotonic()
+            client = self.clients.pop() if self.clients else GatewayClient()
+        try:
+            for attempt in (1, 2):
+                try:
+                    if not client.connected:
+                        client.connect()
+                    return client.patch_session(session_key, model)
+                except GatewayError:
+                    # A dropped connection gets one fresh try; a refusal doesn't
+                    if attempt == 2 or client.connected:
+                        raise
+        finally:
+            with self.lock:
+                if client.connected and len(self.clients) < DEFAULT_WORKERS:
+                    self.clients.append(client)
+                else:
+                    client.close()
+
+    def serve(self):
+        watchdog = threading.Thread(target=self._exit_when_idle, daemon=True)
+        watchdog.start()
+        try:
+            self.serve_forever()
+        finally:
+            for client in self.clients:
+                client.close()
+            self.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _exit_when_idle(self):
+        while time.monotonic() - self.last_used < self.idle_timeout:
+            time.sleep(min(30, self.idle_timeout))
+        self.shutdown()
+
+
+class _SwitchHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        start = time.perf_counter()
+        try:
+            request = json.loads(self.rfile.readline())
+            self.server.patch(request["session"], request["model"])
+            reply = {"ok": True}
+        except (GatewayError, ValueError, KeyError) as e:
+            reply = {"ok": False, "error": str(e)}
+        reply["ms"] = round((time.perf_counter() - start) * 1000, 2)
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+def serve():
+    """Run the helper unless another one already answers on the socket"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(SOCKET_PATH)
+        return
+    except OSError:
+        pass
+    helper = SwitchHelper()
+    try:
+        helper.clients[0].connect()
+    except GatewayError as e:
+        log.event("helper", action="serve", error=str(e))
+    helper.serve()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2 and sys.argv[1] == "--serve":
+        serve()
+        sys.exit(0)
+    if len(sys.argv) == 2 and sys.argv[1] == "--stats":
+        print_summary(summarize(read_events()))
+        sys.exit(0)
+
+    args = sys.argv[1:]
+    workers = DEFAULT_WORKERS
+    if len(args) >= 2 and args[0] == "--workers" and args[1].isdigit():
+        workers = int(args[1])
+        args = args[2:]
+    if len(args) < 2:
+        print(__doc__.strip().split("\n\n")[-1], file=sys.stderr)
+        sys.exit(1)
+
+    target_model = args[-1]
+    session_keys = expand_sessions(args[:-1])
+    if not session_keys:
+        print(f"No sessions match {' '.join(args[:-1])}", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    results = switch_many(session_keys, target_model, workers)
+    if len(results) > 1 or sys.stdout.isatty():
+        print_results(results, target_model, time.perf_counter() - start)
+    sys.exit(0 if all(path for _, path, _ in results) else 1)